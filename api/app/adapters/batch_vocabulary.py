@@ -0,0 +1,304 @@
+"""
+Shared word vocabulary for batch text scoring.
+A batch of texts is split on whitespace in one pass; each distinct chunk is
+tokenized only the first time it is seen, into indices of a vocabulary of
+accent-stripped words. Scorers keep per-word (or per-chunk) properties in
+arrays and work on the index arrays of a batch with NumPy.
+"""
+
+import itertools
+import os
+import re
+import threading
+import unicodedata
+import weakref
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Separates texts in the joined batch (stands alone between spaces)
+BATCH_SEPARATOR = "\x00"
+
+# Distinct chunks at which the vocabulary is rebuilt from scratch
+MAX_CHUNKS = 200000
+
+# Generation numbers are unique per process (and past forks), so a table
+# never mistakes a new vocabulary for the one it was built against
+_generations = itertools.count(1)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+# Punctuation that ends a clause (scopes such as negation stop there)
+CLAUSE_PUNCTUATION = frozenset(",.;:!?")
+_COMBINING_MARKS_RE = re.compile("[\u0300-\u036f]")
+
+
+def normalize(text: str) -> str:
+    """Strip accents (á -> a, ñ -> n), keeping case."""
+    if text.isascii():
+        return text
+    return _COMBINING_MARKS_RE.sub("", unicodedata.normalize("NFKD", text))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split accent-stripped text into words (case preserved)."""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def clause_breaks(text: str) -> Tuple[List[bool], bool]:
+    """
+    Clause punctuation around the words of tokenize(text).
+
+    Args:
+        text: Text (or whitespace chunk) to inspect
+
+    Returns:
+        Tuple of (per word: True if clause punctuation precedes it within
+        the text; True if clause punctuation follows the last word, or the
+        text has punctuation but no words)
+    """
+    normalized = normalize(text)
+    starts = []
+    previous_end = 0
+    for match in _TOKEN_RE.finditer(normalized):
+        starts.append(not CLAUSE_PUNCTUATION.isdisjoint(normalized[previous_end:match.start()]))
+        previous_end = match.end()
+    return starts, not CLAUSE_PUNCTUATION.isdisjoint(normalized[previous_end:])
+
+
+class EncodedBatch(NamedTuple):
+    """A batch of texts as vocabulary indices."""
+
+    count: int                  # Texts in the batch
+    word_ids: np.ndarray        # Vocabulary index of every word, in text order
+    word_segment: np.ndarray    # Text index of every word
+    chunk_ids: np.ndarray       # Chunk index of every whitespace chunk (separators dropped)
+    chunk_segment: np.ndarray   # Text index of every chunk
+    words: List[str]            # Vocabulary words (index -> word) when encoded
+    chunks: List[str]           # Vocabulary chunks (index -> chunk) when encoded
+    generation: int             # Vocabulary generation (changes on rebuild)
+
+
+class BatchVocabulary:
+    """
+    Vocabulary of words and whitespace chunks, grown as batches are encoded.
+    Thread-safe; words and chunks keep their index until the vocabulary is
+    rebuilt (a new generation starts with new lists).
+    """
+
+    def __init__(self, max_chunks: int = MAX_CHUNKS):
+        """
+        Initialize vocabulary.
+
+        Args:
+            max_chunks: Distinct chunks kept before starting a new generation
+        """
+        self.max_chunks = max_chunks
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Start a new, empty generation (separator chunk at index 0)."""
+        self.generation = next(_generations)
+        self._words: List[str] = []
+        self._word_index: Dict[str, int] = {}
+        self._chunks: List[str] = [BATCH_SEPARATOR]
+        self._chunk_index: Dict[str, int] = {BATCH_SEPARATOR: 0}
+        self._chunk_spans: List[List[int]] = [[0, 0]]
+        self._chunk_word_ids: List[int] = []
+        self._build_chunk_table()
+
+    def encode(self, texts: Sequence[str]) -> EncodedBatch:
+        """
+        Encode a batch of texts.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Word and chunk indices with their text index
+        """
+        joined = f" {BATCH_SEPARATOR} ".join(texts)
+        if joined.count(BATCH_SEPARATOR) != max(len(texts) - 1, 0):
+            joined = f" {BATCH_SEPARATOR} ".join(
+                text.replace(BATCH_SEPARATOR, " ") for text in texts
+            )
+        chunks = joined.split()
+
+        with self._lock:
+            if len(self._chunks) > self.max_chunks:
+                self._reset()
+            try:
+                chunk_ids = self._chunk_ids(chunks)
+            except KeyError:
+                self._add_chunks(set(chunks).difference(self._chunk_index))
+                chunk_ids = self._chunk_ids(chunks)
+            chunk_start, chunk_length, chunk_words = self._chunk_table
+            words, vocabulary_chunks, generation = self._words, self._chunks, self.generation
+
+        # Text index of every chunk; separator chunks (index 0) are dropped
+        chunk_segment = np.cumsum(chunk_ids == 0)
+        keep = chunk_ids != 0
+        chunk_ids = chunk_ids[keep]
+        chunk_segment = chunk_segment[keep]
+
+        # Expand chunks into their words
+        lengths = chunk_length[chunk_ids]
+        output_start = np.cumsum(lengths) - lengths
+        word_ids = chunk_words[
+            np.repeat(chunk_start[chunk_ids] - output_start, lengths) + np.arange(lengths.sum())
+        ]
+
+        return EncodedBatch(
+            count=len(texts),
+            word_ids=word_ids,
+            word_segment=np.repeat(chunk_segment, lengths),
+            chunk_ids=chunk_ids,
+            chunk_segment=chunk_segment,
+            words=words,
+            chunks=vocabulary_chunks,
+            generation=generation
+        )
+
+    def _chunk_ids(self, chunks: List[str]) -> np.ndarray:
+        """Vocabulary indices of chunks (KeyError if one is new)."""
+        return np.fromiter(
+            map(self._chunk_index.__getitem__, chunks), dtype=np.int64, count=len(chunks)
+        )
+
+    def _add_chunks(self, chunks: Set[str]) -> None:
+        """Tokenize new chunks, adding their new words."""
+        words, word_index = self._words, self._word_index
+        for chunk in chunks:
+            word_ids = []
+            for token in tokenize(chunk):
+                index = word_index.get(token)
+                if index is None:
+                    index = word_index[token] = len(words)
+                    words.append(token)
+                word_ids.append(index)
+
+            self._chunk_index[chunk] = len(self._chunks)
+            self._chunks.append(chunk)
+            self._chunk_spans.append([len(self._chunk_word_ids), len(word_ids)])
+            self._chunk_word_ids.extend(word_ids)
+
+        self._build_chunk_table()
+
+    def _build_chunk_table(self) -> None:
+        """Arrays mapping a chunk to its words: (start, length, flat word ids)."""
+        spans = np.array(self._chunk_spans, dtype=np.int64).reshape(-1, 2)
+        # New tuple (not mutated in place): encoders may hold the previous one
+        self._chunk_table = (
+            spans[:, 0], spans[:, 1], np.array(self._chunk_word_ids, dtype=np.int64)
+        )
+
+
+def sequence_starts(
+    codes: np.ndarray,
+    segment: np.ndarray,
+    sequence: Sequence[int]
+) -> np.ndarray:
+    """
+    Find a word sequence in a batch.
+
+    Args:
+        codes: Per-word codes of the batch (consumer-defined, 0 = none)
+        segment: Text index of every word
+        sequence: Codes of the sequence's words
+
+    Returns:
+        Word positions where the sequence starts (within one text)
+    """
+    length = len(sequence)
+    starts = np.flatnonzero(codes[:max(len(codes) - length + 1, 0)] == sequence[0])
+    for offset, code in enumerate(sequence[1:], start=1):
+        starts = starts[codes[starts + offset] == code]
+    return starts[segment[starts] == segment[starts + length - 1]]
+
+
+class PropertyTable:
+    """
+    Per-word or per-chunk property arrays of one consumer, extended as the
+    vocabulary grows and rebuilt when it starts a new generation.
+    """
+
+    def __init__(self, compute, dtypes: Dict[str, type]):
+        """
+        Initialize table.
+
+        Args:
+            compute: Function(item) -> {name: value} for a word or chunk
+            dtypes: Property names and their array dtypes
+        """
+        self.compute = compute
+        self.dtypes = dtypes
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self._arrays = self._empty()
+        _tables.add(self)
+
+    def _empty(self) -> Dict[str, np.ndarray]:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in self.dtypes.items()}
+
+    def arrays(self, items: List[str], generation: int) -> Dict[str, np.ndarray]:
+        """
+        Property arrays covering a batch's vocabulary items.
+
+        Args:
+            items: Vocabulary words (or chunks) of the batch
+            generation: Vocabulary generation of the batch
+
+        Returns:
+            Arrays indexed by word (or chunk) index
+        """
+        with self._lock:
+            arrays = self._arrays
+            if self._generation != generation:
+                arrays = self._empty()
+
+            known = len(next(iter(arrays.values())))
+            available = len(items)
+            if known < available:
+                new = {name: [] for name in self.dtypes}
+                for item in items[known:available]:
+                    for name, value in self.compute(item).items():
+                        new[name].append(value)
+                # Replace (not mutate) the arrays: readers may hold the previous ones
+                arrays = {
+                    name: np.concatenate([array, np.array(new[name], dtype=array.dtype)])
+                    for name, array in arrays.items()
+                }
+
+            self._arrays, self._generation = arrays, generation
+            return arrays
+
+
+_vocabulary: Optional[BatchVocabulary] = None
+_tables: "weakref.WeakSet[PropertyTable]" = weakref.WeakSet()
+
+
+def get_batch_vocabulary() -> BatchVocabulary:
+    """Get the shared batch vocabulary."""
+    global _vocabulary
+    if _vocabulary is None:
+        _vocabulary = BatchVocabulary()
+    return _vocabulary
+
+
+def _reset_after_fork() -> None:
+    """
+    In a forked child, drop the shared vocabulary and renew table locks: the
+    parent may have been encoding in another thread at fork time, leaving a
+    lock held or the vocabulary half-updated.
+    """
+    global _vocabulary
+    _vocabulary = None
+    for table in list(_tables):
+        table._lock = threading.Lock()
+        table._generation = None
+        table._arrays = table._empty()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
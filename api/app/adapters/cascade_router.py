@@ -0,0 +1,129 @@
+"""
+Confidence-gated routing between local estimates and the LLM.
+Each comment gets a confidence score from its rating (Nota), local sentiment
+compound and pain keyword hits. Confident, low-risk comments keep local
+churn and pain estimates; ambiguous or high-risk ones (detractors, high
+local churn, rating and text pointing different ways) go to the LLM.
+"""
+
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.adapters.local_pool import LocalScores
+from app.adapters.local_sentiment import BASE_SENTIMENT, EMOTIONS
+from app.config import settings
+
+# |compound| at which text polarity counts as fully clear
+CLEAR_COMPOUND = 0.5
+
+# Compound below which a local pain keyword hit counts as a complaint
+COMPLAINT_COMPOUND = -0.05
+
+# Churn prior by rating band (promoter >= 9, passive >= 7, detractor)
+CHURN_PRIOR = {"promoter": 0.1, "passive": 0.3, "detractor": 0.6}
+
+# Confidence factor when several pain categories are hit
+MIXED_PAIN_FACTOR = 0.5
+
+
+class RoutingDecision(NamedTuple):
+    """Routing of a batch, one entry per comment."""
+
+    confidence: np.ndarray  # float64, 0-1
+    churn_risk: np.ndarray  # float64, local estimate (rating prior + emotions)
+    high_risk: np.ndarray   # bool, always sent to the LLM
+    to_llm: np.ndarray      # bool
+    complaint: np.ndarray   # bool, text leans negative (local pain hits count)
+
+
+def ratings_array(ratings: Optional[Sequence], count: int) -> np.ndarray:
+    """
+    Ratings as floats (NaN where unknown or not numeric).
+
+    Args:
+        ratings: Ratings of the comments (may be None or shorter)
+        count: Number of comments
+
+    Returns:
+        float64 array of length count
+    """
+    values = np.full(count, np.nan)
+    for i, rating in enumerate(list(ratings or [])[:count]):
+        try:
+            values[i] = float(rating)
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def route(
+    scores: LocalScores,
+    ratings: Optional[Sequence] = None,
+    threshold: Optional[float] = None
+) -> RoutingDecision:
+    """
+    Decide which comments need the LLM.
+
+    Confidence is the clearer of the two polarity signals (rating: +1 for
+    promoters, -1 for detractors, weak for passives; text: |compound|),
+    reduced by how much they contradict each other and halved when several
+    pain categories are hit. Without a rating only the text counts.
+
+    Args:
+        scores: Local scores of the comments
+        ratings: Ratings (Nota, 0-10) of the comments, if known
+        threshold: Minimum confidence to stay local (CASCADE_CONFIDENCE_THRESHOLD)
+
+    Returns:
+        Confidence, local churn estimate and routing per comment
+    """
+    threshold = settings.CASCADE_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    count = len(scores.emotions)
+    rating = ratings_array(ratings, count)
+    known = ~np.isnan(rating)
+
+    compound = scores.sentiment[:, BASE_SENTIMENT.index("compound")].astype(np.float64)
+    rating_polarity = np.where(known, np.clip((rating - 7.5) / 1.5, -1.0, 1.0), 0.0)
+
+    text_clarity = np.minimum(1.0, np.abs(compound) / CLEAR_COMPOUND)
+    contradiction = np.maximum(0.0, -rating_polarity * compound)
+    confidence = np.where(
+        known,
+        np.maximum(np.abs(rating_polarity), text_clarity) * (1.0 - contradiction),
+        text_clarity
+    )
+
+    pain_hits = np.zeros(count, dtype=np.int64)
+    masks = scores.pain_masks
+    for bit in range(int(masks.max()).bit_length() if count else 0):
+        pain_hits += (masks >> bit) & 1
+    confidence = np.where(pain_hits > 1, confidence * MIXED_PAIN_FACTOR, confidence)
+
+    # Local churn: emotions, averaged with the rating band's prior when known
+    emotions = scores.emotions.astype(np.float64)
+    negative = sum(emotions[:, EMOTIONS.index(name)] for name in ("frustracion", "enojo", "decepcion"))
+    text_churn = np.minimum(1.0, negative / 1.5)
+    prior = np.select(
+        [rating >= 9, rating >= 7],
+        [CHURN_PRIOR["promoter"], CHURN_PRIOR["passive"]],
+        CHURN_PRIOR["detractor"]
+    )
+    churn_risk = np.where(known, (text_churn + prior) / 2, text_churn)
+
+    high_risk = (
+        (known & (rating <= settings.CASCADE_DETRACTOR_MAX_RATING))
+        | (churn_risk >= settings.CASCADE_RISK_THRESHOLD)
+    )
+    if settings.CASCADE_ROUTING_ENABLED:
+        to_llm = high_risk | (confidence < threshold)
+    else:
+        to_llm = np.ones(count, dtype=bool)
+
+    return RoutingDecision(
+        confidence=confidence,
+        churn_risk=churn_risk,
+        high_risk=high_risk,
+        to_llm=to_llm,
+        complaint=compound < COMPLAINT_COMPOUND
+    )
@@ -4,15 +4,32 @@ Memory-aware for 512MB constraint.
 """
 
 import asyncio
+import functools
 import json
 from typing import Dict, List, Optional, Tuple
+import numpy as np
 import structlog
 import psutil
 from concurrent.futures import ThreadPoolExecutor
 
-from app.adapters.local_sentiment import LocalSentimentAnalyzer
+from app.adapters.cascade_router import route
+from app.adapters.keyword_matcher import get_pain_matcher
+from app.adapters.local_pool import LocalScores, score_comments
+from app.adapters.local_sentiment import BASE_SENTIMENT, EMOTIONS, LocalSentimentAnalyzer
 from app.adapters.openai.analyzer import OpenAIAnalyzer
+from app.adapters.openai.micro_batcher import MicroBatcher
+from app.adapters.openai.model_cascade import (
+    CONFIDENCE_INSTRUCTION,
+    CONFIDENCE_KEY,
+    confidence_schema,
+    run_cascade,
+)
+from app.adapters.openai.utils import estimate_tokens
 from app.config import settings
+from app.utils.event_loop_manager import run_async
+from app.utils.cancellation import TaskCancelled
+from app.utils.deadline import DeadlineExceeded, call_timeout, capped_timeout
+from app.utils.request_context import AnalysisContext, run_in_context
 
 logger = structlog.get_logger()
 
@@ -23,26 +40,69 @@ class HybridAnalyzer:
     Memory-aware for 512MB constraint.
     """
 
-    def __init__(self):
+    def __init__(self, openai_analyzer: Optional[OpenAIAnalyzer] = None):
         self.local_analyzer = LocalSentimentAnalyzer()
-        self.openai_analyzer = OpenAIAnalyzer()
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.pain_matcher = get_pain_matcher()
+        self.openai_analyzer = openai_analyzer or OpenAIAnalyzer()
+        self.executor = ThreadPoolExecutor(max_workers=settings.LOCAL_ANALYSIS_THREADS)
+        self._batch_semaphore: Optional[asyncio.Semaphore] = None
+        self._micro_batchers: Dict[Tuple[str, bool], MicroBatcher] = {}
+
+    def close(self) -> None:
+        """Release the thread pool (called once per worker process on shutdown)."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
     def analyze_batch(
         self,
         comments: List[str],
         batch_index: int = 0,
-        language_hint: str = "es"
+        language_hint: str = "es",
+        context: Optional[AnalysisContext] = None,
+        ratings: Optional[List] = None
     ) -> Dict:
         """
         Hybrid analysis: local emotions + AI insights.
+        Sync entry point; runs analyze_batch_async on the process background loop.
+        The analysis context tags OpenAI calls for fair scheduling; with a
+        deadline, calls are capped by it and the batch falls back to
+        local-only results when it expires.
 
         Process:
         1. Local sentiment analysis (fast, free)
-        2. Prepare minimal context for OpenAI
-        3. Get insights (churn risk, pain points) from OpenAI
+        2. Route: confident comments keep local churn/pain estimates
+        3. Get insights (churn risk, pain points) from OpenAI for the rest
         4. Merge results
         """
+        try:
+            return run_async(
+                run_in_context(
+                    self.analyze_batch_async(comments, batch_index, language_hint, ratings),
+                    context
+                ),
+                timeout=capped_timeout(
+                    settings.ASYNC_RUN_TIMEOUT_SECONDS, context.deadline if context else None
+                )
+            )
+        except TimeoutError as e:
+            logger.error("Hybrid analysis timed out", batch_index=batch_index, error=str(e))
+            return self._fallback_local_only(comments, None)
+
+    async def analyze_batch_async(
+        self,
+        comments: List[str],
+        batch_index: int = 0,
+        language_hint: str = "es",
+        ratings: Optional[List] = None
+    ) -> Dict:
+        """
+        Async hybrid analysis.
+        Many batches can be in flight on one loop; ASYNC_BATCH_CONCURRENCY
+        bounds them and the global rate limiter paces the OpenAI calls.
+        Only comments the cascade router is unsure about (or flags as high
+        risk) reach OpenAI; results carry their "source" (local or llm).
+        With AI_CASCADE_ENABLED those go to the cheap model first and only
+        uncertain answers reach AI_MODEL (stats under "cascade").
+        """
 
         # Check memory before processing
         memory_mb = psutil.virtual_memory().available / (1024 * 1024)
@@ -52,51 +112,98 @@ class HybridAnalyzer:
             if len(comments) > 20:
                 comments = comments[:20]
 
-        try:
-            # Step 1: Local sentiment (run in thread to avoid blocking)
-            local_future = self.executor.submit(
-                self.local_analyzer.analyze_batch,
-                comments,
-                language_hint
-            )
-
-            # Step 2: Prepare optimized prompts for OpenAI
-            # Include sentiment context to improve accuracy
-            # Get local results from the future
-            local_results = local_future.result(timeout=5)
-
-            enriched_prompts = self._prepare_insight_prompts(
-                comments, local_results
-            )
+        loop = asyncio.get_running_loop()
+        scores = None
+        cascade_stats = None
 
-            # Step 3: Get insights from OpenAI (only what we need)
-            # Run async operation in sync context
-            loop = asyncio.new_event_loop()
+        async with self._get_batch_semaphore():
             try:
-                insights = loop.run_until_complete(
-                    self._get_ai_insights(enriched_prompts, batch_index)
+                # Step 1: Local scores (run in thread to avoid blocking the loop)
+                scores = await asyncio.wait_for(
+                    loop.run_in_executor(
+                        self.executor,
+                        score_comments,
+                        comments,
+                        language_hint
+                    ),
+                    timeout=5
                 )
-            finally:
-                loop.close()
-
-            # Step 4: Merge results
-            final_results = self._merge_results(
-                comments, local_results, insights
-            )
+                local_results = self.local_only_results(scores, source="local")
+
+                # Step 2: Route; confident comments keep the local estimates
+                routing = route(scores, ratings)
+                for i in np.flatnonzero(~routing.to_llm).tolist():
+                    local_results[i]["churn_risk"] = round(float(routing.churn_risk[i]), 3)
+                    if not routing.complaint[i]:
+                        # "Excelente servicio" mentions service, it isn't a pain point
+                        local_results[i]["pain_points"] = []
+                escalated = np.flatnonzero(routing.to_llm).tolist()
+
+                if escalated:
+                    # Step 3: Get insights from OpenAI (only what we need),
+                    # with sentiment context to improve accuracy
+                    enriched_prompts = self._prepare_insight_prompts(
+                        [comments[i] for i in escalated],
+                        [local_results[i] for i in escalated]
+                    )
+                    if settings.AI_CASCADE_ENABLED:
+                        insights, cascade_stats = await self._get_cascaded_insights(
+                            enriched_prompts, batch_index, routing.churn_risk[escalated].tolist()
+                        )
+                    else:
+                        insights = await self._get_ai_insights(enriched_prompts, batch_index)
+
+                    # Step 4: Merge results
+                    self._merge_results(local_results, escalated, insights)
+                    failed = any(insight.get("failed") for insight in insights)
+                else:
+                    failed = False
 
-            logger.info(
-                "Hybrid analysis completed",
-                batch_index=batch_index,
-                comments=len(comments),
-                memory_used_mb=round((psutil.virtual_memory().percent), 1)
-            )
+                logger.info(
+                    "Hybrid analysis completed",
+                    batch_index=batch_index,
+                    comments=len(comments),
+                    sent_to_llm=len(escalated),
+                    kept_local=len(comments) - len(escalated),
+                    memory_used_mb=round((psutil.virtual_memory().percent), 1)
+                )
 
-            return {"comments": final_results}
+                result = {"comments": local_results}
+                if failed:
+                    # Not a real LLM answer: don't cache or checkpoint it
+                    result["failed"] = True
+                if cascade_stats is not None:
+                    result["cascade"] = cascade_stats
+                return result
+
+            except (DeadlineExceeded, TaskCancelled):
+                raise
+            except Exception as e:
+                logger.error(f"Hybrid analysis failed: {str(e)}", exc_info=True)
+                # Fallback to local only
+                return await loop.run_in_executor(
+                    self.executor,
+                    self._fallback_local_only,
+                    comments,
+                    scores
+                )
 
-        except Exception as e:
-            logger.error(f"Hybrid analysis failed: {str(e)}", exc_info=True)
-            # Fallback to local only
-            return self._fallback_local_only(comments, local_results if 'local_results' in locals() else None)
+    def _get_batch_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore bounding concurrent batches on the loop."""
+        if self._batch_semaphore is None:
+            self._batch_semaphore = asyncio.Semaphore(settings.ASYNC_BATCH_CONCURRENCY)
+        return self._batch_semaphore
+
+    def _get_micro_batcher(self, model: str, with_confidence: bool) -> Optional[MicroBatcher]:
+        """Get the micro-batcher packing small insight requests for a model on the loop."""
+        if not settings.MICRO_BATCHING_ENABLED:
+            return None
+        key = (model, with_confidence)
+        if key not in self._micro_batchers:
+            self._micro_batchers[key] = MicroBatcher(
+                functools.partial(self._request_insights, model=model, with_confidence=with_confidence)
+            )
+        return self._micro_batchers[key]
 
     def _prepare_insight_prompts(
         self,
@@ -110,35 +217,111 @@ class HybridAnalyzer:
         enriched = []
 
         for comment, local in zip(comments, local_results):
-            sentiment = local['base_sentiment']
+            compound = local['sentiment_score']
 
             # Create context string
-            context = f"[Sentiment: {'positive' if sentiment['compound'] > 0.1 else 'negative' if sentiment['compound'] < -0.1 else 'neutral'}]"
+            context = f"[Sentiment: {'positive' if compound > 0.1 else 'negative' if compound < -0.1 else 'neutral'}]"
 
             # Truncate comment but keep sentiment context
             enriched_comment = f"{context} {comment[:120]}"
-            enriched.append((enriched_comment, sentiment))
+            enriched.append((enriched_comment, {"compound": compound}))
 
         return enriched
 
+    async def _get_cascaded_insights(
+        self,
+        enriched_prompts: List[Tuple[str, Dict]],
+        batch_index: int,
+        local_churn: List[float]
+    ) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        Insights from the cheap model, re-asking AI_MODEL about the comments
+        it is unsure of or whose churn contradicts the local estimate.
+        """
+        async def request(indices: List[int], model: str, with_confidence: bool):
+            insights = await self._get_ai_insights(
+                [enriched_prompts[i] for i in indices], batch_index, model, with_confidence
+            )
+            # Placeholders count as unanswered: escalated, or the first-tier answer kept
+            return [None if insight.get("failed") else insight for insight in insights]
+
+        def contradicts(i: int, insight: Dict) -> bool:
+            churn = insight.get("c", 0.5)
+            return abs(churn - local_churn[i]) > settings.AI_CASCADE_MAX_DISAGREEMENT
+
+        insights, stats = await run_cascade(len(enriched_prompts), request, contradicts)
+        logger.info(
+            "Model cascade completed",
+            batch_index=batch_index,
+            comments=len(enriched_prompts),
+            escalated=stats["escalated"]
+        )
+        return [insight or self._failed_insight() for insight in insights], stats
+
     async def _get_ai_insights(
         self,
         enriched_prompts: List[Tuple[str, Dict]],
-        batch_index: int
+        batch_index: int,
+        model: Optional[str] = None,
+        with_confidence: bool = False
     ) -> List[Dict]:
         """
         Get ONLY insights from OpenAI (not emotions).
-        Uses optimized prompt focusing on churn risk and pain points.
+        Small batches are packed with other small requests on the loop
+        (possibly from other analyses) into a shared request.
         """
+        # Format comments with context
+        formatted_comments = [enriched[0] for enriched in enriched_prompts]
+        model = model or settings.AI_MODEL
+
+        try:
+            micro_batcher = self._get_micro_batcher(model, with_confidence)
+            if micro_batcher is not None and micro_batcher.accepts(formatted_comments):
+                insights = await micro_batcher.submit(formatted_comments, batch_index)
+            else:
+                insights = await self._request_insights(
+                    formatted_comments, batch_index, model=model, with_confidence=with_confidence
+                )
+
+        except (DeadlineExceeded, TaskCancelled):
+            raise
+        except Exception as e:
+            logger.error(f"OpenAI insights failed: {e}")
+            # Return placeholder insights (the local estimates are kept)
+            return [self._failed_insight() for _ in formatted_comments]
+
+        # Ensure we have insights for each comment
+        return [insight or self._failed_insight() for insight in insights]
+
+    @staticmethod
+    def _failed_insight() -> Dict:
+        """Placeholder for a comment OpenAI did not answer."""
+        return {"c": 0.5, "p": "otro", "failed": True}
+
+    async def _request_insights(
+        self,
+        formatted_comments: List[str],
+        batch_index: int,
+        model: Optional[str] = None,
+        with_confidence: bool = False
+    ) -> List[Optional[Dict]]:
+        """
+        One OpenAI insights request.
+        Uses optimized prompt focusing on churn risk and pain points; with
+        confidence (first cascade tier), each item also carries "k". Items
+        echo their comment number, so answers are aligned by it (None where
+        the model skipped a comment).
+        """
+        model = model or settings.AI_MODEL
 
         # Build optimized prompt for insights only
         system_prompt = """Extract ONLY: churn risk (0-1) and pain category.
 Comments include [Sentiment: positive/negative/neutral] context.
-Output: {"r":[{"c":0.0-1.0,"p":"category"},...]}
+Output: {"r":[{"i":comment number,"c":0.0-1.0,"p":"category"},...]}
 Categories: precio,calidad,servicio,tiempo,app,producto,atencion,otro"""
+        if with_confidence:
+            system_prompt += "\n" + CONFIDENCE_INSTRUCTION
 
-        # Format comments with context
-        formatted_comments = [enriched[0] for enriched in enriched_prompts]
         user_prompt = "\n".join([f"{i+1}.{c}" for i, c in enumerate(formatted_comments)])
 
         # Simpler schema without emotions
@@ -150,10 +333,11 @@ Categories: precio,calidad,servicio,tiempo,app,producto,atencion,otro"""
                     "items": {
                         "type": "object",
                         "properties": {
+                            "i": {"type": "integer"},  # comment number
                             "c": {"type": "number", "minimum": 0, "maximum": 1},  # churn risk
                             "p": {"type": "string", "maxLength": 15}  # pain category
                         },
-                        "required": ["c", "p"],
+                        "required": ["i", "c", "p"],
                         "additionalProperties": False
                     }
                 }
@@ -161,14 +345,18 @@ Categories: precio,calidad,servicio,tiempo,app,producto,atencion,otro"""
             "required": ["r"],
             "additionalProperties": False
         }
+        if with_confidence:
+            item_schema = response_schema["properties"]["r"]["items"]
+            item_schema["properties"][CONFIDENCE_KEY] = confidence_schema()
+            item_schema["required"].append(CONFIDENCE_KEY)
 
         # Make the API call with reduced token usage
-        try:
-            # Rate limiting
-            await self.openai_analyzer.rate_limiter.acquire()
+        max_tokens = len(formatted_comments) * (40 if with_confidence else 34)  # Much less needed without emotions
 
-            response = await self.openai_analyzer.client.chat.completions.create(
-                model=settings.AI_MODEL,
+        # Rate limiting and key selection handled by the client pool
+        response = await self.openai_analyzer.client_pool.execute(
+            lambda client: client.chat.completions.create(
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -182,129 +370,119 @@ Categories: precio,calidad,servicio,tiempo,app,producto,atencion,otro"""
                     }
                 },
                 temperature=0.3,
-                max_tokens=len(formatted_comments) * 30,  # Much less needed without emotions
+                max_tokens=max_tokens,
                 seed=42,
-                timeout=30  # Explicit timeout
+                timeout=call_timeout(30)  # Capped by the analysis deadline
+            ),
+            estimated_tokens=estimate_tokens(system_prompt + user_prompt) + max_tokens
+        )
+
+        result = json.loads(response.choices[0].message.content)
+        insights: List[Optional[Dict]] = [None] * len(formatted_comments)
+        for item in result.get("r", []):
+            number = item.get("i")
+            if isinstance(number, int) and 1 <= number <= len(insights):
+                insights[number - 1] = item
+
+        # Log token usage
+        if response.usage:
+            logger.info(
+                "OpenAI insights extracted",
+                batch_index=batch_index,
+                model=model,
+                tokens_used=response.usage.total_tokens,
+                tokens_per_comment=round(response.usage.total_tokens/len(formatted_comments), 1)
             )
 
-            result = json.loads(response.choices[0].message.content)
-            insights = result.get("r", [])
-
-            # Log token usage
-            if response.usage:
-                logger.info(
-                    "OpenAI insights extracted",
-                    batch_index=batch_index,
-                    tokens_used=response.usage.total_tokens,
-                    tokens_per_comment=round(response.usage.total_tokens/len(formatted_comments), 1)
-                )
-
-            # Ensure we have insights for each comment
-            while len(insights) < len(formatted_comments):
-                insights.append({"c": 0.5, "p": "otro"})
-
-            return insights
-
-        except Exception as e:
-            logger.error(f"OpenAI insights failed: {e}")
-            # Return default insights
-            return [{"c": 0.5, "p": "otro"} for _ in formatted_comments]
+        return insights
 
     def _merge_results(
         self,
-        comments: List[str],
         local_results: List[Dict],
+        escalated: List[int],
         insights: List[Dict]
-    ) -> List[Dict]:
+    ) -> None:
         """
-        Merge local emotions with AI insights.
-        Maintains exact frontend contract.
+        Merge AI insights into the local results of the escalated comments.
+        Emotions, sentiment and NPS stay local; maintains exact frontend contract.
+        Comments without a real answer keep their local estimates.
         """
-        merged = []
-
-        for i, (comment, local, insight) in enumerate(zip(comments, local_results, insights)):
-            # Calculate NPS from emotions (maintain compatibility)
-            emotions = local['emotions']
-            positive = emotions["satisfaccion"] + emotions["confianza"]
-            negative = emotions["frustracion"] + emotions["enojo"] + emotions["decepcion"]
-
-            if positive > 0.7 and negative < 0.3:
-                nps_category = "promoter"
-            elif negative > 0.5:
-                nps_category = "detractor"
-            else:
-                nps_category = "passive"
-
-            merged.append({
-                "index": i,
-                "emotions": emotions,  # From local analysis
+        for i, insight in zip(escalated, insights):
+            if insight.get("failed"):
+                local_results[i]["source"] = "local_fallback"
+                continue
+            local_results[i].update({
                 "churn_risk": insight.get("c", 0.5),  # From OpenAI
                 "pain_points": [insight.get("p")] if insight.get("p") and insight.get("p") != "otro" else [],
-                "sentiment_score": local['base_sentiment']['compound'],
-                "language": "es",
-                "nps_category": nps_category,
-                "key_phrases": []
+                "source": "llm"
             })
 
-        return merged
-
-    def _fallback_local_only(self, comments: List[str], local_results: Optional[List[Dict]]) -> Dict:
+    def _fallback_local_only(self, comments: List[str], scores: Optional[LocalScores]) -> Dict:
         """
         Fallback when OpenAI fails.
         Uses only local analysis with default churn risk.
         """
-        if not local_results:
-            local_results = self.local_analyzer.analyze_batch(comments)
-
-        results = []
-        for i, (comment, local) in enumerate(zip(comments, local_results)):
-            emotions = local['emotions']
+        if scores is None:
+            scores = score_comments(comments)
 
-            # Estimate churn risk from emotions
-            negative_score = emotions["frustracion"] + emotions["enojo"] + emotions["decepcion"]
-            churn_risk = min(1.0, negative_score / 1.5)
+        return {"comments": self.local_only_results(scores)}
 
-            # Basic pain point detection from keywords
-            pain_point = self._detect_basic_pain_point(comment)
-
-            # NPS from emotions
-            positive = emotions["satisfaccion"] + emotions["confianza"]
-            negative = emotions["frustracion"] + emotions["enojo"] + emotions["decepcion"]
+    def local_only_results(self, scores: LocalScores, source: str = "local_fallback") -> List[Dict]:
+        """
+        Local-only comment results from score arrays (see local_pool).
 
-            if positive > 0.7 and negative < 0.3:
-                nps_category = "promoter"
-            elif negative > 0.5:
-                nps_category = "detractor"
-            else:
-                nps_category = "passive"
+        Args:
+            scores: Local scores of the comments
+            source: Label of the results ("local" when routed, "local_fallback" when OpenAI failed)
 
-            results.append({
+        Returns:
+            One result per comment (index = row), churn risk and NPS
+            estimated from emotions, first pain-point keyword hit
+        """
+        emotions = scores.emotions.astype(np.float64).round(3)
+        column = {name: emotions[:, i] for i, name in enumerate(EMOTIONS)}
+
+        # Estimate churn risk from emotions
+        negative = column["frustracion"] + column["enojo"] + column["decepcion"]
+        churn_risk = np.minimum(1.0, negative / 1.5)
+
+        # NPS from emotions
+        positive = column["satisfaccion"] + column["confianza"]
+        nps_category = np.where(
+            (positive > 0.7) & (negative < 0.3), "promoter",
+            np.where(negative > 0.5, "detractor", "passive")
+        )
+
+        # Basic pain point detection from keywords (lowest bit = first category)
+        masks = scores.pain_masks
+        first_bit = np.log2(masks & -masks, where=masks > 0, out=np.zeros(len(masks))).astype(int)
+        categories = self.pain_matcher.categories
+        pain_points = [
+            [categories[bit]] if mask else []
+            for mask, bit in zip(masks.tolist(), first_bit.tolist())
+        ]
+
+        compound = scores.sentiment[:, BASE_SENTIMENT.index("compound")].astype(np.float64).round(4)
+
+        return [
+            {
                 "index": i,
-                "emotions": emotions,
-                "churn_risk": churn_risk,
-                "pain_points": [pain_point] if pain_point else [],
-                "sentiment_score": local['base_sentiment']['compound'],
+                "emotions": dict(zip(EMOTIONS, emotion_row)),
+                "churn_risk": churn,
+                "pain_points": pain,
+                "sentiment_score": sentiment_score,
                 "language": "es",
-                "nps_category": nps_category,
-                "key_phrases": []
-            })
-
-        return {"comments": results}
+                "nps_category": category,
+                "key_phrases": [],
+                "source": source
+            }
+            for i, (emotion_row, churn, pain, sentiment_score, category) in enumerate(zip(
+                emotions.tolist(), churn_risk.tolist(), pain_points,
+                compound.tolist(), nps_category.tolist()
+            ))
+        ]
 
     def _detect_basic_pain_point(self, comment: str) -> Optional[str]:
-        """Basic keyword-based pain point detection for fallback."""
-        comment_lower = comment.lower()
-
-        pain_keywords = {
-            "precio": ["caro", "precio", "cost", "expensive", "barato"],
-            "calidad": ["calidad", "malo", "roto", "defect", "quality"],
-            "servicio": ["servicio", "atencion", "personal", "service"],
-            "tiempo": ["demora", "tarde", "espera", "lento", "slow", "wait"],
-            "app": ["app", "aplicacion", "sistema", "bug", "error"]
-        }
-
-        for category, keywords in pain_keywords.items():
-            if any(word in comment_lower for word in keywords):
-                return category
-
-        return None
\ No newline at end of file
+        """Basic keyword-based pain point detection for fallback (first category hit)."""
+        categories = self.pain_matcher.match(comment)
+        return categories[0] if categories else None
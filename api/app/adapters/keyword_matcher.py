@@ -0,0 +1,274 @@
+"""
+Compiled keyword matching for emotion and pain-point lexicons.
+All keywords of a lexicon are compiled into one regex, so a comment is
+scanned once and every category hit is returned. Matching is
+accent-insensitive and respects word boundaries; a trailing "*" makes a
+keyword a prefix ("defect*" matches defecto, defective...).
+
+Lexicons are JSON files ({category: [keywords]}) under app/adapters/lexicons,
+overridable with EMOTION_LEXICON_PATH and PAIN_LEXICON_PATH.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.adapters.batch_vocabulary import (
+    EncodedBatch,
+    PropertyTable,
+    get_batch_vocabulary,
+    normalize,
+    sequence_starts,
+    tokenize,
+)
+from app.config import settings
+
+LEXICON_DIR = Path(__file__).parent / "lexicons"
+
+_WORD_CHARS = "a-z0-9"
+
+
+def load_lexicon(path: Optional[str], default_name: str) -> Dict[str, List[str]]:
+    """
+    Load a keyword lexicon.
+
+    Args:
+        path: JSON file to load (None loads the bundled one)
+        default_name: Bundled file name under LEXICON_DIR
+
+    Returns:
+        Keywords by category, in file order
+    """
+    with open(path or LEXICON_DIR / default_name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class KeywordMatcher:
+    """
+    Finds which categories of a lexicon a text mentions, in one pass.
+    Read-only after construction: share one instance per process.
+    """
+
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        """
+        Compile a lexicon.
+
+        Args:
+            lexicon: Keywords by category (order defines category priority)
+        """
+        self.categories = list(lexicon)
+
+        # Keyword -> bitmask of the categories it belongs to
+        exact: Dict[str, int] = {}
+        prefixes: Dict[str, int] = {}
+        for position, keywords in enumerate(lexicon.values()):
+            for keyword in keywords:
+                keyword = normalize(keyword).lower().strip()
+                table = prefixes if keyword.endswith("*") else exact
+                keyword = keyword.rstrip("*")
+                if keyword:
+                    table[keyword] = table.get(keyword, 0) | (1 << position)
+
+        self._exact = exact
+        self._prefixes = prefixes
+        # Matched text -> bitmask, memoized (prefix matches vary)
+        self._masks: Dict[str, int] = {}
+
+        self._regex = self._compile(
+            [(keyword, False) for keyword in exact] + [(keyword, True) for keyword in prefixes]
+        )
+
+        # Batch matching (match_masks): single words and prefixes resolve per
+        # vocabulary word, phrases as word sequences, keywords with other
+        # characters ("?") per whitespace chunk
+        self._word_keywords: Dict[str, int] = {}
+        self._phrases: Dict[Tuple[str, ...], int] = {}
+        symbol_keywords = []
+        self._batch_supported = True
+        for keyword, mask in exact.items():
+            words = tuple(tokenize(keyword))
+            if " ".join(words) == " ".join(keyword.split()):
+                if len(words) == 1:
+                    self._word_keywords[words[0]] = mask
+                else:
+                    self._phrases[words] = mask
+            elif not any(ch.isspace() for ch in keyword):
+                symbol_keywords.append((keyword, False))
+            else:
+                self._batch_supported = False
+        for prefix in prefixes:
+            if tokenize(prefix) != [prefix]:
+                self._batch_supported = False
+
+        self._phrase_codes = {
+            word: code
+            for code, word in enumerate(
+                sorted({word for words in self._phrases for word in words}), start=1
+            )
+        }
+        self._symbol_regex = self._compile(symbol_keywords)
+        self._word_properties = PropertyTable(
+            self._word_property_values, {"mask": np.int64, "phrase_code": np.int32}
+        )
+        self._chunk_properties = PropertyTable(
+            self._chunk_property_values, {"mask": np.int64}
+        )
+
+    @classmethod
+    def _compile(cls, keywords: List[Tuple[str, bool]]) -> Optional["re.Pattern"]:
+        """One regex for (keyword, is_prefix) pairs (None if there are none)."""
+        # Longest first, so a phrase wins over a keyword it starts with
+        keywords = sorted(keywords, key=lambda item: len(item[0]), reverse=True)
+        # Keywords starting with a word character share one leading boundary
+        # check, so the scan skips mid-word positions quickly
+        word_start = [cls._pattern(k, p) for k, p in keywords if k[0].isalnum()]
+        other_start = [cls._pattern(k, p) for k, p in keywords if not k[0].isalnum()]
+        parts = []
+        if word_start:
+            parts.append(f"(?<![{_WORD_CHARS}])(?:{'|'.join(word_start)})")
+        parts.extend(other_start)
+        return re.compile("|".join(parts)) if parts else None
+
+    @staticmethod
+    def _pattern(keyword: str, is_prefix: bool) -> str:
+        """Regex for one keyword, bounded where it ends with a word character."""
+        body = r"\s+".join(re.escape(part) for part in keyword.split())
+        if is_prefix:
+            body += f"[{_WORD_CHARS}]*"
+        elif keyword[-1].isalnum():
+            body += f"(?![{_WORD_CHARS}])"
+        return body
+
+    def match_mask(self, text: str) -> int:
+        """
+        Categories mentioned in a text, as a bitmask (bit i = categories[i]).
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Bitmask of the categories hit (0 if none)
+        """
+        if self._regex is None or not text:
+            return 0
+
+        mask = 0
+        for found in self._regex.finditer(normalize(text).lower()):
+            mask |= self._mask_of(" ".join(found.group().split()))
+        return mask
+
+    def match_masks(
+        self,
+        texts: Sequence[str],
+        batch: Optional[EncodedBatch] = None
+    ) -> np.ndarray:
+        """
+        Category bitmasks of a batch of texts, with array operations.
+        Same hits as match_mask(), except that phrases also match across
+        punctuation ("no, entiendo").
+
+        Args:
+            texts: Texts to scan
+            batch: The texts already encoded with the shared batch vocabulary
+
+        Returns:
+            int64 array with one bitmask per text
+        """
+        masks = np.zeros(len(texts), dtype=np.int64)
+        if self._regex is None or not len(texts):
+            return masks
+        if not self._batch_supported:
+            masks[:] = [self.match_mask(text) for text in texts]
+            return masks
+
+        if batch is None:
+            batch = get_batch_vocabulary().encode(texts)
+        props = self._word_properties.arrays(batch.words, batch.generation)
+
+        word_masks = props["mask"][batch.word_ids]
+        hits = np.flatnonzero(word_masks)
+        np.bitwise_or.at(masks, batch.word_segment[hits], word_masks[hits])
+
+        codes = props["phrase_code"][batch.word_ids]
+        for phrase, mask in self._phrases.items():
+            starts = sequence_starts(
+                codes, batch.word_segment, [self._phrase_codes[word] for word in phrase]
+            )
+            masks[batch.word_segment[starts]] |= mask
+
+        if self._symbol_regex is not None:
+            chunk_props = self._chunk_properties.arrays(batch.chunks, batch.generation)
+            chunk_masks = chunk_props["mask"][batch.chunk_ids]
+            hits = np.flatnonzero(chunk_masks)
+            np.bitwise_or.at(masks, batch.chunk_segment[hits], chunk_masks[hits])
+
+        return masks
+
+    def _word_property_values(self, token: str) -> Dict[str, Any]:
+        """Categories of a batch vocabulary word (exact keyword and/or prefixes)."""
+        word = token.lower()
+        mask = self._word_keywords.get(word, 0)
+        for prefix, prefix_mask in self._prefixes.items():
+            if word.startswith(prefix):
+                mask |= prefix_mask
+        return {"mask": mask, "phrase_code": self._phrase_codes.get(word, 0)}
+
+    def _chunk_property_values(self, chunk: str) -> Dict[str, Any]:
+        """Categories of the symbol keywords ("?"...) in a whitespace chunk."""
+        mask = 0
+        for found in self._symbol_regex.finditer(normalize(chunk).lower()):
+            mask |= self._exact[found.group()]
+        return {"mask": mask}
+
+    def match(self, text: str) -> List[str]:
+        """
+        Categories mentioned in a text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Category names hit, in lexicon order
+        """
+        mask = self.match_mask(text)
+        return [category for i, category in enumerate(self.categories) if mask >> i & 1]
+
+    def _mask_of(self, matched: str) -> int:
+        """Categories of a matched string, whitespace collapsed (exact keyword and/or prefixes)."""
+        mask = self._masks.get(matched)
+        if mask is None:
+            mask = self._exact.get(matched, 0)
+            for prefix, prefix_mask in self._prefixes.items():
+                if matched.startswith(prefix):
+                    mask |= prefix_mask
+            if len(self._masks) > 50000:
+                self._masks.clear()
+            self._masks[matched] = mask
+        return mask
+
+
+_emotion_matcher: Optional[KeywordMatcher] = None
+_pain_matcher: Optional[KeywordMatcher] = None
+
+
+def get_emotion_matcher() -> KeywordMatcher:
+    """Get the shared emotion keyword matcher, compiling it on first use."""
+    global _emotion_matcher
+    if _emotion_matcher is None:
+        _emotion_matcher = KeywordMatcher(
+            load_lexicon(settings.EMOTION_LEXICON_PATH, "emotions.json")
+        )
+    return _emotion_matcher
+
+
+def get_pain_matcher() -> KeywordMatcher:
+    """Get the shared pain-point keyword matcher, compiling it on first use."""
+    global _pain_matcher
+    if _pain_matcher is None:
+        _pain_matcher = KeywordMatcher(
+            load_lexicon(settings.PAIN_LEXICON_PATH, "pain_points.json")
+        )
+    return _pain_matcher
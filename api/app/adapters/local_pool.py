@@ -0,0 +1,210 @@
+"""
+Process-pool local scoring for large comment sets.
+Comments are split into contiguous shards scored by a persistent pool of
+processes, which return compact arrays instead of per-comment dicts.
+
+The pool uses the forkserver start method: its processes are forked from a
+clean server (started before any thread of ours, with this module
+preloaded), never from a worker running the background event loop. Daemonic
+processes (Celery prefork children) cannot have children, so there and on
+hosts without forkserver comments are scored in-process; prefork workers
+already spread work across processes.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import psutil
+import structlog
+
+from app.adapters.keyword_matcher import get_pain_matcher
+from app.adapters.local_sentiment import LocalSentimentAnalyzer
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class LocalScores(NamedTuple):
+    """Local scores of a comment set, one row per comment."""
+
+    emotions: np.ndarray    # float32 (n, 7), EMOTIONS order
+    sentiment: np.ndarray   # float32 (n, 4), BASE_SENTIMENT order
+    pain_masks: np.ndarray  # int64 (n,), pain matcher category bitmasks
+
+    def slice(self, start: int, stop: int) -> "LocalScores":
+        """Rows [start, stop) as views."""
+        return LocalScores(*(array[start:stop] for array in self))
+
+
+_analyzer: Optional[LocalSentimentAnalyzer] = None
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_processes = 0
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def _get_analyzer() -> LocalSentimentAnalyzer:
+    """Local analyzer of this process (built from the shared scorers)."""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = LocalSentimentAnalyzer()
+    return _analyzer
+
+
+def _score(comments: Sequence[str], language: str) -> LocalScores:
+    """Score comments in this process."""
+    comments = list(comments)
+    emotions, sentiment = _get_analyzer().score_batch(comments, language)
+    return LocalScores(emotions, sentiment, get_pain_matcher().match_masks(comments))
+
+
+def _warm_up() -> None:
+    """Pool process initializer: build the scorers once per process."""
+    _get_analyzer()
+    get_pain_matcher()
+
+
+def _can_start_pool() -> bool:
+    """Check if this process may own a scoring pool."""
+    if not settings.LOCAL_POOL_ENABLED:
+        return False
+    if multiprocessing.current_process().daemon:
+        return False  # Celery prefork child: daemonic processes can't have children
+    return "forkserver" in multiprocessing.get_all_start_methods()
+
+
+def _max_processes() -> int:
+    """Pool size bounded by available cores, the memory budget and LOCAL_POOL_MAX_PROCESSES."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+
+    available_mb = psutil.virtual_memory().available / (1024 * 1024)
+    by_memory = int((available_mb - settings.LOCAL_POOL_RESERVE_MB) // settings.LOCAL_POOL_PROCESS_MB)
+
+    limits = [cores, by_memory]
+    if settings.LOCAL_POOL_MAX_PROCESSES:
+        limits.append(settings.LOCAL_POOL_MAX_PROCESSES)
+    return max(1, min(limits))
+
+
+def start_pool() -> bool:
+    """
+    Start this process' scoring pool (idempotent). Call it early, e.g. at
+    worker_init in asyncio mode, so the first large run doesn't pay for it.
+
+    Returns:
+        True if a pool is running, False if this process scores in-process
+    """
+    global _pool, _pool_processes, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            return True
+        if not _can_start_pool():
+            return False
+
+        processes = _max_processes()
+        if processes <= 1:
+            return False
+
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        _pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=_warm_up
+        )
+        _pool_processes = processes
+        _pool_pid = os.getpid()
+
+    logger.info("Local scoring pool started", processes=processes)
+    return True
+
+
+def stop_pool() -> None:
+    """Shut down this process' scoring pool."""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        pool, owned = _pool, _pool_pid == os.getpid()
+        _pool = None
+        _pool_pid = None
+    if pool is not None and owned:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def pool_size(count: int) -> int:
+    """
+    Processes worth using for a comment set.
+
+    Args:
+        count: Comments to score
+
+    Returns:
+        Shards to score in the pool (1 means in-process)
+    """
+    if count < settings.LOCAL_POOL_MIN_COMMENTS or not start_pool():
+        return 1
+
+    # Every process gets at least half the threshold, or sharding isn't worth it
+    by_work = math.ceil(count / max(1, settings.LOCAL_POOL_MIN_COMMENTS // 2))
+    return max(1, min(_pool_processes, by_work))
+
+
+def score_comments(comments: Sequence[str], language: str = "es") -> LocalScores:
+    """
+    Score comments locally, sharded across the pool when the set is large.
+
+    Args:
+        comments: Comments to score
+        language: Language code (see LocalSentimentAnalyzer.score_batch)
+
+    Returns:
+        Emotion and sentiment matrices and pain-point bitmasks
+    """
+    global _pool
+
+    processes = pool_size(len(comments))
+    pool = _pool
+    if processes <= 1 or pool is None:
+        return _score(comments, language)
+
+    comments = list(comments)
+    bounds = np.linspace(0, len(comments), processes + 1).astype(int).tolist()
+    started = time.time()
+    try:
+        parts: List[LocalScores] = list(pool.map(
+            _score,
+            [comments[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])],
+            [language] * processes
+        ))
+    except BrokenProcessPool as e:
+        # A pool process died (e.g. OOM killed): drop the pool, keep the run
+        logger.error(
+            "Local scoring pool broke, scoring in-process",
+            comments=len(comments),
+            processes=processes,
+            error=str(e)
+        )
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return _score(comments, language)
+
+    logger.info(
+        "Local scoring pool completed",
+        comments=len(comments),
+        processes=processes,
+        duration=round(time.time() - started, 2)
+    )
+    return LocalScores(*(np.concatenate(arrays) for arrays in zip(*parts)))
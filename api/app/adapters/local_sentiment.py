@@ -1,133 +1,177 @@
 """
-Local sentiment analysis using VADER and TextBlob.
+Local sentiment analysis: native Spanish lexicon scorer, VADER otherwise.
 Fast, free alternative to OpenAI for basic emotion detection.
+
+Spanish comments are scored with array operations over the whole batch;
+other languages still go through VADER one comment at a time (its rules
+run in Python per text), so they score at plain VADER speed. Emotion
+mapping and keyword matching are batched for every language.
 """
 
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-from typing import Dict, List, Optional
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from textblob import TextBlob
 import structlog
 
+from app.adapters.batch_vocabulary import get_batch_vocabulary
+from app.adapters.keyword_matcher import get_emotion_matcher
+from app.adapters.spanish_sentiment import get_spanish_scorer
+
 logger = structlog.get_logger()
 
+# Column order of the emotion matrix (and emotion dict key order)
+EMOTIONS = [
+    "satisfaccion", "frustracion", "enojo", "confianza",
+    "decepcion", "confusion", "anticipacion"
+]
+# Column order of the base sentiment matrix
+BASE_SENTIMENT = ["positive", "negative", "neutral", "compound"]
+
+# Comments scored per array pass (bounds the per-word temporaries)
+SCORE_CHUNK_SIZE = 20000
+
+# VADER is read-only after construction: one instance (and one lexicon load)
+# per process, or per worker parent when preloaded before fork
+_vader: Optional[SentimentIntensityAnalyzer] = None
+
+
+def get_vader() -> SentimentIntensityAnalyzer:
+    """Get the shared VADER analyzer, loading its lexicon on first use."""
+    global _vader
+    if _vader is None:
+        _vader = SentimentIntensityAnalyzer()
+    return _vader
+
 
 class LocalSentimentAnalyzer:
     """Fast local sentiment analysis for basic emotions."""
 
     def __init__(self):
-        self.vader = SentimentIntensityAnalyzer()
+        self.vader = get_vader()
+        self.spanish = get_spanish_scorer()
 
-        # Emotion keywords for pattern matching
-        self.emotion_patterns = {
-            "confusion": ["no entiendo", "confuso", "no sé", "?", "unclear", "confused", "no comprendo", "no me queda claro"],
-            "anticipacion": ["espero", "ojalá", "pronto", "futuro", "will", "hope", "soon", "esperando", "ansioso"],
-            "enojo": ["molesto", "enojado", "furioso", "angry", "mad", "furious", "irritado", "indignado"],
-            "confianza": ["confío", "seguro", "excelente", "trust", "confident", "reliable", "fiable", "confiable"]
-        }
+        # Emotion keywords (confusion, anticipacion, enojo, confianza), one scan per comment
+        self.emotion_matcher = get_emotion_matcher()
 
     def analyze_batch(self, comments: List[str], language: str = "es") -> List[Dict]:
         """
         Analyze emotions locally without OpenAI.
 
         Returns emotion scores for each comment.
-        Memory efficient: processes one at a time.
+        The whole batch is scored at once (see score_batch).
         """
-        results = []
-
-        for comment in comments:
-            try:
-                # Translate if Spanish (TextBlob handles this efficiently)
-                if language == "es":
-                    blob = TextBlob(comment)
-                    try:
-                        # Only translate for VADER (English-only)
-                        english_text = str(blob.translate(to='en'))
-                        vader_scores = self.vader.polarity_scores(english_text)
-                    except:
-                        # Fallback if translation fails
-                        vader_scores = self.vader.polarity_scores(comment)
-                else:
-                    vader_scores = self.vader.polarity_scores(comment)
-
-                # Extract base sentiments
-                positive = vader_scores['pos']
-                negative = vader_scores['neg']
-                neutral = vader_scores['neu']
-                compound = vader_scores['compound']
-
-                # Map to 7 emotions using rules
-                emotions = self._map_to_emotions(
-                    comment, positive, negative, neutral, compound
-                )
-
-                results.append({
-                    "emotions": emotions,
-                    "base_sentiment": {
-                        "positive": positive,
-                        "negative": negative,
-                        "neutral": neutral,
-                        "compound": compound
-                    }
-                })
-
-            except Exception as e:
-                logger.warning(f"Local sentiment failed for comment: {e}")
-                # Default emotions on failure
-                results.append({
+        try:
+            emotions, sentiment = self.score_batch(comments, language)
+        except Exception as e:
+            logger.warning(f"Local sentiment failed for batch: {e}")
+            # Default emotions on failure
+            return [
+                {
                     "emotions": self._default_emotions(),
                     "base_sentiment": {"positive": 0.33, "negative": 0.33, "neutral": 0.34, "compound": 0.0}
-                })
+                }
+                for _ in comments
+            ]
+
+        emotion_rows = emotions.astype(np.float64).round(3).tolist()
+        sentiment_rows = sentiment.astype(np.float64).round(4).tolist()
+        return [
+            {
+                "emotions": dict(zip(EMOTIONS, emotion_row)),
+                "base_sentiment": dict(zip(BASE_SENTIMENT, sentiment_row))
+            }
+            for emotion_row, sentiment_row in zip(emotion_rows, sentiment_rows)
+        ]
+
+    def score_batch(self, comments: List[str], language: str = "es") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a batch of comments as matrices.
 
-        return results
+        Args:
+            comments: Comments to score
+            language: Language code (Spanish is scored natively as arrays; others
+                with VADER, one polarity_scores() call per comment)
 
-    def _map_to_emotions(self, text: str, pos: float, neg: float, neu: float, compound: float) -> Dict:
+        Returns:
+            Tuple of (emotions float32 (n, 7) in EMOTIONS order,
+            base sentiment float32 (n, 4) in BASE_SENTIMENT order)
         """
-        Map VADER scores to 7 specific emotions.
-        Uses both scores and keyword patterns.
+        if len(comments) > SCORE_CHUNK_SIZE:
+            parts = [
+                self.score_batch(comments[start:start + SCORE_CHUNK_SIZE], language)
+                for start in range(0, len(comments), SCORE_CHUNK_SIZE)
+            ]
+            return np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+
+        # One encoding of the batch serves the scorer and the keyword matcher
+        batch = get_batch_vocabulary().encode(comments)
+
+        if language == "es":
+            # Columns: neg, neu, pos, compound
+            polarity = self.spanish.polarity_matrix(comments, batch)
+            neg, neu, pos, compound = polarity.T
+        else:
+            # Not vectorized: VADER's rules only exist as per-text Python
+            scores = [self.vader.polarity_scores(comment) for comment in comments]
+            neg, neu, pos, compound = (
+                np.array([score[key] for score in scores], dtype=np.float64)
+                for key in ("neg", "neu", "pos", "compound")
+            )
+
+        hits = self.emotion_matcher.match_masks(comments, batch)
+        emotions = self._map_to_emotions(hits, pos, neg, neu, compound)
+        sentiment = np.column_stack([pos, neg, neu, compound]).astype(np.float32)
+        return emotions, sentiment
+
+    def _keyword_hits(self, hits: np.ndarray, emotion: str) -> np.ndarray:
+        """Which comments mention an emotion's keywords (bool per comment)."""
+        if emotion not in self.emotion_matcher.categories:
+            return np.zeros(len(hits), dtype=bool)
+        return (hits >> self.emotion_matcher.categories.index(emotion)) & 1 == 1
+
+    def _map_to_emotions(
+        self,
+        hits: np.ndarray,
+        pos: np.ndarray,
+        neg: np.ndarray,
+        neu: np.ndarray,
+        compound: np.ndarray
+    ) -> np.ndarray:
+        """
+        Map sentiment scores to 7 specific emotions, for a whole batch.
+        Uses both scores and keyword patterns (hits: emotion keyword bitmasks).
         """
-        text_lower = text.lower()
-
         # Base emotion calculation from sentiment
-        emotions = {
-            "satisfaccion": min(1.0, pos * 1.2),  # Boost positive
-            "frustracion": min(1.0, neg * 0.8),   # Slightly less than pure negative
-            "enojo": 0.0,                          # Will enhance with keywords
-            "confianza": 0.0,                      # Will enhance with keywords
-            "decepcion": min(1.0, neg * 0.6),     # Subset of negative
-            "confusion": 0.0,                      # Will enhance with patterns
-            "anticipacion": 0.0                    # Will enhance with patterns
-        }
+        satisfaccion = np.minimum(1.0, pos * 1.2)  # Boost positive
+        frustracion = np.minimum(1.0, neg * 0.8)   # Slightly less than pure negative
+        decepcion = np.minimum(1.0, neg * 0.6)     # Subset of negative
 
         # Enhance with keyword patterns
-        if any(word in text_lower for word in self.emotion_patterns["confusion"]):
-            emotions["confusion"] = max(0.5, neu)
-        else:
-            emotions["confusion"] = neu * 0.3
-
-        if any(word in text_lower for word in self.emotion_patterns["anticipacion"]):
-            emotions["anticipacion"] = max(0.4, pos * 0.7)
-        else:
-            emotions["anticipacion"] = pos * 0.3
-
-        if any(word in text_lower for word in self.emotion_patterns["enojo"]):
-            emotions["enojo"] = max(emotions["frustracion"], neg * 1.2)
-            emotions["frustracion"] *= 0.7  # Reduce frustration if anger detected
-        else:
-            emotions["enojo"] = neg * 0.4
-
-        if any(word in text_lower for word in self.emotion_patterns["confianza"]):
-            emotions["confianza"] = max(0.6, pos * 1.1)
-        else:
-            emotions["confianza"] = pos * 0.5 if compound > 0.5 else pos * 0.3
+        confusion = np.where(
+            self._keyword_hits(hits, "confusion"), np.maximum(0.5, neu), neu * 0.3
+        )
+        anticipacion = np.where(
+            self._keyword_hits(hits, "anticipacion"), np.maximum(0.4, pos * 0.7), pos * 0.3
+        )
+
+        angry = self._keyword_hits(hits, "enojo")
+        enojo = np.where(angry, np.maximum(frustracion, neg * 1.2), neg * 0.4)
+        frustracion = np.where(angry, frustracion * 0.7, frustracion)  # Reduce frustration if anger detected
+
+        confianza = np.where(
+            self._keyword_hits(hits, "confianza"),
+            np.maximum(0.6, pos * 1.1),
+            np.where(compound > 0.5, pos * 0.5, pos * 0.3)
+        )
+
+        emotions = np.column_stack([
+            satisfaccion, frustracion, enojo, confianza, decepcion, confusion, anticipacion
+        ])
 
         # Normalize to ensure sum doesn't exceed logical bounds
-        total = sum(emotions.values())
-        if total > 2.5:  # Allow some overlap but not excessive
-            factor = 2.5 / total
-            emotions = {k: round(v * factor, 3) for k, v in emotions.items()}
-
-        return emotions
+        total = emotions.sum(axis=1)
+        factor = np.where(total > 2.5, 2.5 / np.maximum(total, 2.5), 1.0)  # Allow some overlap but not excessive
+        return (emotions * factor[:, None]).astype(np.float32)
 
     def _default_emotions(self) -> Dict:
         """Default neutral emotions."""
@@ -1,16 +1,19 @@
 """
 OpenAI adapter package.
 Provides structured AI analysis for customer feedback.
+Nothing is built at import: the OpenAI SDK loads with the analyzer, and
+workers get their analyzer from app.workers.worker_resources.
 """
 
 from app.config import settings
-from app.adapters.openai.analyzer import OpenAIAnalyzer
 
 
 def create_analyzer():
     """
     Factory function to create appropriate analyzer based on configuration.
     """
+    from app.adapters.openai.analyzer import OpenAIAnalyzer
+
     # Check if parallel processing is enabled
     if settings.ENABLE_PARALLEL_PROCESSING:
         try:
@@ -73,7 +76,20 @@ def create_analyzer():
     return OpenAIAnalyzer()
 
 
-# Create singleton instance
-openai_analyzer = create_analyzer()
+_openai_analyzer = None
+
+
+def __getattr__(name):
+    """Lazy attributes: the analyzer class and a singleton built on first use."""
+    global _openai_analyzer
+    if name == "OpenAIAnalyzer":
+        from app.adapters.openai.analyzer import OpenAIAnalyzer
+        return OpenAIAnalyzer
+    if name == "openai_analyzer":
+        if _openai_analyzer is None:
+            _openai_analyzer = create_analyzer()
+        return _openai_analyzer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["openai_analyzer", "OpenAIAnalyzer", "create_analyzer"]
\ No newline at end of file
@@ -11,7 +11,6 @@ from typing import Dict, List, Optional, Any
 import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import openai
-from openai import AsyncOpenAI
 
 from app.config import settings
 from app.schemas.base import Language
@@ -21,8 +20,15 @@ from app.schemas.ai_schemas import (
     EmotionScores,
     PainPoint
 )
-from app.adapters.openai.client import create_rate_limiter
-from app.adapters.openai.utils import optimize_batch_size
+from app.adapters.openai.client_pool import OpenAIClientPool, create_client_pool
+from app.adapters.openai.model_cascade import (
+    CONFIDENCE_INSTRUCTION,
+    CONFIDENCE_KEY,
+    confidence_schema,
+    run_cascade,
+)
+from app.adapters.openai.utils import optimize_batch_size, estimate_tokens
+from app.utils.deadline import call_timeout, stop_before_deadline
 from app.utils.openai_logging import (
     OpenAIMetricsCollector,
     ResponseValidator,
@@ -35,16 +41,64 @@ logger = structlog.get_logger()
 class OpenAIAnalyzer:
     """GPT-4o-mini Chat Completions API client for feedback analysis with structured outputs."""
 
-    def __init__(self):
-        """Initialize the OpenAI analyzer."""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.rate_limiter = create_rate_limiter()
+    def __init__(self, client_pool: Optional[OpenAIClientPool] = None):
+        """
+        Initialize the OpenAI analyzer.
+
+        Args:
+            client_pool: Pool of API keys to draw clients from (created from settings if omitted)
+        """
+        self.client_pool = client_pool or create_client_pool()
         self.metrics = global_metrics  # Use global metrics collector
 
     # Removed old verbose methods - now using optimized versions below
 
+    async def analyze_batch(
+        self,
+        comments: List[str],
+        batch_index: int = 0,
+        language_hint: Optional[Language] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze a batch of comments.
+        With AI_CASCADE_ENABLED, AI_CASCADE_MODEL answers first and the
+        comments it is unsure of are re-analyzed with AI_MODEL.
+
+        Args:
+            comments: List of comment strings to analyze
+            batch_index: Index of this batch (for logging)
+            language_hint: Optional language hint
+
+        Returns:
+            Structured analysis results (cascade stats under "cascade")
+        """
+        if not settings.AI_CASCADE_ENABLED:
+            return await self._analyze_with_model(comments, batch_index, language_hint)
+
+        async def request(indices: List[int], model: str, with_confidence: bool):
+            result = await self._analyze_with_model(
+                [comments[i] for i in indices], batch_index, language_hint, model, with_confidence
+            )
+            # Items the model skipped stay None (and get escalated)
+            by_index = {item["index"]: item for item in result["comments"]}
+            return [by_index.get(i) for i in range(len(indices))]
+
+        answers, stats = await run_cascade(len(comments), request, confidence_key="confidence")
+        logger.info(
+            "Model cascade completed",
+            batch_index=batch_index,
+            comments=len(comments),
+            escalated=stats["escalated"]
+        )
+        return {
+            "comments": [
+                {**answer, "index": i} for i, answer in enumerate(answers) if answer is not None
+            ],
+            "cascade": stats
+        }
+
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(3) | stop_before_deadline(),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         retry=retry_if_exception_type((
             openai.RateLimitError,
@@ -52,11 +106,13 @@ class OpenAIAnalyzer:
             openai.APITimeoutError
         ))
     )
-    async def analyze_batch(
+    async def _analyze_with_model(
         self,
         comments: List[str],
         batch_index: int = 0,
-        language_hint: Optional[Language] = None
+        language_hint: Optional[Language] = None,
+        model: Optional[str] = None,
+        with_confidence: bool = False
     ) -> Dict[str, Any]:
         """
         Analyze a batch of comments using Responses API with structured outputs.
@@ -65,6 +121,8 @@ class OpenAIAnalyzer:
             comments: List of comment strings to analyze
             batch_index: Index of this batch (for logging)
             language_hint: Optional language hint
+            model: Model to ask (AI_MODEL by default)
+            with_confidence: Ask for a per-item confidence (first cascade tier)
 
         Returns:
             Structured analysis results
@@ -73,9 +131,8 @@ class OpenAIAnalyzer:
             JSONDecodeError: If response parsing fails
             Exception: For other API errors
         """
-        await self.rate_limiter.acquire()
-
         start_time = time.time()
+        model = model or settings.AI_MODEL
 
         # Enhanced logging with metrics
         prompt_length = sum(len(c) for c in comments)
@@ -92,26 +149,36 @@ class OpenAIAnalyzer:
 
             # Define schema inline - no need for external module
             response_schema = self._get_response_schema()
-
-            # Use Chat Completions API with structured output
-            response = await self.client.chat.completions.create(
-                model=settings.AI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "batch_analysis",
-                        "schema": response_schema,
-                        "strict": True
-                    }
-                },
-                temperature=0.3,
-                max_tokens=min(4096, len(comments) * 100),  # Scale with batch size
-                seed=42,  # For reproducibility
-                timeout=settings.OPENAI_TIMEOUT_SECONDS  # Explicit timeout
+            if with_confidence:
+                system_prompt += "\n" + CONFIDENCE_INSTRUCTION
+                item_schema = response_schema["properties"]["r"]["items"]
+                item_schema["properties"][CONFIDENCE_KEY] = confidence_schema()
+                item_schema["required"].append(CONFIDENCE_KEY)
+
+            max_tokens = min(4096, len(comments) * 100)  # Scale with batch size
+
+            # Use Chat Completions API with structured output on the best pooled key
+            response = await self.client_pool.execute(
+                lambda client: client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "batch_analysis",
+                            "schema": response_schema,
+                            "strict": True
+                        }
+                    },
+                    temperature=0.3,
+                    max_tokens=max_tokens,
+                    seed=42,  # For reproducibility
+                    timeout=call_timeout(settings.OPENAI_TIMEOUT_SECONDS)  # Capped by the analysis deadline
+                ),
+                estimated_tokens=estimate_tokens(system_prompt + user_prompt) + max_tokens
             )
 
             # Extract content from Chat Completions response
@@ -161,6 +228,7 @@ class OpenAIAnalyzer:
             logger.info(
                 "Batch analysis completed",
                 batch_index=batch_index,
+                model=model,
                 processing_time=processing_time,
                 comments_analyzed=len(objects),
                 tokens_used=tokens_used,
@@ -208,7 +276,7 @@ class OpenAIAnalyzer:
                         nps_category = "passive"
 
                     # Build result
-                    processed_results.append({
+                    processed = {
                         "index": i,
                         "emotions": emotions_dict,
                         "churn_risk": churn_risk,
@@ -217,7 +285,10 @@ class OpenAIAnalyzer:
                         "language": "es",  # Default
                         "nps_category": nps_category,
                         "key_phrases": []  # Not used
-                    })
+                    }
+                    if with_confidence:
+                        processed["confidence"] = float(obj.get(CONFIDENCE_KEY, 0.0))
+                    processed_results.append(processed)
 
                 except Exception as e:
                     logger.warning(
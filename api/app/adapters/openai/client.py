@@ -4,6 +4,7 @@ OpenAI API client configuration and rate limiting.
 
 import asyncio
 import time
+import uuid
 from typing import Optional
 import structlog
 import redis
@@ -13,39 +14,43 @@ from app.config import settings
 
 logger = structlog.get_logger()
 
+# Atomic sliding-window check: trim, count, and only record when under the limit
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - 1.0)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], now, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], 2)
+    return 1
+end
+return 0
+"""
+
 
 class GlobalRateLimiter:
     """Global rate limiter using Redis for coordination across workers."""
 
-    def __init__(self, max_rps: int = 8):
+    def __init__(self, max_rps: int = 8, key: str = "openai_rate_limit"):
         """
         Initialize global rate limiter.
 
         Args:
             max_rps: Maximum requests per second across all workers
+            key: Redis key for the sliding window (one per API key)
         """
         self.max_rps = max_rps
         self.redis_client = redis.from_url(settings.REDIS_URL)
-        self.key = "openai_rate_limit"
+        self.key = key
+        self._acquire_script = self.redis_client.register_script(_ACQUIRE_SCRIPT)
 
     async def acquire(self):
         """Acquire permission to make a request using Redis coordination."""
         while True:
             try:
-                # Use Redis pipeline for atomic operations
-                pipe = self.redis_client.pipeline()
-                now = time.time()
-
-                # Clean old entries and count current requests
-                pipe.zremrangebyscore(self.key, 0, now - 1.0)
-                pipe.zcard(self.key)
-                pipe.zadd(self.key, {str(now): now})
-                pipe.expire(self.key, 2)  # TTL for cleanup
+                # Redis round trip runs off the event loop so concurrent batches keep moving
+                granted = await asyncio.to_thread(self._try_acquire)
 
-                results = pipe.execute()
-                current_count = results[1]  # Count after cleanup
-
-                if current_count < self.max_rps:
+                if granted:
                     # Permission granted
                     break
                 else:
@@ -58,6 +63,19 @@ class GlobalRateLimiter:
                 await asyncio.sleep(1.0 / self.max_rps)
                 break
 
+    def _try_acquire(self) -> bool:
+        """
+        Record a request in the sliding window if under the limit.
+        Denied attempts are not recorded, so many waiters polling the
+        window cannot keep it full by themselves.
+        """
+        now = time.time()
+        granted = self._acquire_script(
+            keys=[self.key],
+            args=[now, self.max_rps, f"{now}:{uuid.uuid4().hex[:8]}"]
+        )
+        return bool(granted)
+
 
 class RateLimiter:
     """Local rate limiter for OpenAI API calls (fallback)."""
@@ -0,0 +1,314 @@
+"""
+Multi-key OpenAI client pool.
+Spreads requests across several API keys/projects, each with its own
+rate limiter and health state, and fails over on auth or quota errors.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import structlog
+import httpx
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import settings
+from app.adapters.openai.client import GlobalRateLimiter
+from app.adapters.openai.scheduler import FairShareScheduler, create_scheduler
+from app.utils.cancellation import raise_if_cancelled_async
+from app.utils.deadline import DeadlineExceeded, remaining_seconds
+
+logger = structlog.get_logger()
+
+
+class NoHealthyClientError(Exception):
+    """Raised when every key in the pool is cooling down."""
+
+
+class PooledClient:
+    """One API key (or project) with its own limiter and health state."""
+
+    def __init__(
+        self,
+        key_id: str,
+        api_key: str,
+        project: Optional[str] = None,
+        max_rps: Optional[int] = None
+    ):
+        """
+        Initialize a pool member.
+
+        Args:
+            key_id: Short identifier used in logs and Redis keys (never the key itself)
+            api_key: OpenAI API key
+            project: Optional OpenAI project ID
+            max_rps: Requests per second allowed for this key
+        """
+        self.key_id = key_id
+        self.project = project
+        self.rate_limiter = GlobalRateLimiter(
+            max_rps=max_rps or settings.MAX_RPS,
+            key=f"openai_rate_limit:{key_id}"
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            project=project,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.OPENAI_HTTP_KEEPALIVE_EXPIRY_SECONDS
+                ),
+                event_hooks={"response": [self._record_rate_limits]}
+            )
+        )
+
+        # Health and load tracking
+        self.outstanding_tokens = 0
+        self.in_flight = 0
+        self.unhealthy_until = 0.0
+        self.last_error: Optional[str] = None
+
+        # Remaining capacity reported by OpenAI (fractions 0-1, 1.0 until known)
+        self.remaining_requests_ratio = 1.0
+        self.remaining_tokens_ratio = 1.0
+
+    async def _record_rate_limits(self, response: Any) -> None:
+        """Capture x-ratelimit-* headers from every response."""
+        headers = response.headers
+        self.remaining_requests_ratio = _ratio(
+            headers.get("x-ratelimit-remaining-requests"),
+            headers.get("x-ratelimit-limit-requests"),
+            self.remaining_requests_ratio
+        )
+        self.remaining_tokens_ratio = _ratio(
+            headers.get("x-ratelimit-remaining-tokens"),
+            headers.get("x-ratelimit-limit-tokens"),
+            self.remaining_tokens_ratio
+        )
+
+    def is_available(self, now: Optional[float] = None) -> bool:
+        """Check if this key is out of its cooldown window."""
+        return (now or time.time()) >= self.unhealthy_until
+
+    def capacity_score(self) -> float:
+        """
+        Score used to pick a key: higher remaining capacity and fewer
+        outstanding tokens win.
+        """
+        capacity = min(self.remaining_requests_ratio, self.remaining_tokens_ratio)
+        return capacity / (1 + self.outstanding_tokens / 1000)
+
+    def mark_unhealthy(self, cooldown_seconds: float, reason: str) -> None:
+        """Take the key out of rotation for a cooldown period."""
+        self.unhealthy_until = time.time() + cooldown_seconds
+        self.last_error = reason
+        logger.warning(
+            "OpenAI key taken out of rotation",
+            key_id=self.key_id,
+            cooldown_seconds=cooldown_seconds,
+            reason=reason
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get health and load state for monitoring."""
+        return {
+            "key_id": self.key_id,
+            "project": self.project,
+            "healthy": self.is_available(),
+            "in_flight": self.in_flight,
+            "outstanding_tokens": self.outstanding_tokens,
+            "remaining_requests_ratio": round(self.remaining_requests_ratio, 3),
+            "remaining_tokens_ratio": round(self.remaining_tokens_ratio, 3),
+            "last_error": self.last_error
+        }
+
+
+class OpenAIClientPool:
+    """Distributes OpenAI requests across pooled keys with failover."""
+
+    def __init__(self, members: List[PooledClient], scheduler: Optional[FairShareScheduler] = None):
+        """
+        Initialize client pool.
+
+        Args:
+            members: Pool members, at least one
+            scheduler: Optional fair-share scheduler ordering requests across analyses
+        """
+        if not members:
+            raise ValueError("OpenAI client pool needs at least one API key")
+        self.members = members
+        self.scheduler = scheduler
+
+    def select(self) -> PooledClient:
+        """
+        Pick the healthy key with the most remaining capacity and the
+        least outstanding tokens.
+
+        Raises:
+            NoHealthyClientError: If every key is cooling down
+        """
+        now = time.time()
+        available = [m for m in self.members if m.is_available(now)]
+        if not available:
+            raise NoHealthyClientError(
+                "All OpenAI keys are cooling down: "
+                + ", ".join(f"{m.key_id}={m.last_error}" for m in self.members)
+            )
+        return max(available, key=lambda m: m.capacity_score())
+
+    async def select_when_available(self) -> PooledClient:
+        """
+        Pick a key like select(), waiting out a short cooldown when every key
+        is rate limited (e.g. a single key right after a 429).
+
+        Raises:
+            NoHealthyClientError: If the earliest key comes back later than a
+                rate-limit cooldown (auth or quota failures)
+            DeadlineExceeded: If the analysis deadline ends before it comes back
+        """
+        while True:
+            try:
+                return self.select()
+            except NoHealthyClientError:
+                wait = min(m.unhealthy_until for m in self.members) - time.time()
+                if wait > settings.OPENAI_RATE_LIMIT_COOLDOWN_SECONDS:
+                    raise
+                remaining = remaining_seconds()
+                if remaining is not None and remaining - wait < settings.DEADLINE_MIN_CALL_SECONDS:
+                    raise DeadlineExceeded("Analysis deadline reached while OpenAI keys cool down")
+                await asyncio.sleep(max(0.0, wait))
+                await raise_if_cancelled_async()
+
+    async def execute(
+        self,
+        request_fn: Callable[[AsyncOpenAI], Awaitable[Any]],
+        estimated_tokens: int = 0
+    ) -> Any:
+        """
+        Run a request on the best available key, failing over to the next
+        key on auth or quota errors. The request first waits for its fair
+        share (if scheduling is enabled), and no attempt starts once the
+        analysis deadline (if any) is too close or the analysis was cancelled.
+
+        Args:
+            request_fn: Coroutine factory receiving the AsyncOpenAI client
+            estimated_tokens: Estimated tokens for load balancing
+
+        Returns:
+            Whatever request_fn returns
+        """
+        await raise_if_cancelled_async()
+
+        # Wait for this analysis' fair share before competing for the limiter
+        if self.scheduler is None:
+            return await self._attempt(request_fn, estimated_tokens)
+
+        ticket = await self.scheduler.wait_turn()
+        try:
+            return await self._attempt(request_fn, estimated_tokens)
+        finally:
+            await self.scheduler.release(ticket)
+
+    async def _attempt(
+        self,
+        request_fn: Callable[[AsyncOpenAI], Awaitable[Any]],
+        estimated_tokens: int
+    ) -> Any:
+        """Run a request, failing over across keys (see execute)."""
+        attempted = set()
+        while True:
+            await raise_if_cancelled_async()
+            remaining = remaining_seconds()
+            if remaining is not None and remaining < settings.DEADLINE_MIN_CALL_SECONDS:
+                raise DeadlineExceeded("Analysis deadline reached before the OpenAI call")
+
+            member = await self.select_when_available()
+            if member.key_id in attempted:
+                # Every healthy key has already failed for this request
+                raise NoHealthyClientError(
+                    f"No remaining OpenAI keys to fail over to (tried {sorted(attempted)})"
+                )
+            attempted.add(member.key_id)
+
+            await member.rate_limiter.acquire()
+
+            member.in_flight += 1
+            member.outstanding_tokens += estimated_tokens
+            try:
+                return await request_fn(member.client)
+            except Exception as e:
+                if not self._should_failover(member, e):
+                    raise
+                if len(attempted) >= len(self.members):
+                    raise
+                logger.info(
+                    "Failing over to next OpenAI key",
+                    failed_key_id=member.key_id,
+                    error_type=type(e).__name__
+                )
+            finally:
+                member.in_flight -= 1
+                member.outstanding_tokens -= estimated_tokens
+
+    def _should_failover(self, member: PooledClient, error: Exception) -> bool:
+        """Mark key health based on the error and decide whether to fail over."""
+        if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+            member.mark_unhealthy(settings.OPENAI_KEY_COOLDOWN_SECONDS, type(error).__name__)
+            return True
+
+        if isinstance(error, openai.RateLimitError):
+            if getattr(error, "code", None) == "insufficient_quota":
+                member.mark_unhealthy(settings.OPENAI_KEY_COOLDOWN_SECONDS, "insufficient_quota")
+            else:
+                member.remaining_requests_ratio = 0.0
+                member.mark_unhealthy(settings.OPENAI_RATE_LIMIT_COOLDOWN_SECONDS, "rate_limited")
+            return True
+
+        return False
+
+    def get_state(self) -> List[Dict[str, Any]]:
+        """Get state of every key in the pool."""
+        return [m.get_state() for m in self.members]
+
+    async def aclose(self) -> None:
+        """Close every client's HTTP connection pool."""
+        for member in self.members:
+            try:
+                await member.client.close()
+            except Exception as e:
+                logger.warning("Failed to close OpenAI client", key_id=member.key_id, error=str(e))
+
+
+def _ratio(remaining: Optional[str], limit: Optional[str], default: float) -> float:
+    """Convert remaining/limit header values to a 0-1 ratio."""
+    try:
+        limit_value = float(limit)
+        if limit_value <= 0:
+            return default
+        return max(0.0, min(1.0, float(remaining) / limit_value))
+    except (TypeError, ValueError):
+        return default
+
+
+def create_client_pool() -> OpenAIClientPool:
+    """
+    Create client pool from configuration.
+    Uses OPENAI_API_KEYS when set, otherwise the single OPENAI_API_KEY.
+
+    Returns:
+        Configured OpenAIClientPool
+    """
+    members = [
+        PooledClient(
+            key_id=f"k{i}",
+            api_key=entry["api_key"],
+            project=entry["project"]
+        )
+        for i, entry in enumerate(settings.openai_key_entries)
+    ]
+
+    scheduler = create_scheduler()
+
+    logger.info("OpenAI client pool created", keys=len(members), fair_scheduling=scheduler is not None)
+    return OpenAIClientPool(members, scheduler=scheduler)
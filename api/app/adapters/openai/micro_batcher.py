@@ -0,0 +1,205 @@
+"""
+Micro-batching of OpenAI insight requests.
+Small requests arriving on the process loop within a short window (from
+different analyses, or the tail batches of one) are packed into a single
+request up to the comment and token limits, and the results are split back
+to each caller. The packed request belongs to no single analysis: each
+caller's cancellation and deadline are checked for that caller only.
+"""
+
+import asyncio
+import math
+from typing import Awaitable, Callable, Dict, List, Optional
+import structlog
+
+from app.adapters.openai.utils import estimate_tokens
+from app.config import settings
+from app.utils.cancellation import TaskCancelled, is_cancelled_async
+from app.utils.deadline import DeadlineExceeded, remaining_seconds
+from app.utils.request_context import AnalysisContext, get_analysis_context, run_in_context
+
+logger = structlog.get_logger()
+
+# Sends one packed request: (prompts, batch_index) -> one result per prompt,
+# aligned by prompt (None where the model gave no answer)
+RequestFn = Callable[[List[str], int], Awaitable[List[Optional[Dict]]]]
+
+
+class _Pending:
+    """A caller's prompts waiting to be packed."""
+
+    __slots__ = ("prompts", "batch_index", "tokens", "future", "context")
+
+    def __init__(
+        self,
+        prompts: List[str],
+        batch_index: int,
+        future: asyncio.Future,
+        context: Optional[AnalysisContext]
+    ):
+        self.prompts = prompts
+        self.batch_index = batch_index
+        self.tokens = sum(estimate_tokens(prompt) for prompt in prompts)
+        self.future = future
+        self.context = context
+
+
+class MicroBatcher:
+    """
+    Packs small requests made on one event loop into shared requests.
+    Create it on the loop it serves.
+    """
+
+    def __init__(
+        self,
+        request_fn: RequestFn,
+        max_comments: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        window_seconds: Optional[float] = None
+    ):
+        """
+        Initialize micro-batcher.
+
+        Args:
+            request_fn: Coroutine function sending one packed request
+            max_comments: Max prompts per packed request
+            max_tokens: Max estimated prompt tokens per packed request
+            window_seconds: How long the first request waits for company
+        """
+        self.request_fn = request_fn
+        self.max_comments = max_comments or settings.MICRO_BATCH_MAX_COMMENTS
+        self.max_tokens = max_tokens or settings.MICRO_BATCH_MAX_TOKENS
+        self.window_seconds = (
+            window_seconds if window_seconds is not None
+            else settings.MICRO_BATCH_WINDOW_MS / 1000
+        )
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    def accepts(self, prompts: List[str]) -> bool:
+        """Check if a request is small enough to be packed with others."""
+        return 0 < len(prompts) < self.max_comments
+
+    async def submit(self, prompts: List[str], batch_index: int = 0) -> List[Optional[Dict]]:
+        """
+        Queue prompts for the next packed request and wait for their results.
+
+        Args:
+            prompts: Prompts of the caller's batch
+            batch_index: Caller's batch index (for logging)
+
+        Returns:
+            One result per prompt, in order (None where the model gave no answer)
+        """
+        loop = asyncio.get_running_loop()
+        item = _Pending(prompts, batch_index, loop.create_future(), get_analysis_context())
+
+        # Flush first if the newcomer would not fit
+        if self._pending and not self._fits(item):
+            self._flush()
+
+        self._pending.append(item)
+
+        if sum(len(p.prompts) for p in self._pending) >= self.max_comments:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await item.future
+
+    def _fits(self, item: _Pending) -> bool:
+        """Check if an item fits in the request being assembled."""
+        comments = sum(len(p.prompts) for p in self._pending) + len(item.prompts)
+        tokens = sum(p.tokens for p in self._pending) + item.tokens
+        return comments <= self.max_comments and tokens <= self.max_tokens
+
+    def _flush(self) -> None:
+        """Send the pending items as one request."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        group = [item for item in self._pending if not item.future.done()]
+        self._pending = []
+        if not group:
+            return
+
+        task = asyncio.ensure_future(self._send(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, group: List[_Pending]) -> None:
+        """Run the packed request and split its results back to the callers."""
+        group = await self._drop_stopped(group)
+        if not group:
+            return
+
+        prompts = [prompt for item in group for prompt in item.prompts]
+        context = self._shared_context(group)
+
+        if len(group) > 1:
+            logger.debug(
+                "Sending micro-batched request",
+                callers=len(group),
+                comments=len(prompts),
+                tasks=len({item.context.task_id for item in group if item.context})
+            )
+
+        try:
+            results = await run_in_context(self.request_fn(prompts, group[0].batch_index), context)
+        except Exception as e:
+            for item in group:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        results = list(results)
+        offset = 0
+        for item in group:
+            part = results[offset:offset + len(item.prompts)]
+            offset += len(item.prompts)
+            if not item.future.done():
+                # Only this caller's missing answers are padded
+                item.future.set_result(part + [None] * (len(item.prompts) - len(part)))
+
+    @staticmethod
+    async def _drop_stopped(group: List[_Pending]) -> List[_Pending]:
+        """
+        Fail the callers whose analysis was cancelled or is out of time, and
+        return the others.
+        """
+        live = []
+        for item in group:
+            context = item.context
+            if item.future.done():
+                continue
+            if context is not None and await is_cancelled_async(context.task_id):
+                item.future.set_exception(TaskCancelled(f"Analysis {context.task_id} was cancelled"))
+                continue
+            remaining = remaining_seconds(context.deadline) if context is not None else None
+            if remaining is not None and remaining < settings.DEADLINE_MIN_CALL_SECONDS:
+                item.future.set_exception(DeadlineExceeded("Analysis deadline reached before the OpenAI call"))
+                continue
+            live.append(item)
+        return live
+
+    @staticmethod
+    def _shared_context(group: List[_Pending]) -> Optional[AnalysisContext]:
+        """
+        Context the packed request runs under. Shared by several callers, it
+        belongs to no analysis (so no single caller's cancellation applies),
+        with the most urgent caller's priority and the latest deadline (none
+        if any caller has none).
+        """
+        if len(group) == 1:
+            return group[0].context
+        contexts = [item.context for item in group if item.context is not None]
+        if not contexts:
+            return None
+        urgent = min(contexts, key=lambda c: c.deadline if c.deadline is not None else math.inf)
+        deadlines = [c.deadline for c in contexts]
+        return AnalysisContext(
+            priority=urgent.priority,
+            deadline=None if None in deadlines or len(contexts) < len(group) else max(deadlines)
+        )
@@ -0,0 +1,154 @@
+"""
+Two-tier model cascade.
+Every item is first asked of the cheaper AI_CASCADE_MODEL, whose answers
+carry a per-item confidence; items below AI_CASCADE_MIN_CONFIDENCE, missing
+from the answer, or flagged by the caller (e.g. contradicting local signals)
+are asked again of AI_MODEL. Each run returns stats that travel with the
+batch result ("cascade") and are summed per task at finalization.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+from app.config import settings
+from app.utils.cancellation import TaskCancelled
+from app.utils.deadline import DeadlineExceeded
+
+logger = structlog.get_logger()
+
+# Confidence field of first-tier answers
+CONFIDENCE_KEY = "k"
+
+# Prompt line asking for it
+CONFIDENCE_INSTRUCTION = (
+    "k: your confidence 0-1 in this item (low if ambiguous, ironic, mixed or off-topic)."
+)
+
+# Summable counters of a run (or of many)
+STAT_FIELDS = [
+    "items", "escalated", "first_tier_calls", "second_tier_calls",
+    "first_tier_seconds", "second_tier_seconds",
+]
+
+# (indices, model, with_confidence) -> one answer per index (None if missing)
+RequestFn = Callable[[List[int], str, bool], Awaitable[List[Optional[Dict[str, Any]]]]]
+
+
+def confidence_schema() -> Dict[str, Any]:
+    """JSON schema of the confidence field (added to first-tier item schemas)."""
+    return {"type": "number", "minimum": 0, "maximum": 1}
+
+
+async def run_cascade(
+    count: int,
+    request: RequestFn,
+    contradicts: Optional[Callable[[int, Dict[str, Any]], bool]] = None,
+    confidence_key: str = CONFIDENCE_KEY
+) -> Tuple[List[Optional[Dict[str, Any]]], Dict[str, float]]:
+    """
+    Answer items with the cheap model, escalating uncertain ones.
+
+    Args:
+        count: Number of items
+        request: Asks a model about some items (see RequestFn)
+        contradicts: Optional check (index, first-tier answer) -> escalate
+        confidence_key: Field of an answer holding its confidence
+
+    Returns:
+        Tuple of (answers by item, None where neither tier answered; run stats)
+    """
+    loop = asyncio.get_running_loop()
+    indices = list(range(count))
+
+    started = loop.time()
+    try:
+        answers = list(await request(indices, settings.AI_CASCADE_MODEL, True))
+    except (DeadlineExceeded, TaskCancelled):
+        # Out of time or cancelled: the stronger model can't help either
+        raise
+    except Exception as e:
+        # First tier down: everything goes to the stronger model
+        logger.warning("First-tier model failed, escalating all items", error=str(e))
+        answers = []
+    first_seconds = loop.time() - started
+    answers = (answers + [None] * count)[:count]
+
+    escalate = [
+        i for i, answer in enumerate(answers)
+        if answer is None
+        or _confidence(answer, confidence_key) < settings.AI_CASCADE_MIN_CONFIDENCE
+        or (contradicts is not None and contradicts(i, answer))
+    ]
+
+    second_seconds = 0.0
+    if escalate:
+        started = loop.time()
+        stronger = list(await request(escalate, settings.AI_MODEL, False))
+        second_seconds = loop.time() - started
+        for i, answer in zip(escalate, stronger):
+            if answer is not None:
+                answers[i] = answer
+
+    return answers, {
+        "items": count,
+        "escalated": len(escalate),
+        "first_tier_calls": 1,
+        "second_tier_calls": 1 if escalate else 0,
+        "first_tier_seconds": first_seconds,
+        "second_tier_seconds": second_seconds,
+    }
+
+
+def _confidence(answer: Dict[str, Any], key: str) -> float:
+    """Confidence of an answer (0 when missing or malformed)."""
+    try:
+        return float(answer.get(key, 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def merge_stats(runs: Sequence[Optional[Dict[str, float]]]) -> Optional[Dict[str, float]]:
+    """
+    Sum the stats of cascade runs.
+
+    Args:
+        runs: Stats of runs (None entries are skipped)
+
+    Returns:
+        Summed stats, or None if there were no runs
+    """
+    runs = [run for run in runs if run]
+    if not runs:
+        return None
+    return {field: sum(run.get(field, 0) for run in runs) for field in STAT_FIELDS}
+
+
+def summarize(stats: Optional[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    """
+    Task-level report of cascade stats: escalation rate and latency per tier.
+
+    Args:
+        stats: Summed stats (see merge_stats)
+
+    Returns:
+        Report for the result metadata, or None without stats
+    """
+    if not stats:
+        return None
+
+    items = stats["items"]
+    first_calls = stats["first_tier_calls"]
+    second_calls = stats["second_tier_calls"]
+    return {
+        "first_tier_model": settings.AI_CASCADE_MODEL,
+        "second_tier_model": settings.AI_MODEL,
+        "items": int(items),
+        "escalated": int(stats["escalated"]),
+        "escalation_rate": round(stats["escalated"] / items, 3) if items else 0.0,
+        "first_tier_avg_seconds": round(stats["first_tier_seconds"] / first_calls, 2) if first_calls else 0.0,
+        "second_tier_avg_seconds": round(stats["second_tier_seconds"] / second_calls, 2) if second_calls else 0.0,
+        "first_tier_calls": int(first_calls),
+        "second_tier_calls": int(second_calls),
+    }
@@ -3,7 +3,6 @@ Parallel processing orchestrator for OpenAI analysis.
 Integrates async analyzer with cache management.
 """
 
-import asyncio
 from typing import List, Dict, Any, Optional, Tuple
 import structlog
 import redis
@@ -14,6 +13,7 @@ from app.core.cache_manager import CommentCacheManager, BatchCacheProcessor
 from .async_analyzer import AsyncOpenAIAnalyzer
 from .analyzer import OpenAIAnalyzer  # Fallback to sync analyzer
 from app.utils.event_loop_monitor import monitor_event_loop, log_loop_state
+from app.utils.event_loop_manager import run_async
 
 logger = structlog.get_logger()
 
@@ -131,45 +131,21 @@ class ParallelProcessor:
         Returns:
             Analysis results
         """
-        # Log state before attempting to get/create loop
-        log_loop_state("Before getting event loop in parallel processor")
+        # Submit to the process background loop instead of creating one per call
+        log_loop_state("Submitting parallel processing to background loop")
 
-        # Create event loop if not exists
         try:
-            loop = asyncio.get_event_loop()
-            log_loop_state("Got existing event loop",
-                          loop_id=id(loop),
-                          is_running=loop.is_running(),
-                          is_closed=loop.is_closed())
-
-            if loop.is_closed():
-                log_loop_state("Loop is closed, creating new one")
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError as e:
-            log_loop_state(f"RuntimeError getting loop: {e}, creating new one")
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        # Run async processing
-        log_loop_state("Before run_until_complete",
-                      loop_id=id(loop),
-                      is_running=loop.is_running())
-
-        try:
-            return loop.run_until_complete(
+            return run_async(
                 self._async_process(
                     comments,
                     language_hint,
                     batch_size,
                     progress_callback
-                )
+                ),
+                timeout=settings.ASYNC_RUN_TIMEOUT_SECONDS
             )
-        except RuntimeError as e:
-            log_loop_state(f"RuntimeError in run_until_complete: {e}",
-                          level="error",
-                          loop_id=id(loop),
-                          is_running=loop.is_running())
+        except TimeoutError as e:
+            log_loop_state(f"Parallel processing timed out: {e}", level="error")
             raise
 
     async def _async_process(
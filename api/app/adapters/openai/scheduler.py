@@ -0,0 +1,247 @@
+"""
+Fair-share scheduler for OpenAI requests.
+Sits in front of the rate limiters so that concurrent analyses share the
+OpenAI budget instead of being served first-come-first-served: requests are
+ordered by start-time fair queuing across task IDs (weighted by priority),
+with the earliest deadline first within a round. At most `window` admitted
+requests are unfinished at once, so the backlog waits here, in fair order,
+rather than first-come-first-served at the rate limiter. Waiters retry
+admission with jittered exponential backoff, so a long backlog doesn't run
+the admit script at a fixed high rate.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from typing import Optional
+import redis
+import structlog
+
+from app.config import settings
+from app.utils.cancellation import TaskCancelled, is_cancelled_async
+from app.utils.request_context import AnalysisContext, get_analysis_context
+
+logger = structlog.get_logger()
+
+# Assign a virtual start tag to a new ticket and queue it.
+# start = max(global virtual time, finish tag of the task's previous ticket),
+# so a task that has issued many requests queues behind tasks that issued few.
+# KEYS: queue zset, task finish-tag key, global virtual-time key, ticket alive key
+# ARGV: ticket, 1/weight, deadline tiebreak (0-0.1), key TTL, alive TTL
+_ENQUEUE_SCRIPT = """
+local vnow = tonumber(redis.call('GET', KEYS[3]) or '0')
+local last = tonumber(redis.call('GET', KEYS[2]) or '0')
+local start = math.max(vnow, last)
+redis.call('SET', KEYS[2], start + tonumber(ARGV[2]), 'EX', tonumber(ARGV[4]))
+redis.call('SET', KEYS[4], 1, 'EX', tonumber(ARGV[5]))
+redis.call('ZADD', KEYS[1], start + tonumber(ARGV[3]), ARGV[1])
+return tostring(start)
+"""
+
+# Admit the ticket if it is among the first live tickets that fit in the
+# window next to the admitted, unfinished ones (in-flight zset, scored by
+# lease expiry so tickets of dead processes free their slot).
+# Tickets whose owner stopped refreshing its alive key are dropped.
+# KEYS: queue zset, global virtual-time key, in-flight zset
+# ARGV: ticket, window, alive key prefix, alive TTL, now, lease expiry
+_ADMIT_SCRIPT = """
+redis.call('SET', ARGV[3] .. ARGV[1], 1, 'EX', tonumber(ARGV[4]))
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', ARGV[5])
+local free = tonumber(ARGV[2]) - redis.call('ZCARD', KEYS[3])
+if free <= 0 then
+    return 0
+end
+local head = redis.call('ZRANGE', KEYS[1], 0, free + 20, 'WITHSCORES')
+local live = 0
+for i = 1, #head, 2 do
+    local member = head[i]
+    if redis.call('EXISTS', ARGV[3] .. member) == 0 then
+        redis.call('ZREM', KEYS[1], member)
+    else
+        if member == ARGV[1] then
+            redis.call('ZREM', KEYS[1], member)
+            redis.call('DEL', ARGV[3] .. member)
+            redis.call('ZADD', KEYS[3], ARGV[6], member)
+            local vnow = tonumber(redis.call('GET', KEYS[2]) or '0')
+            local score = tonumber(head[i + 1])
+            if score > vnow then
+                redis.call('SET', KEYS[2], score)
+            end
+            return 1
+        end
+        live = live + 1
+        if live >= free then
+            return 0
+        end
+    end
+end
+return 0
+"""
+
+
+class FairShareScheduler:
+    """
+    Cross-process admission control for OpenAI requests (Redis-backed).
+    A request waits until its ticket is among the first tickets and fewer
+    than `window` admitted requests are unfinished, then proceeds to the
+    rate limiter; release() frees its slot when it completes.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        window: Optional[int] = None,
+        namespace: str = "openai_sched"
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            redis_client: Redis client instance
+            window: Admitted requests unfinished at once
+            namespace: Redis key prefix
+        """
+        self.redis = redis_client
+        self.window = window or settings.OPENAI_SCHEDULER_WINDOW
+        self.queue_key = f"{namespace}:queue"
+        self.vtime_key = f"{namespace}:vtime"
+        self.finish_prefix = f"{namespace}:finish:"
+        self.alive_prefix = f"{namespace}:alive:"
+        self.inflight_key = f"{namespace}:inflight"
+        self._enqueue = redis_client.register_script(_ENQUEUE_SCRIPT)
+        self._admit = redis_client.register_script(_ADMIT_SCRIPT)
+
+    async def wait_turn(self, context: Optional[AnalysisContext] = None) -> Optional[str]:
+        """
+        Wait until this request may proceed to the rate limiter.
+
+        Args:
+            context: Analysis the request belongs to (current context if None)
+
+        Returns:
+            Admitted ticket to pass to release() when the request completes
+            (None if admitted without Redis)
+        """
+        context = context or get_analysis_context() or AnalysisContext()
+        ticket = uuid.uuid4().hex
+        started = time.time()
+        admitted = await self._wait_for_turn(ticket, context)
+        waited = time.time() - started
+
+        if waited > 1.0:
+            logger.debug(
+                "OpenAI request admitted by scheduler",
+                task_id=context.task_id,
+                priority=context.priority,
+                waited_seconds=round(waited, 2)
+            )
+        return admitted
+
+    async def release(self, ticket: Optional[str]) -> None:
+        """
+        Free the window slot of a completed request.
+
+        Args:
+            ticket: Ticket returned by wait_turn (None is ignored)
+        """
+        if ticket is None:
+            return
+        try:
+            await asyncio.to_thread(self.redis.zrem, self.inflight_key, ticket)
+        except redis.RedisError:
+            pass  # The lease expires anyway
+
+    async def _wait_for_turn(self, ticket: str, context: AnalysisContext) -> Optional[str]:
+        """Queue a ticket and poll (with backoff) until it is admitted. Returns it (None without Redis)."""
+        started = time.time()
+        weight = (
+            settings.OPENAI_SCHEDULER_HIGH_WEIGHT if context.priority == "high"
+            else settings.OPENAI_SCHEDULER_NORMAL_WEIGHT
+        )
+
+        # Earliest deadline first within a round: tiebreak below one round step
+        deadline = context.deadline or (started + settings.DEADLINE_MAX_SECONDS)
+        tiebreak = min(max(deadline - started, 0), 1e6) / 1e7
+
+        try:
+            await asyncio.to_thread(
+                self._enqueue,
+                keys=[
+                    self.queue_key,
+                    f"{self.finish_prefix}{context.task_id or 'adhoc'}",
+                    self.vtime_key,
+                    f"{self.alive_prefix}{ticket}"
+                ],
+                args=[ticket, 1.0 / weight, tiebreak, settings.TASK_CONTEXT_TTL_SECONDS, self._alive_ttl()]
+            )
+
+            attempt = 0
+            while True:
+                # A cancelled analysis gives its place in the queue to live ones
+                if await is_cancelled_async(context.task_id):
+                    await asyncio.to_thread(self._drop, ticket)
+                    raise TaskCancelled(f"Analysis {context.task_id} was cancelled")
+
+                now = time.time()
+                admitted = await asyncio.to_thread(
+                    self._admit,
+                    keys=[self.queue_key, self.vtime_key, self.inflight_key],
+                    args=[
+                        ticket, self.window, self.alive_prefix, self._alive_ttl(),
+                        now, now + self._lease_ttl()
+                    ]
+                )
+                if admitted:
+                    return ticket
+                await asyncio.sleep(self._poll_delay(attempt))
+                attempt += 1
+
+        except asyncio.CancelledError:
+            # Shielded: the Redis calls run in a thread, off the loop, even if cancelled again
+            await asyncio.shield(asyncio.to_thread(self._drop, ticket))
+            raise
+
+        except redis.RedisError as e:
+            # Scheduling is an optimization; never block requests on Redis trouble
+            logger.warning("OpenAI scheduler unavailable, admitting request", error=str(e))
+            await asyncio.to_thread(self._drop, ticket)
+            return None
+
+    def _drop(self, ticket: str) -> None:
+        """Remove an abandoned ticket."""
+        try:
+            self.redis.zrem(self.queue_key, ticket)
+            self.redis.delete(f"{self.alive_prefix}{ticket}")
+        except redis.RedisError:
+            pass  # Alive key expires anyway
+
+    @staticmethod
+    def _poll_delay(attempt: int) -> float:
+        """Pause before the next admission attempt: doubles up to the cap, jittered."""
+        base = settings.OPENAI_SCHEDULER_POLL_SECONDS
+        ceiling = max(base, min(settings.OPENAI_SCHEDULER_MAX_POLL_SECONDS, base * 2 ** min(attempt, 16)))
+        # Jitter spreads waiters that started together over the interval
+        return random.uniform(base, ceiling)
+
+    @staticmethod
+    def _alive_ttl() -> int:
+        """Seconds a waiting ticket survives without polling."""
+        return max(2, int(settings.OPENAI_SCHEDULER_MAX_POLL_SECONDS * 4))
+
+    @staticmethod
+    def _lease_ttl() -> int:
+        """Seconds an admitted request holds its slot if it is never released."""
+        return settings.OPENAI_TIMEOUT_SECONDS * 3
+
+
+def create_scheduler() -> Optional[FairShareScheduler]:
+    """
+    Create the scheduler from configuration.
+
+    Returns:
+        FairShareScheduler, or None when fair scheduling is disabled
+    """
+    if not settings.OPENAI_FAIR_SCHEDULING:
+        return None
+    return FairShareScheduler(redis.from_url(settings.REDIS_URL))
@@ -0,0 +1,547 @@
+"""
+Local Spanish sentiment scoring.
+Lexicon/valence scorer in the style of VADER, for Spanish feedback: word
+valences on VADER's -4..4 scale, negation (scoped to its clause: it stops at
+,.;:!?), intensifiers and dampeners,
+superlatives (-ísimo), "pero" contrast, emphasis (!, CAPS) and the same
+pos/neg/neu/compound output. Runs fully offline.
+
+polarity_matrix() scores a whole batch at once: words come as indices of
+the shared batch vocabulary, their properties (valence, negator, booster...)
+live in arrays, and the rules run as NumPy array operations with
+per-comment segment sums.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.adapters.batch_vocabulary import (
+    EncodedBatch,
+    PropertyTable,
+    clause_breaks,
+    get_batch_vocabulary,
+    normalize,
+    sequence_starts,
+    tokenize,
+)
+
+# Word valences (-4 very negative .. 4 very positive). Keys are written with
+# accents for readability; lookups are accent-insensitive. Feminine and
+# plural forms are derived from the masculine singular.
+VALENCES: Dict[str, float] = {
+    # Positive
+    "excelente": 3.2, "excepcional": 3.2, "impecable": 3.0, "perfecto": 3.0,
+    "maravilloso": 3.2, "fantástico": 3.0, "estupendo": 3.0, "espectacular": 3.0,
+    "magnífico": 3.0, "increíble": 2.8, "genial": 2.8, "brillante": 2.6,
+    "encanta": 2.8, "encantó": 2.8, "encantado": 2.8, "encantador": 2.8,
+    "feliz": 2.8, "amor": 2.8, "bacán": 2.4, "chévere": 2.4, "divino": 2.6,
+    "hermoso": 2.6, "lindo": 2.0, "contento": 2.4, "satisfecho": 2.2,
+    "recomiendo": 2.4, "recomendable": 2.3, "recomendado": 2.0, "favorito": 2.2,
+    "agradecido": 2.2, "agradezco": 2.0, "gracias": 1.9, "amable": 2.2,
+    "servicial": 2.0, "atento": 1.8, "profesional": 1.8, "eficiente": 2.0,
+    "eficaz": 1.9, "confiable": 2.0, "fiable": 2.0, "agradable": 2.0,
+    "alegre": 2.2, "éxito": 2.4, "intuitivo": 1.8, "óptimo": 2.2,
+    "bueno": 1.9, "buen": 1.9, "bien": 1.5, "mejor": 1.8, "gran": 1.6,
+    "gusta": 1.8, "gustó": 1.8, "útil": 1.8, "rápido": 1.5, "rapidez": 1.5,
+    "fácil": 1.5, "cómodo": 1.5, "puntual": 1.6, "mejoró": 1.6, "mejorado": 1.5,
+    "ayudaron": 1.6, "resuelto": 1.5, "resolvieron": 1.5, "solucionaron": 1.5,
+    "cumplieron": 1.5, "cumple": 1.3, "oportuno": 1.5, "beneficio": 1.5,
+    "ventaja": 1.4, "limpio": 1.4, "seguro": 1.3, "correcto": 1.2,
+    "adecuado": 1.2, "sencillo": 1.2, "estable": 1.2, "fluido": 1.2,
+    "tranquilo": 1.2, "accesible": 1.2, "ayuda": 1.2, "barato": 1.0,
+    "económico": 1.0, "justo": 1.0, "ok": 0.9, "funciona": 0.8, "funcionó": 0.8,
+    # Negative
+    "pésimo": -3.2, "horrible": -3.2, "terrible": -3.2, "estafa": -3.2,
+    "estafaron": -3.2, "odio": -3.2, "fatal": -3.0, "desastre": -3.0,
+    "desastroso": -3.1, "nefasto": -3.1, "furioso": -3.0, "robo": -3.0,
+    "robaron": -3.0, "asco": -3.0, "asqueroso": -3.0, "detesto": -3.0,
+    "lamentable": -2.8, "inaceptable": -2.8, "indignado": -2.8, "indignante": -2.8,
+    "abuso": -2.8, "abusivo": -2.8, "engaño": -2.8, "basura": -2.8,
+    "porquería": -2.8, "horror": -2.8, "peor": -2.6, "grosero": -2.6,
+    "irrespetuoso": -2.6, "incompetente": -2.6, "engañoso": -2.6, "malo": -2.5,
+    "maleducado": -2.5, "enojado": -2.5, "harto": -2.5,
+    "decepcionante": -2.5, "mentira": -2.5, "mienten": -2.5, "deficiente": -2.4,
+    "frustrado": -2.4, "frustrante": -2.4, "frustración": -2.4, "decepcionado": -2.4,
+    "decepción": -2.4, "inútil": -2.4, "vergüenza": -2.4, "insatisfecho": -2.3,
+    "disgustado": -2.3, "mal": -2.2, "desilusión": -2.2, "defectuoso": -2.2,
+    "triste": -2.1, "molesto": -2.0, "roto": -2.0, "dañado": -2.0, "sucio": -2.0,
+    "feo": -2.0, "peligroso": -2.0, "ignorado": -2.0, "ignoraron": -2.0,
+    "miedo": -2.0, "ineficiente": -2.0, "falla": -1.8, "fallo": -1.8,
+    "falló": -1.8, "defecto": -1.8, "queja": -1.8, "molestia": -1.8,
+    "mediocre": -1.8, "lástima": -1.8, "perdieron": -1.8, "pérdida": -1.8,
+    "insuficiente": -1.8, "temor": -1.8, "problema": -1.6, "error": -1.6,
+    "reclamo": -1.6, "lento": -1.6, "lentitud": -1.6, "retraso": -1.6,
+    "aburrido": -1.6, "caro": -1.5, "demora": -1.5, "demoran": -1.5,
+    "demoró": -1.5, "atrasado": -1.5, "caída": -1.5, "cansado": -1.5,
+    "preocupado": -1.5, "perdí": -1.5, "lamentablemente": -1.5,
+    "desgraciadamente": -1.5, "pena": -1.5, "caído": -1.4, "preocupa": -1.4,
+    "complicado": -1.3, "confuso": -1.3, "desafortunadamente": -1.3,
+    "costoso": -1.2, "difícil": -1.2, "escaso": -1.2, "falta": -1.2,
+    "faltan": -1.2, "cortes": -1.2, "cancelar": -1.0, "cobraron": -1.0,
+    "duda": -0.8, "cobro": -0.8, "regular": -0.5,
+}
+
+# Multi-word expressions, matched before single words (valence 0 neutralizes
+# greetings whose words would otherwise score)
+IDIOMS: Dict[Tuple[str, ...], float] = {
+    ("vale", "la", "pena"): 1.8,
+    ("de", "maravilla"): 2.8,
+    ("de", "lujo"): 2.5,
+    ("a", "tiempo"): 1.2,
+    ("buenos", "dias"): 0.0,
+    ("buenas", "tardes"): 0.0,
+    ("buenas", "noches"): 0.0,
+}
+
+NEGATORS = {
+    "no", "nunca", "jamás", "tampoco", "ni", "sin", "nada", "nadie",
+    "ningún", "ninguno", "ninguna",
+}
+
+# Degree modifiers: intensifiers push a valence away from zero, dampeners
+# pull it towards zero
+BOOSTERS: Dict[str, float] = {
+    **dict.fromkeys([
+        "muy", "más", "super", "súper", "sumamente", "tan", "demasiado",
+        "bastante", "realmente", "totalmente", "completamente", "extremadamente",
+        "increíblemente", "mucho", "mucha", "muchos", "muchas", "muchísimo",
+        "absolutamente", "re", "tremendamente", "terriblemente",
+    ], 0.293),
+    **dict.fromkeys([
+        "poco", "algo", "apenas", "casi", "medio", "ligeramente", "relativamente",
+    ], -0.293),
+}
+
+# Contrast: what follows "pero" outweighs what precedes it
+CONTRAST_WORDS = {"pero", "sino"}
+
+# VADER constants
+NEGATION_SCALAR = -0.74
+CAPS_INCREMENT = 0.733
+EXCLAMATION_INCREMENT = 0.292
+MAX_EXCLAMATIONS = 4
+NORMALIZATION_ALPHA = 15
+# Modifier weight by distance to the sentiment word (1, 2, 3 words before)
+DISTANCE_DECAY = (1.0, 0.95, 0.9)
+# Words of a chunk whose clause breaks fit the chunk's bitmask
+_MAX_MASKED_WORDS = 62
+
+_SUPERLATIVE_ENDINGS = ("isimos", "isimas", "isimo", "isima")
+
+# Columns of polarity_matrix(), in VADER's key order
+POLARITY_COLUMNS = ("neg", "neu", "pos", "compound")
+
+
+def _normalized_keys(words) -> Dict[str, float]:
+    """Index a word table by its accent-stripped lowercase form."""
+    if isinstance(words, dict):
+        return {normalize(word).lower(): value for word, value in words.items()}
+    return {normalize(word).lower(): 0.0 for word in words}
+
+
+class SpanishSentimentScorer:
+    """
+    Lexicon sentiment scorer for Spanish text.
+    polarity_scores() mirrors VADER's output, so it is a drop-in replacement.
+    Lexicon tables are read-only after construction: share one instance per
+    process (the lookup cache only memoizes inflected forms).
+    """
+
+    def __init__(self, valences: Optional[Dict[str, float]] = None):
+        """
+        Initialize scorer.
+
+        Args:
+            valences: Word valences (defaults to VALENCES)
+        """
+        self.valences = _normalized_keys(valences or VALENCES)
+        self.idioms = {
+            tuple(normalize(word).lower() for word in words): value
+            for words, value in IDIOMS.items()
+        }
+        self.negators = set(_normalized_keys(NEGATORS))
+        self.boosters = _normalized_keys(BOOSTERS)
+        self._max_idiom_length = max((len(words) for words in self.idioms), default=0)
+        # Inflected form -> (valence, is_superlative), filled as words are seen
+        self._lookup_cache: Dict[str, Tuple[float, bool]] = {}
+
+        # Properties of batch vocabulary words and chunks, for polarity_matrix()
+        self._idiom_codes = {
+            word: code
+            for code, word in enumerate(
+                sorted({word for words in self.idioms for word in words}), start=1
+            )
+        }
+        self._word_properties = PropertyTable(self._word_property_values, {
+            "valence": np.float64,
+            "superlative": np.float64,
+            "booster": np.float64,
+            "negator": bool,
+            "contrast": bool,
+            "upper": bool,
+            "upper_or_digit": bool,
+            "idiom_code": np.int16,
+        })
+        self._chunk_properties = PropertyTable(self._chunk_property_values, {
+            "exclamations": np.float64,
+            "words": np.int64,
+            "clause_mask": np.int64,
+            "clause_after": bool,
+        })
+
+    def lookup(self, word: str) -> Tuple[float, bool]:
+        """
+        Valence of a (lowercase, accent-stripped) word, resolving plural,
+        feminine and superlative forms to a lexicon entry.
+
+        Args:
+            word: Word to look up
+
+        Returns:
+            Tuple of (valence, 0.0 if unknown; True if a superlative form)
+        """
+        cached = self._lookup_cache.get(word)
+        if cached is not None:
+            return cached
+
+        result = (self._resolve(word), False)
+        if result[0] == 0.0:
+            for ending in _SUPERLATIVE_ENDINGS:
+                if word.endswith(ending) and len(word) > len(ending) + 1:
+                    stem = word[:-len(ending)]
+                    for candidate in (stem + "o", stem + "e", stem):
+                        valence = self._resolve(candidate)
+                        if valence:
+                            result = (valence, True)
+                            break
+                    break
+
+        if len(self._lookup_cache) > 50000:
+            self._lookup_cache.clear()
+        self._lookup_cache[word] = result
+        return result
+
+    def _resolve(self, word: str) -> float:
+        """Match a word or its masculine singular form against the lexicon."""
+        candidates = [word]
+        if word.endswith("es") and len(word) > 3:
+            candidates.append(word[:-2])
+        if word.endswith("s") and len(word) > 2:
+            candidates.append(word[:-1])
+        for candidate in list(candidates):
+            if candidate.endswith("a"):
+                candidates.append(candidate[:-1] + "o")
+
+        for candidate in candidates:
+            valence = self.valences.get(candidate)
+            if valence is not None:
+                return valence
+        return 0.0
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        """
+        Score the sentiment of a text.
+
+        Args:
+            text: Text to score
+
+        Returns:
+            Dict with neg, neu, pos (proportions) and compound (-1..1)
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+
+        words = [token.lower() for token in tokens]
+        # Emphasis by capitals only counts when the text is not all capitals
+        caps_differential = any(t.isupper() for t in tokens) and not all(
+            t.isupper() or t.isdigit() for t in tokens
+        )
+
+        breaks, _ = clause_breaks(text)
+        clauses = list(np.cumsum(breaks))
+        sentiments = self._word_sentiments(tokens, words, caps_differential, clauses)
+        self._apply_contrast(words, sentiments)
+
+        return self._score(sentiments, min(text.count("!"), MAX_EXCLAMATIONS))
+
+    def _word_sentiments(
+        self,
+        tokens: List[str],
+        words: List[str],
+        caps_differential: bool,
+        clauses: List[int]
+    ) -> List[float]:
+        """Valence of every word after negation and degree modifiers."""
+        sentiments = [0.0] * len(words)
+        i = 0
+        while i < len(words):
+            valence, span = self._idiom_at(words, i)
+            superlative = False
+            if span == 1:
+                valence, superlative = self.lookup(words[i])
+                if words[i] in self.negators or words[i] in self.boosters:
+                    valence = 0.0
+
+            if valence:
+                sign = 1.0 if valence > 0 else -1.0
+                if superlative:
+                    valence += sign * BOOSTERS["muy"]
+                if span == 1 and caps_differential and tokens[i].isupper():
+                    valence += sign * CAPS_INCREMENT
+
+                for distance, decay in enumerate(DISTANCE_DECAY, start=1):
+                    j = i - distance
+                    if j < 0:
+                        break
+                    boost = self.boosters.get(words[j])
+                    if boost:
+                        valence += sign * boost * decay
+                # Any negator within three words of the same clause flips (and dampens) it
+                if any(
+                    words[j] in self.negators and clauses[j] == clauses[i]
+                    for j in range(max(0, i - 3), i)
+                ):
+                    valence *= NEGATION_SCALAR
+
+            sentiments[i] = valence
+            i += span
+
+        return sentiments
+
+    def polarity_matrix(
+        self,
+        texts: Sequence[str],
+        batch: Optional[EncodedBatch] = None
+    ) -> np.ndarray:
+        """
+        Score a batch of texts with array operations.
+        Same rules and results as polarity_scores(), one row per text.
+
+        Args:
+            texts: Texts to score
+            batch: The texts already encoded with the shared batch vocabulary
+
+        Returns:
+            float64 array (len(texts), 4): neg, neu, pos, compound
+        """
+        count = len(texts)
+        if count == 0:
+            return np.zeros((0, len(POLARITY_COLUMNS)))
+
+        if batch is None:
+            batch = get_batch_vocabulary().encode(texts)
+        props = self._word_properties.arrays(batch.words, batch.generation)
+        chunk_props = self._chunk_properties.arrays(batch.chunks, batch.generation)
+
+        ids = batch.word_ids
+        segment = batch.word_segment
+        words = len(ids)
+
+        # "!" per text, from the chunks of each text
+        exclamations = np.bincount(
+            batch.chunk_segment,
+            weights=chunk_props["exclamations"][batch.chunk_ids],
+            minlength=count
+        )
+
+        valence = props["valence"][ids]
+        idiom_code = props["idiom_code"][ids]
+        is_idiom_start = np.zeros(words, dtype=bool)
+
+        # Idioms: the first word takes the idiom's valence, the rest go neutral
+        for idiom, idiom_valence in sorted(self.idioms.items(), key=lambda item: len(item[0])):
+            starts = sequence_starts(
+                idiom_code, segment, [self._idiom_codes[word] for word in idiom]
+            )
+            valence[starts] = idiom_valence
+            for offset in range(1, len(idiom)):
+                valence[starts + offset] = 0.0
+            is_idiom_start[starts] = True
+
+        sign = np.sign(valence)
+        valence += np.where(is_idiom_start, 0.0, sign * props["superlative"][ids] * BOOSTERS["muy"])
+
+        # Capitals count only in texts that are not all capitals
+        upper = props["upper"][ids]
+        any_upper = np.bincount(segment, weights=upper, minlength=count) > 0
+        not_all_upper = (
+            np.bincount(segment, weights=props["upper_or_digit"][ids], minlength=count)
+            < np.bincount(segment, minlength=count)
+        )
+        caps = upper & (any_upper & not_all_upper)[segment] & ~is_idiom_start
+        valence += sign * caps * CAPS_INCREMENT
+
+        # Degree modifiers up to three words back, same text only; negators
+        # too, but only within the same clause
+        clause = np.cumsum(self._clause_starts(batch, chunk_props, words))
+        boost = props["booster"][ids]
+        negator = props["negator"][ids]
+        negated = np.zeros(words, dtype=bool)
+        for distance, decay in enumerate(DISTANCE_DECAY, start=1):
+            if words <= distance:
+                break
+            same_text = segment[distance:] == segment[:-distance]
+            same_clause = same_text & (clause[distance:] == clause[:-distance])
+            valence[distance:] += sign[distance:] * boost[:-distance] * same_text * decay
+            negated[distance:] |= negator[:-distance] & same_clause
+        valence = np.where(negated & (sign != 0), valence * NEGATION_SCALAR, valence)
+
+        # Contrast around the last "pero"/"sino" of each text
+        position = np.arange(words)
+        pivot = np.full(count, -1)
+        contrast = np.flatnonzero(props["contrast"][ids])
+        np.maximum.at(pivot, segment[contrast], contrast)
+        word_pivot = pivot[segment]
+        valence *= np.where(
+            word_pivot < 0, 1.0,
+            np.where(position < word_pivot, 0.5, np.where(position > word_pivot, 1.5, 1.0))
+        )
+
+        return self._score_matrix(valence, segment, count, exclamations)
+
+    @staticmethod
+    def _clause_starts(
+        batch: EncodedBatch,
+        chunk_props: Dict[str, np.ndarray],
+        words: int
+    ) -> np.ndarray:
+        """Per batch word: True if clause punctuation precedes it (see clause_breaks)."""
+        lengths = chunk_props["words"][batch.chunk_ids]
+        first_word = np.cumsum(lengths) - lengths
+        position = np.arange(words) - np.repeat(first_word, lengths)
+        masks = np.repeat(chunk_props["clause_mask"][batch.chunk_ids], lengths)
+        starts = ((masks >> np.minimum(position, _MAX_MASKED_WORDS)) & 1).astype(bool)
+        starts &= position < _MAX_MASKED_WORDS
+
+        # Punctuation closing a chunk starts a clause at the next chunk's first word
+        following = (first_word + lengths)[chunk_props["clause_after"][batch.chunk_ids]]
+        starts[following[following < words]] = True
+        return starts
+
+    @staticmethod
+    def _score_matrix(
+        valence: np.ndarray,
+        segment: np.ndarray,
+        count: int,
+        exclamations: np.ndarray
+    ) -> np.ndarray:
+        """Segment sums of word sentiments into VADER-style scores (see _score)."""
+        words = np.bincount(segment, minlength=count)
+        total = np.bincount(segment, weights=valence, minlength=count)
+        pos_sum = np.bincount(segment, weights=np.where(valence > 0, valence + 1, 0.0), minlength=count)
+        neg_sum = np.bincount(segment, weights=np.where(valence < 0, valence - 1, 0.0), minlength=count)
+        neu_count = np.bincount(segment, weights=valence == 0, minlength=count)
+
+        emphasis = np.minimum(exclamations, MAX_EXCLAMATIONS) * EXCLAMATION_INCREMENT
+
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, 0.0))
+        compound = np.clip(total / np.sqrt(total * total + NORMALIZATION_ALPHA), -1.0, 1.0)
+
+        pos_sum = np.where(pos_sum > -neg_sum, pos_sum + emphasis, pos_sum)
+        neg_sum = np.where(pos_sum < -neg_sum, neg_sum - emphasis, neg_sum)
+        total_weight = pos_sum - neg_sum + neu_count
+        safe_weight = np.where(total_weight > 0, total_weight, 1.0)
+
+        scores = np.column_stack([
+            np.round(np.abs(neg_sum) / safe_weight, 3),
+            np.round(neu_count / safe_weight, 3),
+            np.round(pos_sum / safe_weight, 3),
+            np.round(compound, 4),
+        ])
+        # Texts without words score all zeros, like polarity_scores()
+        scores[words == 0] = 0.0
+        return scores
+
+    def _word_property_values(self, token: str) -> Dict[str, Any]:
+        """Properties of a batch vocabulary word (accent-stripped, case preserved)."""
+        word = token.lower()
+        valence, superlative = self.lookup(word)
+        modifier = word in self.negators or word in self.boosters
+        return {
+            "valence": 0.0 if modifier else valence,
+            "superlative": float(superlative and not modifier),
+            "booster": self.boosters.get(word, 0.0),
+            "negator": word in self.negators,
+            "contrast": word in CONTRAST_WORDS,
+            "upper": token.isupper(),
+            "upper_or_digit": token.isupper() or token.isdigit(),
+            "idiom_code": self._idiom_codes.get(word, 0),
+        }
+
+    @staticmethod
+    def _chunk_property_values(chunk: str) -> Dict[str, Any]:
+        """Properties of a batch vocabulary chunk: emphasis and clause breaks."""
+        breaks, after = clause_breaks(chunk)
+        return {
+            "exclamations": chunk.count("!"),
+            "words": len(breaks),
+            "clause_mask": sum(
+                1 << position for position, brk in enumerate(breaks[:_MAX_MASKED_WORDS]) if brk
+            ),
+            "clause_after": after,
+        }
+
+    def _idiom_at(self, words: List[str], i: int) -> Tuple[float, int]:
+        """Match the longest idiom starting at a word: (valence, words spanned)."""
+        for length in range(min(self._max_idiom_length, len(words) - i), 1, -1):
+            valence = self.idioms.get(tuple(words[i:i + length]))
+            if valence is not None:
+                return valence, length
+        return 0.0, 1
+
+    @staticmethod
+    def _apply_contrast(words: List[str], sentiments: List[float]) -> None:
+        """Halve sentiment before the last "pero"/"sino" and boost it after."""
+        pivots = [i for i, word in enumerate(words) if word in CONTRAST_WORDS]
+        if not pivots:
+            return
+        pivot = pivots[-1]
+        for i in range(len(sentiments)):
+            if i < pivot:
+                sentiments[i] *= 0.5
+            elif i > pivot:
+                sentiments[i] *= 1.5
+
+    @staticmethod
+    def _score(sentiments: List[float], exclamations: int) -> Dict[str, float]:
+        """Aggregate word sentiments into VADER-style scores."""
+        total = sum(sentiments)
+        emphasis = exclamations * EXCLAMATION_INCREMENT
+
+        if total:
+            total += emphasis if total > 0 else -emphasis
+            compound = total / math.sqrt(total * total + NORMALIZATION_ALPHA)
+            compound = max(-1.0, min(1.0, compound))
+        else:
+            compound = 0.0
+
+        pos_sum = sum(s + 1 for s in sentiments if s > 0)
+        neg_sum = sum(s - 1 for s in sentiments if s < 0)
+        neu_count = sum(1 for s in sentiments if s == 0)
+
+        if pos_sum > abs(neg_sum):
+            pos_sum += emphasis
+        elif pos_sum < abs(neg_sum):
+            neg_sum -= emphasis
+
+        total_weight = pos_sum + abs(neg_sum) + neu_count
+        return {
+            "neg": round(abs(neg_sum / total_weight), 3),
+            "neu": round(neu_count / total_weight, 3),
+            "pos": round(pos_sum / total_weight, 3),
+            "compound": round(compound, 4),
+        }
+
+
+_scorer: Optional[SpanishSentimentScorer] = None
+
+
+def get_spanish_scorer() -> SpanishSentimentScorer:
+    """Get the shared Spanish scorer, building its tables on first use."""
+    global _scorer
+    if _scorer is None:
+        _scorer = SpanishSentimentScorer()
+    return _scorer
@@ -2,7 +2,7 @@
 
 import os
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,7 +33,17 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     OPENAI_API_KEY: str = Field(default="", min_length=0)  # Allow empty for health checks
     AI_MODEL: str = Field(default="gpt-4o-mini")  # Stable Chat Completions API
+    AI_CASCADE_ENABLED: bool = Field(default=False)  # Two-tier: AI_CASCADE_MODEL first, AI_MODEL for uncertain items
+    AI_CASCADE_MODEL: str = Field(default="gpt-4.1-nano")  # Cheaper, faster first tier
+    AI_CASCADE_MIN_CONFIDENCE: float = Field(default=0.7, ge=0, le=1)  # First-tier items below it are re-asked
+    AI_CASCADE_MAX_DISAGREEMENT: float = Field(default=0.4, ge=0, le=1)  # |churn - local churn| above it is re-asked
     OPENAI_TIMEOUT_SECONDS: int = Field(default=30, ge=10, le=120)
+    OPENAI_API_KEYS: Optional[str] = Field(default=None)  # Comma-separated, "key" or "key|project"
+    OPENAI_KEY_COOLDOWN_SECONDS: int = Field(default=300, ge=10)  # Auth/quota failures
+    OPENAI_RATE_LIMIT_COOLDOWN_SECONDS: int = Field(default=5, ge=1)  # 429 without quota error
+    OPENAI_HTTP_MAX_CONNECTIONS: int = Field(default=20, ge=1, le=200)  # Per key, per process
+    OPENAI_HTTP_MAX_KEEPALIVE: int = Field(default=10, ge=1, le=200)
+    OPENAI_HTTP_KEEPALIVE_EXPIRY_SECONDS: int = Field(default=120, ge=5)
 
     # Redis Configuration
     REDIS_URL: str = Field(default="redis://localhost:6379/0")
@@ -44,6 +54,50 @@ class Settings(BaseSettings):
     FILE_MAX_MB: int = Field(default=20)
     MAX_BATCH_SIZE: int = Field(default=50)  # Optimized for token limits
     RESULTS_TTL_SECONDS: int = Field(default=86400)  # 24 hours
+    REGISTRY_CLEANUP_BATCH_SIZE: int = Field(default=500, ge=1)  # Expired tasks purged per round trip
+    TASK_CONTEXT_TTL_SECONDS: int = Field(default=14400)  # Same as uploaded file TTL
+    PASS_BATCHES_BY_REFERENCE: bool = Field(default=True)  # Send (shard, start, end) instead of comments
+    INLINE_FANOUT_MAX_COMMENTS: int = Field(default=2000)  # Unique comments; 0 disables inline mode
+    INLINE_FANOUT_TIMEOUT_SECONDS: int = Field(default=420)  # Below task_soft_time_limit
+    SHARDED_MODE_MIN_ROWS: int = Field(default=20000)  # Map-reduce over row shards; 0 disables
+    SHARD_ROWS: int = Field(default=5000)  # Rows per shard (one analyze_shard task each)
+    LARGE_FILE_MIN_ROWS: int = Field(default=5000)  # Routed to the batches_large queue
+
+    # Adaptive deadlines: budget = base + safety * unique_comments / throughput
+    DEADLINE_BASE_SECONDS: int = Field(default=30)
+    DEADLINE_SAFETY_FACTOR: float = Field(default=2.0)
+    DEADLINE_MIN_SECONDS: int = Field(default=60)
+    DEADLINE_MAX_SECONDS: int = Field(default=1800)
+    DEADLINE_DEFAULT_THROUGHPUT_CPS: float = Field(default=20.0)  # LLM-routed comments/s until real throughput is observed
+    DEADLINE_THROUGHPUT_ALPHA: float = Field(default=0.2)  # EWMA weight of the latest analysis
+    DEADLINE_MIN_CALL_SECONDS: float = Field(default=3.0)  # Don't start an OpenAI call with less time left
+    DEADLINE_GRACE_SECONDS: int = Field(default=15)  # Watchdog slack after the deadline
+
+    # Fair-share scheduling of OpenAI requests across concurrent analyses
+    OPENAI_FAIR_SCHEDULING: bool = Field(default=True)
+    OPENAI_SCHEDULER_WINDOW: int = Field(default=24, ge=1)  # Admitted, unfinished requests at once (~ MAX_RPS x latency)
+    OPENAI_SCHEDULER_HIGH_WEIGHT: int = Field(default=2)  # Share of high-priority analyses
+    OPENAI_SCHEDULER_NORMAL_WEIGHT: int = Field(default=1)
+    OPENAI_SCHEDULER_POLL_SECONDS: float = Field(default=0.05)  # First admission retry delay
+    OPENAI_SCHEDULER_MAX_POLL_SECONDS: float = Field(default=0.5)  # Backoff cap between admission retries
+
+    # Coalescing of identical comments in flight across concurrent analyses
+    INFLIGHT_COALESCING_ENABLED: bool = Field(default=True)  # Needs ENABLE_COMMENT_CACHE
+    INFLIGHT_LEASE_SECONDS: int = Field(default=90)  # Claim TTL; a dead leader is detected after this
+    INFLIGHT_WAIT_SECONDS: int = Field(default=60)  # Max wait for another analysis' result
+    INFLIGHT_POLL_SECONDS: float = Field(default=0.25)
+
+    # Micro-batching: small insight requests on a worker loop share one OpenAI call
+    MICRO_BATCHING_ENABLED: bool = Field(default=True)
+    MICRO_BATCH_WINDOW_MS: int = Field(default=50, ge=0, le=1000)  # Wait for other small requests
+    MICRO_BATCH_MAX_COMMENTS: int = Field(default=100, ge=2)  # Requests this large go alone
+    MICRO_BATCH_MAX_TOKENS: int = Field(default=6000)  # Estimated prompt tokens per packed request
+
+    # Sync fast path (POST /upload/sync)
+    SYNC_ANALYSIS_ENABLED: bool = Field(default=True)
+    SYNC_ANALYSIS_MAX_ROWS: int = Field(default=200)  # Larger files go through Celery
+    SYNC_ANALYSIS_MAX_CONCURRENT: int = Field(default=2)  # Inline analyses per API process
+    SYNC_ANALYSIS_TIMEOUT_SECONDS: int = Field(default=60)
 
     # Rate Limiting
     MAX_RPS: int = Field(default=8)  # OpenAI rate limit
@@ -52,6 +106,12 @@ class Settings(BaseSettings):
     HYBRID_ANALYSIS_ENABLED: bool = Field(default=True)
     LOCAL_SENTIMENT_LIBRARY: str = Field(default="vader")
     SENTIMENT_CONFIDENCE_THRESHOLD: float = Field(default=0.05)
+    EMOTION_LEXICON_PATH: Optional[str] = Field(default=None)  # JSON {emotion: [keywords]}; bundled if unset
+    PAIN_LEXICON_PATH: Optional[str] = Field(default=None)  # JSON {category: [keywords]}; bundled if unset
+    CASCADE_ROUTING_ENABLED: bool = Field(default=True)  # Confident comments keep local churn/pain estimates
+    CASCADE_CONFIDENCE_THRESHOLD: float = Field(default=0.7, ge=0, le=1)  # Below it, a comment goes to the LLM
+    CASCADE_RISK_THRESHOLD: float = Field(default=0.5, ge=0, le=1)  # Local churn at/above it goes to the LLM
+    CASCADE_DETRACTOR_MAX_RATING: int = Field(default=6, ge=-1, le=10)  # Ratings at/below it go to the LLM
 
     # Memory Management (New)
     MEMORY_WARNING_MB: int = Field(default=400)
@@ -64,6 +124,14 @@ class Settings(BaseSettings):
     BATCH_SIZE_OPTIMAL: int = Field(default=100, ge=50, le=200)
     ENABLE_PARALLEL_PROCESSING: bool = Field(default=True)  # Re-enabled with event loop fix!
     ENABLE_COMMENT_CACHE: bool = Field(default=True)
+    ASYNC_RUN_TIMEOUT_SECONDS: int = Field(default=180, ge=10)  # Max wait for coroutines submitted from sync code
+    ASYNC_BATCH_CONCURRENCY: int = Field(default=32, ge=1, le=256)  # In-flight batches per process loop
+    LOCAL_ANALYSIS_THREADS: int = Field(default=2, ge=1, le=32)  # Threads for local sentiment per process
+    LOCAL_POOL_ENABLED: bool = Field(default=True)  # Score large local-only runs in a process pool (asyncio worker mode, API)
+    LOCAL_POOL_MIN_COMMENTS: int = Field(default=20000, ge=1)  # Smaller runs are scored in-process
+    LOCAL_POOL_MAX_PROCESSES: int = Field(default=0, ge=0)  # 0 = one per available core
+    LOCAL_POOL_PROCESS_MB: int = Field(default=120, ge=16)  # Memory budgeted per pool process
+    LOCAL_POOL_RESERVE_MB: int = Field(default=100, ge=0)  # Available memory left untouched by the pool
     CACHE_TTL_DAYS: int = Field(default=7, ge=1, le=30)
 
     # Performance Monitoring
@@ -77,6 +145,10 @@ class Settings(BaseSettings):
 
     # Celery Worker Configuration
     CELERY_WORKER_CONCURRENCY: int = Field(default=4)  # Blueprint recommendation
+    # "prefork": one batch per process; "asyncio": one process, many batches on its event loop
+    WORKER_POOL_MODE: str = Field(default="prefork", pattern="^(prefork|asyncio)$")
+    WORKER_READY_FILE: str = Field(default="/tmp/celery-worker-ready")  # Written after warm-up; "" disables
+    CELERY_ASYNC_CONCURRENCY: int = Field(default=32, ge=1, le=256)  # Task threads in asyncio mode
 
     # Optional
     SENTRY_DSN: Optional[str] = Field(default=None)
@@ -88,6 +160,21 @@ class Settings(BaseSettings):
         """Convert MB to bytes."""
         return self.FILE_MAX_MB * 1024 * 1024
 
+    @property
+    def openai_key_entries(self) -> List[Dict[str, Optional[str]]]:
+        """Parse OPENAI_API_KEYS, falling back to the single OPENAI_API_KEY."""
+        entries = []
+        for raw in (self.OPENAI_API_KEYS or "").split(","):
+            raw = raw.strip()
+            if not raw:
+                continue
+            api_key, _, project = raw.partition("|")
+            entries.append({"api_key": api_key.strip(), "project": project.strip() or None})
+
+        if not entries:
+            entries.append({"api_key": self.OPENAI_API_KEY, "project": None})
+        return entries
+
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
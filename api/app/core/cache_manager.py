@@ -37,23 +37,37 @@ class CommentCacheManager:
             "errors": 0
         }
 
-    def get_cache_key(self, comment: str, language: str = "es") -> str:
+    @staticmethod
+    def fingerprint(comment: str, language: str = "es") -> str:
         """
-        Generate cache key for a comment.
+        Fingerprint a comment (normalized text + language).
 
         Args:
             comment: Comment text
             language: Language code
 
         Returns:
-            Cache key string
+            Fingerprint string ("<language>:<hash>")
         """
         # Normalize comment for consistent hashing
         normalized = comment.lower().strip()
         # Include language in hash to separate different language analyses
         content = f"{language}:{normalized}"
         hash_digest = hashlib.sha256(content.encode()).hexdigest()[:16]
-        return f"{self.namespace}:{language}:{hash_digest}"
+        return f"{language}:{hash_digest}"
+
+    def get_cache_key(self, comment: str, language: str = "es") -> str:
+        """
+        Generate cache key for a comment.
+
+        Args:
+            comment: Comment text
+            language: Language code
+
+        Returns:
+            Cache key string
+        """
+        return f"{self.namespace}:{self.fingerprint(comment, language)}"
 
     def get(self, comment: str, language: str = "es") -> Optional[Dict[str, Any]]:
         """
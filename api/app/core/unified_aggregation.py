@@ -182,6 +182,11 @@ class UnifiedAggregator:
             if nps_category in nps_counts:
                 nps_counts[nps_category] += 1
 
+        return UnifiedAggregator.nps_metrics_from_counts(nps_counts)
+
+    @staticmethod
+    def nps_metrics_from_counts(nps_counts: Dict[str, int]) -> Dict[str, Any]:
+        """Build NPS metrics from promoter/passive/detractor counts."""
         total = sum(nps_counts.values())
 
         if total == 0:
@@ -222,13 +227,19 @@ class UnifiedAggregator:
 
         return dict(language_counts)
 
+    @staticmethod
+    def calculate_source_distribution(comments: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Count rows by the source of their churn/pain results (llm, local...)."""
+        return dict(Counter(comment.get("source", "llm") for comment in comments))
+
     @staticmethod
     def build_metadata(
         total_comments: int,
         processing_time: float,
         model_used: str,
         language_counts: Optional[Dict[str, int]] = None,
-        batch_count: int = 1
+        batch_count: int = 1,
+        source_counts: Optional[Dict[str, int]] = None
     ) -> Dict[str, Any]:
         """
         Build metadata for response.
@@ -240,7 +251,8 @@ class UnifiedAggregator:
             "model_used": model_used,
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "batches_processed": batch_count,
-            "languages": language_counts or {"es": total_comments}
+            "languages": language_counts or {"es": total_comments},
+            "sources": source_counts or {}
         }
 
     @staticmethod
@@ -295,7 +307,8 @@ class UnifiedAggregator:
             processing_time=processing_time,
             model_used=model_used,
             language_counts=language_counts,
-            batch_count=1  # Will be updated by caller if needed
+            batch_count=1,  # Will be updated by caller if needed
+            source_counts=aggregator.calculate_source_distribution(comments)
         )
 
         # Build summary
@@ -304,20 +317,7 @@ class UnifiedAggregator:
         # Format rows if needed
         rows = None
         if include_rows and comments:
-            rows = []
-            for comment in comments:
-                row = {
-                    "index": comment.get("index", 0),
-                    "original_text": comment.get("original_text", ""),
-                    "nota": int(comment.get("nota", 5)),
-                    "nps_category": comment.get("nps_category", "passive"),
-                    "sentiment": comment.get("sentiment", "neutral"),
-                    "language": comment.get("language", "es"),
-                    "churn_risk": float(comment.get("churn_risk", 0.5)),
-                    "pain_points": comment.get("pain_points", []),
-                    "emotions": comment.get("emotions", {})
-                }
-                rows.append(row)
+            rows = [aggregator.format_row(comment) for comment in comments]
 
         # Build complete response
         response = {
@@ -325,12 +325,247 @@ class UnifiedAggregator:
             "metadata": metadata,
             "summary": summary,
             "rows": rows,
-            "aggregated_insights": {
-                "top_positive_themes": [],  # Legacy field
-                "top_negative_themes": [],  # Legacy field
-                "recommendations": [],       # Legacy field
-                "segment_analysis": {}       # Legacy field
+            "aggregated_insights": aggregator.legacy_insights()
+        }
+
+        return response
+
+    @staticmethod
+    def format_row(comment: Dict[str, Any]) -> Dict[str, Any]:
+        """Format one analyzed comment as a response row."""
+        return {
+            "index": comment.get("index", 0),
+            "original_text": comment.get("original_text", ""),
+            "nota": int(comment.get("nota", 5)),
+            "nps_category": comment.get("nps_category", "passive"),
+            "sentiment": comment.get("sentiment", "neutral"),
+            "language": comment.get("language", "es"),
+            "churn_risk": float(comment.get("churn_risk", 0.5)),
+            "pain_points": comment.get("pain_points", []),
+            "emotions": comment.get("emotions", {}),
+            "source": comment.get("source", "llm")  # llm, local, local_fallback or default
+        }
+
+    @staticmethod
+    def legacy_insights() -> Dict[str, Any]:
+        """Empty aggregated_insights block kept for the frontend contract."""
+        return {
+            "top_positive_themes": [],  # Legacy field
+            "top_negative_themes": [],  # Legacy field
+            "recommendations": [],       # Legacy field
+            "segment_analysis": {}       # Legacy field
+        }
+
+    # Partial aggregates (sharded processing)
+    # A partial holds only sums and counts, so partials from any number of
+    # shards can be merged and turned into the same summary as a single pass.
+
+    @staticmethod
+    def build_partial(
+        comments: List[Dict[str, Any]],
+        nps_counts: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build a mergeable partial aggregate for a subset of comments.
+
+        Args:
+            comments: Analyzed comments of the subset
+            nps_counts: Promoter/passive/detractor counts from ratings
+                (counted from comment nps_category if None)
+
+        Returns:
+            Partial aggregate (JSON serializable)
+        """
+        emotion_totals = defaultdict(lambda: [0.0, 0])
+        pain_counts = Counter()
+        pain_examples = defaultdict(list)
+        churn_distribution = {"0-0.2": 0, "0.2-0.4": 0, "0.4-0.6": 0, "0.6-0.8": 0, "0.8-1.0": 0}
+        churn_sum = 0.0
+        high_risk = 0
+
+        for comment in comments:
+            for emotion, value in comment.get("emotions", {}).items():
+                if isinstance(value, (int, float)):
+                    emotion_totals[emotion][0] += value
+                    emotion_totals[emotion][1] += 1
+
+            original_text = comment.get("original_text", "")
+            for pain in comment.get("pain_points", []):
+                if pain:
+                    pain_counts[pain] += 1
+                    if len(pain_examples[pain]) < 3 and original_text:
+                        pain_examples[pain].append(original_text[:100])
+
+            risk = comment.get("churn_risk", 0.5)
+            churn_sum += risk
+            if risk > 0.7:
+                high_risk += 1
+            if risk <= 0.2:
+                churn_distribution["0-0.2"] += 1
+            elif risk <= 0.4:
+                churn_distribution["0.2-0.4"] += 1
+            elif risk <= 0.6:
+                churn_distribution["0.4-0.6"] += 1
+            elif risk <= 0.8:
+                churn_distribution["0.6-0.8"] += 1
+            else:
+                churn_distribution["0.8-1.0"] += 1
+
+        if nps_counts is None:
+            nps_counts = {"promoter": 0, "passive": 0, "detractor": 0}
+            for comment in comments:
+                category = comment.get("nps_category", "passive")
+                if category in nps_counts:
+                    nps_counts[category] += 1
+
+        return {
+            "total_comments": len(comments),
+            "emotion_totals": dict(emotion_totals),
+            "pain_counts": dict(pain_counts),
+            "pain_examples": dict(pain_examples),
+            "churn": {
+                "sum": churn_sum,
+                "high_risk": high_risk,
+                "distribution": churn_distribution
+            },
+            "nps_counts": dict(nps_counts),
+            "languages": UnifiedAggregator.calculate_language_distribution(comments),
+            "sources": UnifiedAggregator.calculate_source_distribution(comments)
+        }
+
+    @staticmethod
+    def merge_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge partial aggregates.
+
+        Args:
+            partials: Partials from build_partial, in row order
+
+        Returns:
+            Combined partial aggregate
+        """
+        merged = UnifiedAggregator.build_partial([], {"promoter": 0, "passive": 0, "detractor": 0})
+        emotion_totals = defaultdict(lambda: [0.0, 0])
+        pain_counts = Counter()
+        pain_examples = defaultdict(list)
+        languages = Counter()
+        sources = Counter()
+
+        for partial in partials:
+            merged["total_comments"] += partial["total_comments"]
+
+            for emotion, (total, count) in partial["emotion_totals"].items():
+                emotion_totals[emotion][0] += total
+                emotion_totals[emotion][1] += count
+
+            pain_counts.update(partial["pain_counts"])
+            for pain, examples in partial["pain_examples"].items():
+                pain_examples[pain].extend(examples[:3 - len(pain_examples[pain])])
+
+            merged["churn"]["sum"] += partial["churn"]["sum"]
+            merged["churn"]["high_risk"] += partial["churn"]["high_risk"]
+            for bucket, count in partial["churn"]["distribution"].items():
+                merged["churn"]["distribution"][bucket] += count
+
+            for category, count in partial["nps_counts"].items():
+                merged["nps_counts"][category] = merged["nps_counts"].get(category, 0) + count
+
+            languages.update(partial["languages"])
+            sources.update(partial.get("sources", {}))
+
+        merged["emotion_totals"] = dict(emotion_totals)
+        merged["pain_counts"] = dict(pain_counts)
+        merged["pain_examples"] = dict(pain_examples)
+        merged["languages"] = dict(languages)
+        merged["sources"] = dict(sources)
+        return merged
+
+    @staticmethod
+    def summary_from_partial(partial: Dict[str, Any], top_n: int = 20) -> Dict[str, Any]:
+        """
+        Build the 'summary' field from a (merged) partial aggregate.
+        Same format as format_summary_for_frontend.
+        """
+        total = partial["total_comments"]
+
+        # Emotions
+        averages = {
+            emotion: round(value_sum / count, 3)
+            for emotion, (value_sum, count) in partial["emotion_totals"].items()
+            if count > 0
+        }
+        emotion_data = {
+            "averages": averages,
+            "top_5": sorted(averages.items(), key=lambda x: x[1], reverse=True)[:5],
+            "distribution": {
+                "high": len([e for e in averages.values() if e > 0.7]),
+                "medium": len([e for e in averages.values() if 0.3 <= e <= 0.7]),
+                "low": len([e for e in averages.values() if e < 0.3])
+            }
+        } if total else {"averages": {}, "top_5": [], "distribution": {}}
+
+        # Churn
+        churn = partial["churn"]
+        churn_data = {
+            "average": round(churn["sum"] / total, 3),
+            "high_risk_count": churn["high_risk"],
+            "high_risk_percentage": round(churn["high_risk"] / total * 100, 1),
+            "distribution": churn["distribution"]
+        } if total else {
+            "average": 0.0,
+            "high_risk_count": 0,
+            "high_risk_percentage": 0.0,
+            "distribution": {}
+        }
+
+        # Pain points
+        pain_counter = Counter(partial["pain_counts"])
+        pain_total = sum(pain_counter.values())
+        pain_points = [
+            {
+                "category": category,
+                "count": count,
+                "percentage": round((count / pain_total * 100), 1) if pain_total > 0 else 0,
+                "examples": partial["pain_examples"].get(category, [])
             }
+            for category, count in pain_counter.most_common(top_n)
+        ]
+
+        return {
+            "nps": UnifiedAggregator.nps_metrics_from_counts(partial["nps_counts"]),
+            "churn_risk": churn_data,
+            "pain_points": pain_points,
+            "emotions": emotion_data
         }
 
-        return response
\ No newline at end of file
+    @staticmethod
+    def format_response_from_partial(
+        task_id: str,
+        partial: Dict[str, Any],
+        rows: Optional[List[Dict[str, Any]]],
+        processing_time: float,
+        model_used: str,
+        batch_count: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Format complete response from a merged partial and pre-formatted rows.
+        Same contract as format_complete_response.
+        """
+        aggregator = UnifiedAggregator()
+
+        metadata = aggregator.build_metadata(
+            total_comments=partial["total_comments"],
+            processing_time=processing_time,
+            model_used=model_used,
+            language_counts=partial["languages"],
+            batch_count=batch_count,
+            source_counts=partial.get("sources")
+        )
+
+        return {
+            "task_id": task_id,
+            "metadata": metadata,
+            "summary": aggregator.summary_from_partial(partial),
+            "rows": rows or None,
+            "aggregated_insights": aggregator.legacy_insights()
+        }
\ No newline at end of file
@@ -9,6 +9,7 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 import time
+import psutil
 
 from app.config import settings
 from app.routes import upload, status, results, export, health
@@ -23,7 +24,13 @@ logger = structlog.get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    logger.info("Starting Customer Feedback Analyzer API", version="3.1.0")
+    process = psutil.Process()
+    logger.info(
+        "Starting Customer Feedback Analyzer API",
+        version="3.1.0",
+        startup_seconds=round(time.time() - process.create_time(), 2),
+        rss_mb=round(process.memory_info().rss / 1024 / 1024, 1)
+    )
     yield
     logger.info("Shutting down API")
 
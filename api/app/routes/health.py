@@ -101,14 +101,14 @@ async def debug_celery():
     """
     try:
         # Import here to avoid circular imports
-        from app.workers.tasks import analyze_feedback
-        from app.workers.celery_app import celery_app
+        from app.workers.celery_app import TASK_ANALYZE_FEEDBACK, celery_app
 
         # Test simple task dispatch
         test_task_id = "debug_test_task"
 
-        # Create a simple task
-        task = analyze_feedback.apply_async(
+        # Create a simple task (by name: the API doesn't import the tasks module)
+        task = celery_app.send_task(
+            TASK_ANALYZE_FEEDBACK,
             args=["/tmp/debug_test.csv", {"rows": 1, "test": True}],
             task_id=test_task_id
         )
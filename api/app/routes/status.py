@@ -1,14 +1,16 @@
 """Task status endpoint."""
 
+import asyncio
 import json
 from datetime import datetime
 import structlog
 import redis.exceptions
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query
 
 from app.config import settings
-from app.schemas.status import StatusResponse, StatusError
+from app.schemas.status import RecentTask, RecentTasksResponse, StatusResponse, StatusError
 from app.schemas.base import TaskStatus
+from app.services import registry_service, status_service
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -18,6 +20,44 @@ import redis
 redis_client = redis.from_url(settings.REDIS_URL)
 
 
+@router.get("/", response_model=RecentTasksResponse)
+async def list_recent_tasks(
+    limit: int = Query(20, ge=1, le=100, description="Max tasks to return")
+):
+    """
+    List the most recent tasks that have not expired, newest first.
+
+    Args:
+        limit: Max tasks to return
+
+    Returns:
+        RecentTasksResponse with each task's current status
+    """
+    try:
+        tasks = await asyncio.to_thread(registry_service.list_recent_tasks, limit)
+
+        items = []
+        for task in tasks:
+            created_at = task.get("created_at")
+            items.append(RecentTask(**{
+                **task,
+                "created_at": datetime.utcfromtimestamp(created_at) if created_at else None
+            }))
+
+        return RecentTasksResponse(tasks=items)
+
+    except redis.exceptions.ConnectionError:
+        logger.error("Redis connection failed")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Service unavailable",
+                "details": "Unable to connect to status service",
+                "code": "SERVICE_UNAVAILABLE"
+            }
+        )
+
+
 @router.get("/{task_id}", response_model=StatusResponse)
 async def get_task_status(
     task_id: str = Path(..., description="Task ID from upload endpoint")
@@ -159,6 +199,90 @@ async def get_task_status(
         )
 
 
+@router.delete("/{task_id}", response_model=StatusResponse)
+async def cancel_task(
+    task_id: str = Path(..., description="Task ID from upload endpoint")
+):
+    """
+    Cancel an analysis that is no longer wanted (tab closed, file re-uploaded).
+    Queued batches are revoked and in-flight batches stop before their next
+    OpenAI call, so the capacity goes to live analyses.
+
+    Args:
+        task_id: The task ID returned from upload endpoint
+
+    Returns:
+        StatusResponse with the cancelled status
+
+    Raises:
+        404: If task not found
+        409: If the task already finished
+    """
+    try:
+        status_info = status_service.get_task_status(task_id)
+        if status_info is None and not redis_client.exists(f"file_content:{task_id}"):
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "error": "Task not found",
+                    "details": "The task has expired or does not exist",
+                    "code": "TASK_NOT_FOUND"
+                }
+            )
+
+        status = (status_info or {}).get("status", TaskStatus.QUEUED.value)
+        if status in (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value):
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "error": "Task already finished",
+                    "details": f"The task is {status} and cannot be cancelled",
+                    "code": "TASK_FINISHED"
+                }
+            )
+
+        if status != TaskStatus.CANCELLED.value:
+            # Revoke is a broadcast to the workers; keep it off the event loop
+            await asyncio.to_thread(status_service.cancel_analysis, task_id)
+
+        return StatusResponse(
+            task_id=task_id,
+            status=TaskStatus.CANCELLED,
+            progress=0,
+            current_step="Análisis cancelado"
+        )
+
+    except redis.exceptions.ConnectionError:
+        logger.error("Redis connection failed")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "Service unavailable",
+                "details": "Unable to connect to status service",
+                "code": "SERVICE_UNAVAILABLE"
+            }
+        )
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.error(
+            "Error cancelling task",
+            task_id=task_id,
+            error=str(e),
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Internal error",
+                "details": str(e),
+                "code": "INTERNAL_ERROR"
+            }
+        )
+
+
 def _map_celery_status(celery_status: str) -> TaskStatus:
     """Map Celery status to our TaskStatus enum."""
     status_map = {
@@ -167,6 +291,6 @@ def _map_celery_status(celery_status: str) -> TaskStatus:
         "RETRY": TaskStatus.PROCESSING,
         "SUCCESS": TaskStatus.COMPLETED,
         "FAILURE": TaskStatus.FAILED,
-        "REVOKED": TaskStatus.FAILED,
+        "REVOKED": TaskStatus.CANCELLED,
     }
     return status_map.get(celery_status, TaskStatus.QUEUED)
\ No newline at end of file
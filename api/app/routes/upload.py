@@ -1,5 +1,6 @@
 """File upload endpoint for feedback analysis."""
 
+import asyncio
 import os
 import uuid
 import base64
@@ -7,15 +8,18 @@ import json
 from pathlib import Path
 import structlog
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import Optional
+from fastapi.responses import JSONResponse
+from typing import Optional, Tuple
 import pandas as pd
 import aiofiles
 import redis
 
 from app.config import settings
 from app.schemas.upload import UploadResponse, UploadError, FileInfo, UploadOptions
-from app.workers.tasks import analyze_feedback
+from app.workers.celery_app import TASK_ANALYZE_FEEDBACK, analysis_queue_for, broker_priority, celery_app
 from app.core.unified_file_processor import UnifiedFileProcessor
+from app.services import registry_service, sync_analysis_service
+from app.utils.deadline import DeadlineExceeded
 
 router = APIRouter()
 logger = structlog.get_logger()
@@ -48,36 +52,9 @@ async def upload_file(
     Returns:
         UploadResponse with task_id and estimated time
     """
-    # Validate file extension
-    file_extension = Path(file.filename).suffix.lower()
-    if file_extension not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail={
-                "error": "Invalid file format",
-                "details": f"File must be one of: {', '.join(ALLOWED_EXTENSIONS)}",
-                "code": "INVALID_FILE_FORMAT"
-            }
-        )
-
-    # Check file size
-    file_size = 0
-    content = await file.read()
+    content, file_extension = await read_upload(file)
     file_size = len(content)
 
-    if file_size > settings.file_max_bytes:
-        raise HTTPException(
-            status_code=413,
-            detail={
-                "error": "File too large",
-                "details": f"Maximum file size is {settings.FILE_MAX_MB}MB",
-                "code": "FILE_TOO_LARGE"
-            }
-        )
-
-    # Reset file pointer
-    await file.seek(0)
-
     # Generate unique filename
     task_id = f"t_{uuid.uuid4().hex[:12]}"
     temp_filename = f"{task_id}{file_extension}"
@@ -105,43 +82,7 @@ async def upload_file(
             priority=priority
         )
 
-        # Store file content in Redis for worker access
-        # Files are stored with 4 hour TTL to support retries
-        file_key = f"file_content:{task_id}"
-        file_data = {
-            "content": base64.b64encode(content).decode('utf-8'),
-            "filename": file.filename,
-            "extension": file_extension
-        }
-        redis_client.setex(
-            file_key,
-            14400,  # 4 hour TTL to support retries
-            json.dumps(file_data)
-        )
-
-        logger.info(
-            "File stored in Redis",
-            task_id=task_id,
-            key=file_key,
-            ttl_seconds=3600
-        )
-
-        # Queue analysis task - pass task_id instead of file path
-        task = analyze_feedback.apply_async(
-            args=[task_id, file_info.dict()],
-            task_id=task_id,
-            priority=1 if priority == "high" else 0
-        )
-
-        # Estimate processing time (roughly 1 second per 100 comments)
-        estimated_time = max(10, min(60, file_info.rows // 100))
-
-        return UploadResponse(
-            success=True,
-            task_id=task_id,
-            estimated_time_seconds=estimated_time,
-            file_info=file_info
-        )
+        return queue_analysis(task_id, content, file.filename, file_extension, file_info, priority)
 
     except pd.errors.EmptyDataError:
         # Clean up temp file and Redis
@@ -181,6 +122,225 @@ async def upload_file(
         )
 
 
+@router.post("/sync")
+async def upload_file_sync(
+    file: UploadFile = File(...),
+    language_hint: Optional[str] = Form(None),
+    segment: Optional[str] = Form(None),
+    priority: Optional[str] = Form("normal")
+):
+    """
+    Upload a small feedback file and get the analysis in the same request.
+    Files over SYNC_ANALYSIS_MAX_ROWS, uploads arriving while every inline
+    slot is busy, and inline runs exceeding SYNC_ANALYSIS_TIMEOUT_SECONDS are
+    queued as usual and answered with 202 + UploadResponse. Inline results
+    are stored under their task_id (for /results and /export); metadata.degraded
+    marks results with local-only estimates where the model call failed.
+
+    Args:
+        file: The uploaded file (Excel or CSV)
+        language_hint: Optional language hint (es/en)
+        segment: Optional customer segment
+        priority: Processing priority for the async fallback (normal/high)
+
+    Returns:
+        Complete analysis results (200) or UploadResponse (202)
+    """
+    content, file_extension = await read_upload(file)
+
+    task_id = f"t_{uuid.uuid4().hex[:12]}"
+    temp_path = TEMP_DIR / f"{task_id}{file_extension}"
+
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            await f.write(content)
+
+        file_info = await validate_file_structure(temp_path)
+
+        # Same validation as the async path
+        UploadOptions(language_hint=language_hint, segment=segment, priority=priority)
+
+        future = None
+        if sync_analysis_service.is_eligible(file_info.rows):
+            future = sync_analysis_service.try_submit(
+                str(temp_path), task_id, language_hint, file.filename
+            )
+            reason = "busy"
+        else:
+            reason = "too_large"
+
+        if future is not None:
+            try:
+                results = await asyncio.wrap_future(future)
+            except (TimeoutError, DeadlineExceeded):
+                # Inline run out of time: the worker path has deadlines and retries,
+                # and resumes from the batches checkpointed under the same task_id
+                reason = "timeout"
+            else:
+                logger.info("Sync upload analyzed inline", task_id=task_id, rows=file_info.rows)
+                return results
+
+        logger.info(
+            "Sync upload falling back to async analysis",
+            task_id=task_id,
+            rows=file_info.rows,
+            reason=reason
+        )
+        response = queue_analysis(task_id, content, file.filename, file_extension, file_info, priority)
+        return JSONResponse(status_code=202, content=response.dict())
+
+    except HTTPException:
+        raise
+
+    except pd.errors.EmptyDataError:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Empty file",
+                "details": "The uploaded file contains no data",
+                "code": "EMPTY_FILE"
+            }
+        )
+
+    except Exception as e:
+        logger.error(
+            "Sync upload failed",
+            error=str(e),
+            filename=file.filename,
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Analysis failed",
+                "details": str(e),
+                "code": "SYNC_ANALYSIS_ERROR"
+            }
+        )
+
+    finally:
+        # Inline analysis is done with the file; the async path reads it from Redis
+        if temp_path.exists():
+            os.remove(temp_path)
+
+
+async def read_upload(file: UploadFile) -> Tuple[bytes, str]:
+    """
+    Validate extension and size of an uploaded file and read its content.
+
+    Args:
+        file: The uploaded file
+
+    Returns:
+        Tuple of (content, lowercase extension)
+
+    Raises:
+        HTTPException if the format or size is not accepted
+    """
+    # Validate file extension
+    file_extension = Path(file.filename).suffix.lower()
+    if file_extension not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid file format",
+                "details": f"File must be one of: {', '.join(ALLOWED_EXTENSIONS)}",
+                "code": "INVALID_FILE_FORMAT"
+            }
+        )
+
+    # Check file size
+    content = await file.read()
+
+    if len(content) > settings.file_max_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "error": "File too large",
+                "details": f"Maximum file size is {settings.FILE_MAX_MB}MB",
+                "code": "FILE_TOO_LARGE"
+            }
+        )
+
+    # Reset file pointer
+    await file.seek(0)
+
+    return content, file_extension
+
+
+def queue_analysis(
+    task_id: str,
+    content: bytes,
+    filename: str,
+    file_extension: str,
+    file_info: FileInfo,
+    priority: Optional[str] = "normal"
+) -> UploadResponse:
+    """
+    Store the file in Redis and queue the analysis task.
+
+    Args:
+        task_id: Task identifier (also the Celery task ID)
+        content: Raw file content
+        filename: Original filename
+        file_extension: Lowercase file extension
+        file_info: Validated file information
+        priority: Processing priority (normal/high)
+
+    Returns:
+        UploadResponse with task_id and estimated time
+    """
+    # Store file content in Redis for worker access
+    # Files are stored with 4 hour TTL to support retries
+    file_key = f"file_content:{task_id}"
+    file_data = {
+        "content": base64.b64encode(content).decode('utf-8'),
+        "filename": filename,
+        "extension": file_extension
+    }
+    redis_client.setex(
+        file_key,
+        14400,  # 4 hour TTL to support retries
+        json.dumps(file_data)
+    )
+
+    logger.info(
+        "File stored in Redis",
+        task_id=task_id,
+        key=file_key,
+        ttl_seconds=3600
+    )
+
+    # Index the task for cleanup and the recent tasks listing
+    registry_service.register_task(task_id, {
+        "filename": filename,
+        "rows": file_info.rows,
+        "priority": priority or "normal"
+    })
+
+    # Queue analysis task - pass task_id instead of file path
+    # Large files go to their own lane so they don't delay small uploads
+    # By name, so the API never imports the analysis pipeline
+    celery_app.send_task(
+        TASK_ANALYZE_FEEDBACK,
+        args=[task_id, file_info.dict()],
+        kwargs={"priority": priority or "normal"},
+        task_id=task_id,
+        queue=analysis_queue_for(file_info.rows, priority),
+        priority=broker_priority(priority)
+    )
+
+    # Estimate processing time (roughly 1 second per 100 comments)
+    estimated_time = max(10, min(60, file_info.rows // 100))
+
+    return UploadResponse(
+        success=True,
+        task_id=task_id,
+        estimated_time_seconds=estimated_time,
+        file_info=file_info
+    )
+
+
 async def validate_file_structure(file_path: Path) -> FileInfo:
     """
     Validate the structure of uploaded file using unified processor.
@@ -28,6 +28,9 @@ class CommentAnalysis(BaseModel):
     pain_points: List[str] = Field(max_items=5, description="Extracted pain points")
     sentiment: SentimentCategory
     language: Language
+    source: Optional[str] = Field(
+        default=None, description="Origin of churn/pain results: llm, local, local_fallback or default"
+    )
 
 
 class SegmentProfile(BaseModel):
@@ -67,6 +67,21 @@ class StatusResponse(BaseModel):
         }
 
 
+class RecentTask(BaseModel):
+    """Entry of the recent tasks listing."""
+    task_id: str
+    status: TaskStatus
+    progress: int = Field(default=0, ge=0, le=100)
+    filename: Optional[str] = None
+    rows: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class RecentTasksResponse(BaseModel):
+    """Recent tasks listing, newest first."""
+    tasks: List[RecentTask]
+
+
 class StatusError(BaseModel):
     """Status error response."""
     error: str
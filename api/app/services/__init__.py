@@ -1,17 +1,26 @@
 """
 Services module for business logic.
+Submodules are imported on first access, so the API process only loads the
+services it uses (not the analysis pipeline and its ML dependencies).
 """
 
-from app.services import (
-    analysis_service,
-    status_service,
-    storage_service
-)
-from app.core.unified_aggregation import UnifiedAggregator
+import importlib
 
 __all__ = [
     'analysis_service',
+    'deadline_service',
+    'inflight_service',
+    'registry_service',
     'status_service',
     'storage_service',
     'UnifiedAggregator'
 ]
+
+
+def __getattr__(name):
+    if name == 'UnifiedAggregator':
+        from app.core.unified_aggregation import UnifiedAggregator
+        return UnifiedAggregator
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
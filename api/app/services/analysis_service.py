@@ -3,16 +3,26 @@ Analysis orchestration service.
 Coordinates the feedback analysis workflow.
 """
 
+import asyncio
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import pandas as pd
 import structlog
 
 from app.core.unified_file_processor import UnifiedFileProcessor
 from app.core.unified_aggregation import UnifiedAggregator
+from app.services import inflight_service
 from app.services.efficient_deduplication import EfficientDeduplicationService
+from app.adapters.openai.model_cascade import merge_stats, summarize
+from app.adapters.openai.utils import optimize_batch_size
+from app.schemas.base import Language
+from app.utils.memory_monitor import MemoryMonitor
+from app.utils.cancellation import TaskCancelled
+from app.utils.deadline import DeadlineExceeded, capped_timeout, is_expired
+from app.utils.event_loop_manager import run_async
+from app.utils.request_context import AnalysisContext, run_in_context
 from app.config import settings
 
 logger = structlog.get_logger()
@@ -138,7 +148,8 @@ def merge_batch_results(
         model_used: AI model used for analysis
 
     Returns:
-        Final merged results dictionary
+        Final merged results dictionary; metadata counts results by source
+        and flags runs with failed (local-only) batches as degraded
     """
     logger.info("Merging batch results", task_id=task_id, batch_count=len(batch_results))
 
@@ -205,6 +216,22 @@ def merge_batch_results(
     # Update batch count in metadata
     results["metadata"]["batches_processed"] = len(batch_results)
 
+    # Where the analyzed comments' results came from; failed batches mean
+    # some results are local estimates the model never confirmed
+    sources: Dict[str, int] = {}
+    for batch_result in batch_results:
+        default = "local_fallback" if batch_result.get("failed") else "llm"
+        for comment in batch_result.get("comments", []):
+            source = comment.get("source", default)
+            sources[source] = sources.get(source, 0) + 1
+    results["metadata"]["sources"] = sources
+    results["metadata"]["degraded"] = any(r.get("failed") for r in batch_results)
+
+    cascade = summarize(merge_stats([r.get("cascade") for r in batch_results]))
+    if cascade:
+        results["metadata"]["model_cascade"] = cascade
+        logger.info("Model cascade summary", task_id=task_id, **cascade)
+
     logger.info(
         "Results merged successfully",
         task_id=task_id,
@@ -304,5 +331,481 @@ def create_default_result(index: int) -> Dict[str, Any]:
         'sentiment_score': 0.0,
         'language': 'es',
         'nps_category': 'passive',
-        'is_trivial': True
-    }
\ No newline at end of file
+        'is_trivial': True,
+        'source': 'default'
+    }
+
+
+def create_batches(comments: List[str]) -> List[List[str]]:
+    """
+    Split comments into analysis batches.
+
+    Args:
+        comments: Deduplicated comments
+
+    Returns:
+        List of comment batches
+    """
+    # Dynamic batch sizing based on memory
+    if settings.DYNAMIC_BATCH_SIZING:
+        batch_size = MemoryMonitor.calculate_safe_batch_size(
+            len(comments),
+            settings.BATCH_SIZE_OPTIMAL
+        )
+        logger.info(f"Dynamic batch size: {batch_size} (memory-aware)")
+        return [comments[i:i+batch_size] for i in range(0, len(comments), batch_size)]
+
+    return optimize_batch_size(comments)
+
+
+def create_fallback_batch_result(comments: List[str]) -> Dict[str, Any]:
+    """
+    Placeholder results for a batch whose analysis failed.
+
+    Args:
+        comments: Comments of the batch
+
+    Returns:
+        Batch result flagged as failed, one entry per comment
+    """
+    return create_fallback_batch_results([comments])[0]
+
+
+def create_fallback_batch_results(batches: List[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Placeholder results for several failed batches, scored locally together
+    (in a process pool when there are many comments, see local_pool).
+
+    Args:
+        batches: Comments of each batch
+
+    Returns:
+        One batch result per batch, flagged as failed
+    """
+    from app.workers.worker_resources import get_hybrid_analyzer
+
+    if settings.HYBRID_ANALYSIS_ENABLED:
+        try:
+            from app.adapters.local_pool import score_comments
+
+            hybrid = get_hybrid_analyzer()
+            scores = score_comments([comment for comments in batches for comment in comments])
+
+            results = []
+            start = 0
+            for comments in batches:
+                stop = start + len(comments)
+                results.append({
+                    "comments": hybrid.local_only_results(scores.slice(start, stop)),
+                    "failed": True
+                })
+                start = stop
+            return results
+        except Exception as e:
+            logger.warning("Local fallback failed", error=str(e))
+
+    return [
+        {
+            "comments": [create_default_result(i) for i in range(len(comments))],
+            "failed": True
+        }
+        for comments in batches
+    ]
+
+
+async def analyze_batches_concurrently(
+    batches: List[List[str]],
+    indices: List[int],
+    language_hint: Optional[str] = None,
+    on_batch_done: Optional[Callable[[int, Dict[str, Any], bool], Awaitable[None]]] = None,
+    batch_ratings: Optional[List[List[int]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Analyze batches concurrently on the current event loop, bounded by what
+    the OpenAI rate limiters admit per second.
+
+    Args:
+        batches: All comment batches
+        indices: Indices of the batches to analyze
+        language_hint: Optional language hint
+        on_batch_done: Optional coroutine called with (index, result, failed)
+        batch_ratings: Optional ratings of every batch (for cascade routing)
+
+    Returns:
+        Batch results in the order of `indices`
+    """
+    from app.workers.worker_resources import get_openai_analyzer
+
+    analyzer = get_openai_analyzer()
+
+    # No point in more concurrent batches than the rate limiters admit per second
+    limit = min(
+        settings.ASYNC_BATCH_CONCURRENCY,
+        settings.MAX_RPS * len(analyzer.client_pool.members)
+    )
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run_one(idx: int) -> Dict[str, Any]:
+        comments = batches[idx]
+        async with semaphore:
+            try:
+                result = await analyze_batch_coalesced(
+                    comments, idx, language_hint,
+                    ratings=batch_ratings[idx] if batch_ratings else None
+                )
+                failed = bool(result.get("failed"))
+            except (DeadlineExceeded, TaskCancelled):
+                # Not a batch failure: the caller finalizes or stops the analysis
+                raise
+            except Exception as e:
+                logger.error("Batch analysis failed", batch_index=idx, error=str(e))
+                result = await asyncio.to_thread(create_fallback_batch_result, comments)
+                failed = True
+
+        if on_batch_done is not None:
+            await on_batch_done(idx, result, failed)
+        return result
+
+    runs = [asyncio.ensure_future(run_one(idx)) for idx in indices]
+    try:
+        return await asyncio.gather(*runs)
+    except BaseException:
+        # gather leaves the other batches running when one raises
+        for run in runs:
+            run.cancel()
+        raise
+
+
+async def analyze_batch_async(
+    comments: List[str],
+    batch_index: int,
+    language_hint: Optional[str] = None,
+    ratings: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Analyze one batch with the configured analyzer (hybrid or OpenAI-only).
+
+    Args:
+        comments: Comments of the batch
+        batch_index: Index of the batch (for logging)
+        language_hint: Optional language hint
+        ratings: Optional ratings of the comments (hybrid cascade routing)
+
+    Returns:
+        Batch result with one entry per comment under 'comments'
+    """
+    from app.workers.worker_resources import get_hybrid_analyzer, get_openai_analyzer
+
+    if settings.HYBRID_ANALYSIS_ENABLED:
+        return await get_hybrid_analyzer().analyze_batch_async(
+            comments, batch_index, language_hint or "es", ratings
+        )
+
+    lang_hint = Language(language_hint) if language_hint else None
+    return await get_openai_analyzer().analyze_batch(comments, batch_index, lang_hint)
+
+
+async def analyze_batch_coalesced(
+    comments: List[str],
+    batch_index: int,
+    language_hint: Optional[str] = None,
+    ratings: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Analyze one batch, sharing work with concurrent analyses.
+    Cached comments are reused; of the rest, this batch sends to OpenAI only
+    those no other analysis has in flight, and waits for the others' results.
+    Comments whose leader fails or dies (or kept a rating-dependent local
+    result) are analyzed here after all.
+
+    Args:
+        comments: Comments of the batch
+        batch_index: Index of the batch (for logging)
+        language_hint: Optional language hint
+        ratings: Optional ratings of the comments (hybrid cascade routing)
+
+    Returns:
+        Batch result with one entry per comment under 'comments'
+    """
+    if not inflight_service.is_enabled():
+        return await analyze_batch_async(comments, batch_index, language_hint, ratings)
+
+    language = language_hint or 'es'
+    owner = inflight_service.new_owner()
+
+    cached, uncached = await asyncio.to_thread(inflight_service.cache.get_many, comments, language)
+    claims = await asyncio.to_thread(
+        inflight_service.claim, [comments[i] for i in uncached], language, owner
+    )
+    led = [idx for idx, claimed in zip(uncached, claims) if claimed]
+    followed = [idx for idx, claimed in zip(uncached, claims) if not claimed]
+
+    # Model cascade stats of the analyses run here
+    cascade_runs: List[Optional[Dict[str, float]]] = []
+
+    async def analyze_indices(indices: List[int]) -> Tuple[Dict[int, Dict[str, Any]], bool]:
+        """Analyze comments by index and publish the results to the cache."""
+        if not indices:
+            return {}, False
+        subset = [comments[i] for i in indices]
+        subset_ratings = [ratings[i] for i in indices] if ratings else None
+        batch_result = await analyze_batch_async(subset, batch_index, language_hint, subset_ratings)
+        cascade_runs.append(batch_result.get("cascade"))
+        results = batch_comment_results(batch_result, len(subset))
+        failed = bool(batch_result.get("failed"))
+        if not failed:
+            await asyncio.to_thread(inflight_service.cache.set_many, shareable_results(subset, results), language)
+        return dict(zip(indices, results)), failed
+
+    async def lead() -> Tuple[Dict[int, Dict[str, Any]], bool]:
+        try:
+            return await analyze_indices(led)
+        finally:
+            await asyncio.to_thread(
+                inflight_service.release, [comments[i] for i in led], language, owner
+            )
+
+    async def follow() -> Tuple[Dict[int, Dict[str, Any]], bool]:
+        results: Dict[int, Dict[str, Any]] = {}
+        orphaned: List[int] = []
+        waiting = list(followed)
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + (capped_timeout(settings.INFLIGHT_WAIT_SECONDS) or 0)
+
+        while waiting:
+            found, lost = await asyncio.to_thread(
+                inflight_service.poll, [comments[i] for i in waiting], language
+            )
+            results.update((waiting[j], result) for j, result in found.items())
+            orphaned.extend(waiting[j] for j in lost)
+            waiting = [idx for idx in waiting if idx not in results and idx not in orphaned]
+
+            if waiting and loop.time() >= give_up_at:
+                logger.warning(
+                    "Gave up waiting for in-flight comments",
+                    batch_index=batch_index,
+                    waiting=len(waiting)
+                )
+                orphaned.extend(waiting)
+                break
+            if waiting:
+                await asyncio.sleep(settings.INFLIGHT_POLL_SECONDS)
+
+        own_results, failed = await analyze_indices(orphaned)
+        results.update(own_results)
+        return results, failed
+
+    # Lead and follow concurrently: a leader never waits on others before
+    # finishing its own comments, so two analyses cannot deadlock
+    follower = asyncio.ensure_future(follow())
+    try:
+        led_results, led_failed = await lead()
+    except BaseException:
+        follower.cancel()
+        raise
+    followed_results, followed_failed = await follower
+
+    if followed or cached:
+        logger.info(
+            "Batch coalesced with other analyses",
+            batch_index=batch_index,
+            cached=len(cached),
+            led=len(led),
+            followed=len(followed)
+        )
+
+    merged = {**cached, **followed_results, **led_results}
+    batch_result: Dict[str, Any] = {
+        "comments": [
+            {**merged.get(i, create_default_result(i)), "index": i}
+            for i in range(len(comments))
+        ]
+    }
+    if led_failed or followed_failed:
+        batch_result["failed"] = True
+    cascade = merge_stats(cascade_runs)
+    if cascade:
+        batch_result["cascade"] = cascade
+    return batch_result
+
+
+def shareable_results(comments: List[str], results: List[Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    (comment, result) pairs that may be cached for other analyses.
+    Only real LLM answers are shared: results kept local by the cascade router
+    depend on the comment's rating, not only on its text, and local fallbacks
+    or defaults would hide a failed request for CACHE_TTL_DAYS.
+
+    Args:
+        comments: Analyzed comments
+        results: Their results, in the same order
+
+    Returns:
+        Pairs to cache
+    """
+    return [
+        (comment, result)
+        for comment, result in zip(comments, results)
+        if result.get("source", "llm") == "llm"
+    ]
+
+
+def split_batch_ratings(ratings: List[int], batches: List[List[str]]) -> List[List[int]]:
+    """
+    Split ratings aligned with the batched comments into per-batch lists.
+
+    Args:
+        ratings: One rating per comment, in batch order (may be empty)
+        batches: Comment batches
+
+    Returns:
+        Ratings of every batch (empty lists when ratings are missing)
+    """
+    if len(ratings) != sum(len(batch) for batch in batches):
+        return [[] for _ in batches]
+
+    split, start = [], 0
+    for batch in batches:
+        split.append(list(ratings[start:start + len(batch)]))
+        start += len(batch)
+    return split
+
+
+def batch_comment_results(batch_result: Dict[str, Any], size: int) -> List[Dict[str, Any]]:
+    """
+    Per-comment results of a batch, padded with defaults so indices stay aligned.
+
+    Args:
+        batch_result: Result returned by an analyzer
+        size: Number of comments in the batch
+
+    Returns:
+        Exactly `size` results
+    """
+    results = batch_result.get("comments", [])[:size]
+    return results + [create_default_result(i) for i in range(len(results), size)]
+
+
+def analyze_row_shard(
+    comments: List[str],
+    ratings: List[int],
+    language_hint: Optional[str],
+    row_offset: int,
+    cache_manager: Optional[Any] = None,
+    context: Optional[AnalysisContext] = None
+) -> Dict[str, Any]:
+    """
+    Analyze one row shard of a large file end to end: dedup, cache lookup,
+    concurrent batch analysis and a mergeable partial aggregate.
+    Batches unfinished at the analysis deadline get local-only results.
+
+    Args:
+        comments: Comments of the shard rows
+        ratings: Ratings of the shard rows
+        language_hint: Optional language hint
+        row_offset: Index of the shard's first row in the whole file
+        cache_manager: Optional CommentCacheManager for cross-file reuse
+        context: Analysis the shard belongs to (fair OpenAI scheduling, deadline)
+
+    Returns:
+        Dict with 'rows' (formatted, global indices), 'partial' and 'stats'
+    """
+    df = pd.DataFrame({'Comentario Final': comments, 'Nota': ratings})
+    unique_comments, unique_ratings, _, dedup_info = prepare_analysis_data(df)
+    language = language_hint or 'es'
+
+    # Cache lookup: only comments never analyzed before go to the model
+    if cache_manager is not None:
+        cached, uncached = cache_manager.get_many(unique_comments, language)
+    else:
+        cached, uncached = {}, list(range(len(unique_comments)))
+
+    to_analyze = [unique_comments[i] for i in uncached]
+    batches = create_batches(to_analyze)
+    batch_ratings = split_batch_ratings(
+        [unique_ratings[i] for i in uncached] if unique_ratings else [], batches
+    )
+    deadline = context.deadline if context else None
+    finished: Dict[int, Dict[str, Any]] = {}
+
+    async def on_batch_done(idx: int, result: Dict[str, Any], failed: bool) -> None:
+        finished[idx] = result
+
+    deadline_expired = is_expired(deadline)
+    if batches and not deadline_expired:
+        try:
+            run_async(
+                run_in_context(
+                    analyze_batches_concurrently(
+                        batches, list(range(len(batches))), language_hint,
+                        on_batch_done=on_batch_done, batch_ratings=batch_ratings
+                    ),
+                    context
+                ),
+                timeout=capped_timeout(settings.INLINE_FANOUT_TIMEOUT_SECONDS, deadline)
+            )
+        except (TimeoutError, DeadlineExceeded):
+            deadline_expired = True
+            logger.warning(
+                "Shard analysis reached its deadline",
+                row_offset=row_offset,
+                finished_batches=len(finished),
+                batches=len(batches)
+            )
+
+    # Out of time: local-only results for the rest (not cached, see shareable_results)
+    unfinished = [idx for idx in range(len(batches)) if idx not in finished]
+    if unfinished:
+        fallback = create_fallback_batch_results([batches[idx] for idx in unfinished])
+        finished.update(zip(unfinished, fallback))
+    batch_results = [finished[idx] for idx in range(len(batches))]
+
+    new_results = []
+    cacheable = []
+    for batch, batch_result in zip(batches, batch_results):
+        # Keep one result per comment so indices stay aligned
+        results = batch_comment_results(batch_result, len(batch))
+        new_results.extend(results)
+        if not batch_result.get("failed"):
+            cacheable.extend(shareable_results(batch, results))
+
+    if cache_manager is not None and cacheable:
+        cache_manager.set_many(cacheable, language)
+
+    # Back to unique-comment order
+    api_results: List[Dict[str, Any]] = [None] * len(unique_comments)
+    for idx, result in cached.items():
+        api_results[idx] = result
+    for idx, result in zip(uncached, new_results):
+        api_results[idx] = result
+    api_results = [
+        r if r is not None else create_default_result(i) for i, r in enumerate(api_results)
+    ]
+
+    expanded = expand_results_with_duplicates(
+        api_results,
+        dedup_info['all_comments'],
+        dedup_info['filtered_indices'],
+        dedup_info['duplicate_map'],
+        dedup_info.get('all_ratings', [])
+    )
+    for comment in expanded:
+        comment['index'] += row_offset
+
+    nps_counts = {"promoter": 0, "passive": 0, "detractor": 0}
+    for rating in ratings:
+        nps_counts[calculate_nps_category(rating)] += 1
+
+    return {
+        "rows": [UnifiedAggregator.format_row(c) for c in expanded],
+        "partial": UnifiedAggregator.build_partial(expanded, nps_counts),
+        "stats": {
+            "rows": len(comments),
+            "unique": len(unique_comments),
+            "cache_hits": len(cached),
+            "batches": len(batches),
+            "failed_batches": sum(1 for r in batch_results if r.get("failed")),
+            "deadline_expired": deadline_expired,
+            "cascade": merge_stats([r.get("cascade") for r in batch_results])
+        }
+    }
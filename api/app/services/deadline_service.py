@@ -0,0 +1,88 @@
+"""
+Adaptive analysis deadlines.
+Estimates how long an analysis should take from its unique-comment count and
+the model throughput observed on recent analyses. Fixed overhead (loading,
+dedup, merge) is DEADLINE_BASE_SECONDS; only the model phase is measured.
+"""
+
+import time
+from typing import Optional
+import redis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Redis client instance
+redis_client = redis.from_url(settings.REDIS_URL)
+
+THROUGHPUT_KEY = "analysis_llm_throughput_cps"
+
+
+def get_throughput() -> float:
+    """
+    Get the observed model throughput.
+
+    Returns:
+        LLM-routed comments per second (EWMA), or the configured default
+    """
+    try:
+        value = redis_client.get(THROUGHPUT_KEY)
+        if value:
+            return max(float(value), 0.1)
+    except Exception as e:
+        logger.warning("Failed to read analysis throughput", error=str(e))
+    return settings.DEADLINE_DEFAULT_THROUGHPUT_CPS
+
+
+def record_throughput(llm_comments: int, duration_seconds: float) -> None:
+    """
+    Fold the model phase of an on-time analysis into the throughput EWMA.
+    Cache hits and locally routed comments are not counted, so they don't
+    inflate the estimate used for the next deadlines.
+
+    Args:
+        llm_comments: Comments answered by the model
+        duration_seconds: Duration of the model phase (batch dispatch to finalization)
+    """
+    if llm_comments <= 0 or duration_seconds <= 0:
+        return
+
+    observed = llm_comments / duration_seconds
+    alpha = settings.DEADLINE_THROUGHPUT_ALPHA
+
+    try:
+        current = redis_client.get(THROUGHPUT_KEY)
+        updated = observed if not current else alpha * observed + (1 - alpha) * float(current)
+        redis_client.set(THROUGHPUT_KEY, round(updated, 3))
+    except Exception as e:
+        logger.warning("Failed to record analysis throughput", error=str(e))
+
+
+def compute_deadline(unique_comments: int, start_time: Optional[float] = None) -> float:
+    """
+    Compute the absolute deadline of an analysis.
+
+    Args:
+        unique_comments: Unique comments to analyze
+        start_time: Analysis start (now if None)
+
+    Returns:
+        Deadline as epoch seconds
+    """
+    throughput = get_throughput()
+    budget = (
+        settings.DEADLINE_BASE_SECONDS
+        + settings.DEADLINE_SAFETY_FACTOR * unique_comments / throughput
+    )
+    budget = max(settings.DEADLINE_MIN_SECONDS, min(settings.DEADLINE_MAX_SECONDS, budget))
+
+    logger.info(
+        "Analysis deadline computed",
+        unique_comments=unique_comments,
+        throughput_cps=round(throughput, 2),
+        budget_seconds=round(budget, 1)
+    )
+
+    return (start_time or time.time()) + budget
@@ -0,0 +1,142 @@
+"""
+In-flight comment coalescing (singleflight).
+When concurrent analyses contain the same comment, only the first one sends
+it to OpenAI: it claims the comment's fingerprint in Redis, and the others
+wait for its result to show up in the comment cache. Claims are leases, so
+a dead leader only delays its followers until the lease expires.
+"""
+
+import json
+import uuid
+from typing import Any, Dict, List, Tuple
+import redis
+import structlog
+
+from app.config import settings
+from app.core.cache_manager import CommentCacheManager
+
+logger = structlog.get_logger()
+
+# Redis client instance
+redis_client = redis.from_url(settings.REDIS_URL)
+
+# Leaders publish their results through the comment cache
+cache = CommentCacheManager(redis_client)
+
+INFLIGHT_NAMESPACE = "analysis:inflight"
+
+# Delete the claims still owned by ARGV[1] (a lease may have passed to someone else)
+_RELEASE_SCRIPT = redis_client.register_script("""
+local released = 0
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('DEL', key)
+        released = released + 1
+    end
+end
+return released
+""")
+
+
+def is_enabled() -> bool:
+    """Check if coalescing is on (it needs the comment cache to hand over results)."""
+    return settings.INFLIGHT_COALESCING_ENABLED and settings.ENABLE_COMMENT_CACHE
+
+
+def new_owner() -> str:
+    """Generate an owner token for a set of claims."""
+    return uuid.uuid4().hex
+
+
+def _inflight_key(comment: str, language: str) -> str:
+    """Redis key marking a comment as being analyzed."""
+    return f"{INFLIGHT_NAMESPACE}:{CommentCacheManager.fingerprint(comment, language)}"
+
+
+def claim(comments: List[str], language: str, owner: str) -> List[bool]:
+    """
+    Claim comments for analysis.
+
+    Args:
+        comments: Comments to claim
+        language: Language code
+        owner: Owner token of the caller
+
+    Returns:
+        One flag per comment: True if the caller leads it, False if another
+        analysis already has it in flight
+    """
+    if not comments:
+        return []
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for comment in comments:
+            pipe.set(
+                _inflight_key(comment, language), owner,
+                nx=True, ex=settings.INFLIGHT_LEASE_SECONDS
+            )
+        return [bool(claimed) for claimed in pipe.execute()]
+
+    except redis.RedisError as e:
+        # Without Redis every caller leads its own comments, as before
+        logger.warning("In-flight claim failed", error=str(e))
+        return [True] * len(comments)
+
+
+def release(comments: List[str], language: str, owner: str) -> None:
+    """
+    Release the caller's claims (after its results were cached, or on failure).
+
+    Args:
+        comments: Claimed comments
+        language: Language code
+        owner: Owner token used to claim them
+    """
+    if not comments:
+        return
+
+    try:
+        _RELEASE_SCRIPT(keys=[_inflight_key(comment, language) for comment in comments], args=[owner])
+    except redis.RedisError as e:
+        logger.warning("In-flight release failed, claims will expire", error=str(e))
+
+
+def poll(comments: List[str], language: str) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+    """
+    Check on comments led by other analyses.
+
+    Args:
+        comments: Followed comments
+        language: Language code
+
+    Returns:
+        Tuple of (results by index, indices orphaned: neither cached nor in
+        flight any more, i.e. the leader failed or died)
+    """
+    if not comments:
+        return {}, []
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.mget([cache.get_cache_key(comment, language) for comment in comments])
+        pipe.mget([_inflight_key(comment, language) for comment in comments])
+        cached_values, owners = pipe.execute()
+
+    except redis.RedisError as e:
+        logger.warning("In-flight poll failed", error=str(e))
+        return {}, list(range(len(comments)))
+
+    results = {}
+    orphaned = []
+    for idx, (cached_value, owner) in enumerate(zip(cached_values, owners)):
+        if cached_value:
+            try:
+                results[idx] = json.loads(cached_value)
+                continue
+            except json.JSONDecodeError:
+                pass
+        if owner is None:
+            orphaned.append(idx)
+
+    return results, orphaned
@@ -0,0 +1,194 @@
+"""
+Task registry.
+Indexes analysis tasks in sorted sets scored by expiry and by creation time,
+so cleanup and "recent tasks" listings touch only the tasks involved instead
+of scanning every key in Redis (which also serves as the Celery broker).
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+import redis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Redis client instance
+redis_client = redis.from_url(settings.REDIS_URL)
+
+REGISTRY_KEY = "task_registry"                  # ZSET task_id -> expiry (epoch seconds)
+REGISTRY_CREATED_KEY = "task_registry:created"  # ZSET task_id -> creation (epoch seconds)
+REGISTRY_INFO_KEY = "task_registry:info"        # HASH task_id -> JSON (filename, rows, created_at)
+
+# Per-task keys removed together with the registry entry
+TASK_KEY_PATTERNS = [
+    "file_content:{}",
+    "task_status:{}",
+    "task_results:{}",
+    "batch_ckpt:{}",
+    "task_context:{}",
+    "batch_progress:{}",
+    "task_shard:{}",
+    "task_subtasks:{}",
+    "task_finalizing:{}",
+    "task_cancelled:{}",
+    "celery-task-meta-{}",
+]
+
+# Per-shard keys of sharded analyses (task_id, shard index)
+SHARD_KEY_PATTERNS = [
+    "task_rows:{}:{}",
+    "task_shard_result:{}:{}",
+]
+
+
+def task_keys(task_id: str, shard_count: int = 0) -> List[str]:
+    """
+    Redis keys belonging to a task.
+
+    Args:
+        task_id: Task identifier
+        shard_count: Row shards of a sharded analysis (0 otherwise)
+
+    Returns:
+        Key names (some may not exist)
+    """
+    keys = [pattern.format(task_id) for pattern in TASK_KEY_PATTERNS]
+    for shard_index in range(shard_count):
+        keys.extend(pattern.format(task_id, shard_index) for pattern in SHARD_KEY_PATTERNS)
+    return keys
+
+
+def _shard_counts(task_ids: List[str]) -> List[int]:
+    """
+    Shard count of each task, from its task context. Shard keys share the
+    context's TTL, so a task without a context has none left.
+    """
+    contexts = redis_client.mget([f"task_context:{task_id}" for task_id in task_ids])
+    counts = []
+    for context in contexts:
+        try:
+            counts.append(int(json.loads(context).get("shard_count", 0)) if context else 0)
+        except (ValueError, TypeError, AttributeError):
+            counts.append(0)
+    return counts
+
+
+def register_task(task_id: str, info: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Add a task to the registry.
+
+    Args:
+        task_id: Task identifier
+        info: Small descriptive fields shown in listings (filename, rows...)
+    """
+    now = time.time()
+    entry = {"created_at": now, **(info or {})}
+
+    try:
+        pipe = redis_client.pipeline()
+        pipe.zadd(REGISTRY_KEY, {task_id: now + settings.RESULTS_TTL_SECONDS})
+        pipe.zadd(REGISTRY_CREATED_KEY, {task_id: now})
+        pipe.hset(REGISTRY_INFO_KEY, task_id, json.dumps(entry, default=str))
+        pipe.execute()
+    except Exception as e:
+        # Keys still expire by TTL; only listing and early cleanup are affected
+        logger.warning("Failed to register task", task_id=task_id, error=str(e))
+
+
+def touch_task(task_id: str) -> None:
+    """
+    Push a task's expiry out to RESULTS_TTL_SECONDS from now (never earlier).
+
+    Args:
+        task_id: Task identifier
+    """
+    try:
+        redis_client.zadd(REGISTRY_KEY, {task_id: time.time() + settings.RESULTS_TTL_SECONDS}, gt=True)
+    except Exception as e:
+        logger.warning("Failed to refresh task expiry", task_id=task_id, error=str(e))
+
+
+def list_recent_tasks(limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    List the most recent live tasks with their current status.
+
+    Args:
+        limit: Max tasks to return
+
+    Returns:
+        Newest (by creation) first: task_id, status, progress, plus the registered info
+    """
+    # Expired tasks stay indexed until the next purge; skip them page by page
+    task_ids: List[str] = []
+    now = time.time()
+    offset = 0
+    while len(task_ids) < limit:
+        page = redis_client.zrevrange(REGISTRY_CREATED_KEY, offset, offset + limit - 1)
+        if not page:
+            break
+        expiries = redis_client.zmscore(REGISTRY_KEY, page)
+        task_ids.extend(
+            task_id.decode() for task_id, expiry in zip(page, expiries)
+            if expiry is not None and expiry > now
+        )
+        offset += len(page)
+    task_ids = task_ids[:limit]
+    if not task_ids:
+        return []
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hmget(REGISTRY_INFO_KEY, task_ids)
+    pipe.mget([f"task_status:{task_id}" for task_id in task_ids])
+    infos, statuses = pipe.execute()
+
+    tasks = []
+    for task_id, info, status in zip(task_ids, infos, statuses):
+        entry = {"task_id": task_id, **(json.loads(info) if info else {})}
+        status_data = json.loads(status) if status else {}
+        entry["status"] = status_data.get("status", "queued")
+        entry["progress"] = status_data.get("progress", 0)
+        tasks.append(entry)
+
+    return tasks
+
+
+def purge_expired_tasks(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Delete expired tasks and their keys, in pipelined batches.
+
+    Args:
+        batch_size: Tasks removed per round trip
+
+    Returns:
+        Stats: tasks purged, keys deleted
+    """
+    batch_size = batch_size or settings.REGISTRY_CLEANUP_BATCH_SIZE
+    stats = {"purged": 0, "keys_deleted": 0}
+
+    while True:
+        expired = redis_client.zrangebyscore(
+            REGISTRY_KEY, "-inf", time.time(), start=0, num=batch_size
+        )
+        if not expired:
+            break
+
+        task_ids = [task_id.decode() for task_id in expired]
+        shard_counts = _shard_counts(task_ids)
+        pipe = redis_client.pipeline()
+        for task_id, shard_count in zip(task_ids, shard_counts):
+            pipe.delete(*task_keys(task_id, shard_count))
+        pipe.zrem(REGISTRY_KEY, *task_ids)
+        pipe.zrem(REGISTRY_CREATED_KEY, *task_ids)
+        pipe.hdel(REGISTRY_INFO_KEY, *task_ids)
+        results = pipe.execute()
+
+        stats["purged"] += len(task_ids)
+        stats["keys_deleted"] += sum(results[:len(task_ids)])
+
+        if len(task_ids) < batch_size:
+            break
+
+    return stats
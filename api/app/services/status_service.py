@@ -5,12 +5,13 @@ Handles task status updates and retrieval.
 
 import json
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import redis
 import structlog
 
 from app.schemas.base import TaskStatus
 from app.config import settings
+from app.utils import cancellation
 
 logger = structlog.get_logger()
 
@@ -35,6 +36,10 @@ def update_task_status(
         message: Status message
         error: Optional error message
     """
+    # A cancelled task keeps its status; late updates from its subtasks are dropped
+    if status != TaskStatus.CANCELLED and cancellation.is_cancelled(task_id):
+        return
+
     status_data = {
         "task_id": task_id,
         "status": status.value,
@@ -145,6 +150,44 @@ def mark_task_failed(task_id: str, error_message: str) -> None:
     )
 
 
+def mark_task_cancelled(task_id: str) -> None:
+    """
+    Mark a task as cancelled and raise its cancellation flag.
+
+    Args:
+        task_id: Task identifier
+    """
+    cancellation.cancel(task_id)
+    update_task_status(
+        task_id=task_id,
+        status=TaskStatus.CANCELLED,
+        progress=0,
+        message="Análisis cancelado"
+    )
+
+
+def cancel_analysis(task_id: str) -> int:
+    """
+    Cancel an analysis: flag it, revoke its queued subtasks and let in-flight
+    batches stop at their next OpenAI call.
+
+    Args:
+        task_id: analyze_feedback task ID
+
+    Returns:
+        Number of revoked tasks (the analysis itself included)
+    """
+    from app.workers.celery_app import celery_app
+
+    mark_task_cancelled(task_id)
+
+    task_ids = [task_id] + get_subtasks(task_id)
+    celery_app.control.revoke(task_ids)
+
+    logger.info("Analysis cancelled", task_id=task_id, revoked=len(task_ids))
+    return len(task_ids)
+
+
 def update_task_progress(task_id: str, progress: int, message: str) -> None:
     """
     Update task progress.
@@ -159,4 +202,129 @@ def update_task_progress(task_id: str, progress: int, message: str) -> None:
         status=TaskStatus.PROCESSING,
         progress=progress,
         message=message
-    )
\ No newline at end of file
+    )
+
+
+def init_batch_progress(task_id: str, total_batches: int, completed: int = 0) -> None:
+    """
+    Initialize the batch completion counters for a task.
+
+    Args:
+        task_id: Task identifier
+        total_batches: Number of batches in the analysis
+        completed: Batches already done (resumed from checkpoints)
+    """
+    key = f"batch_progress:{task_id}"
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping={"total": total_batches, "done": completed, "failed": 0})
+    pipe.expire(key, settings.RESULTS_TTL_SECONDS)
+    pipe.execute()
+
+
+def record_batch_completed(task_id: str, failed: bool = False) -> Tuple[int, int, int]:
+    """
+    Atomically count a finished batch.
+
+    Args:
+        task_id: Task identifier
+        failed: Whether the batch ended with fallback results
+
+    Returns:
+        Tuple of (done, failed, total) batch counts
+    """
+    key = f"batch_progress:{task_id}"
+    pipe = redis_client.pipeline()
+    pipe.hincrby(key, "done", 1)
+    pipe.hincrby(key, "failed", 1 if failed else 0)
+    pipe.hget(key, "total")
+    done, failed_count, total = pipe.execute()
+    return done, failed_count, int(total or 0)
+
+
+def clear_batch_progress(task_id: str) -> None:
+    """
+    Delete the batch completion counters for a task.
+
+    Args:
+        task_id: Task identifier
+    """
+    redis_client.delete(f"batch_progress:{task_id}")
+
+
+def register_subtasks(task_id: str, subtask_ids: List[str]) -> None:
+    """
+    Remember the Celery IDs of a task's subtasks so they can be revoked.
+
+    Args:
+        task_id: Task identifier
+        subtask_ids: Celery task IDs of the dispatched subtasks
+    """
+    if not subtask_ids:
+        return
+    key = f"task_subtasks:{task_id}"
+    pipe = redis_client.pipeline()
+    pipe.sadd(key, *subtask_ids)
+    pipe.expire(key, settings.TASK_CONTEXT_TTL_SECONDS)
+    pipe.execute()
+
+
+def get_subtasks(task_id: str) -> List[str]:
+    """
+    Get the Celery IDs of a task's subtasks.
+
+    Args:
+        task_id: Task identifier
+
+    Returns:
+        Subtask IDs (empty if none were registered)
+    """
+    return [subtask_id.decode() for subtask_id in redis_client.smembers(f"task_subtasks:{task_id}")]
+
+
+def clear_subtasks(task_id: str) -> None:
+    """
+    Forget a task's subtask IDs.
+
+    Args:
+        task_id: Task identifier
+    """
+    redis_client.delete(f"task_subtasks:{task_id}")
+
+
+def claim_finalization(task_id: str) -> bool:
+    """
+    Claim the right to finalize an analysis (chord finalizer vs. deadline watchdog).
+
+    Args:
+        task_id: Task identifier
+
+    Returns:
+        True if this caller should finalize
+    """
+    return bool(redis_client.set(
+        f"task_finalizing:{task_id}", 1,
+        nx=True, ex=settings.TASK_CONTEXT_TTL_SECONDS
+    ))
+
+
+def release_finalization(task_id: str) -> None:
+    """
+    Release a finalization claim after a failed attempt.
+
+    Args:
+        task_id: Task identifier
+    """
+    redis_client.delete(f"task_finalizing:{task_id}")
+
+
+def is_finalization_claimed(task_id: str) -> bool:
+    """
+    Check if an analysis is being or has been finalized.
+
+    Args:
+        task_id: Task identifier
+
+    Returns:
+        True if a finalizer claimed it
+    """
+    return bool(redis_client.exists(f"task_finalizing:{task_id}"))
@@ -3,12 +3,14 @@ Storage service for results persistence.
 Handles storing and retrieving analysis results from Redis.
 """
 
+import hashlib
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import redis
 import structlog
 
 from app.config import settings
+from app.services import registry_service
 
 logger = structlog.get_logger()
 
@@ -35,6 +37,7 @@ def store_analysis_results(task_id: str, results: Dict[str, Any]) -> None:
             settings.RESULTS_TTL_SECONDS,
             results_json
         )
+        registry_service.touch_task(task_id)
 
         logger.info(
             "Results stored successfully",
@@ -81,6 +84,269 @@ def get_analysis_results(task_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def store_task_context(task_id: str, context: Dict[str, Any]) -> None:
+    """
+    Store the working context an analysis needs after its batches finish.
+
+    Args:
+        task_id: Task identifier
+        context: File key, start time, deduplication info, etc.
+    """
+    redis_client.setex(
+        f"task_context:{task_id}",
+        settings.TASK_CONTEXT_TTL_SECONDS,
+        json.dumps(context, ensure_ascii=False, default=str)
+    )
+
+
+def get_task_context(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the working context of an analysis.
+
+    Args:
+        task_id: Task identifier
+
+    Returns:
+        Context dictionary or None if expired
+    """
+    context_json = redis_client.get(f"task_context:{task_id}")
+    if not context_json:
+        return None
+
+    context = json.loads(context_json)
+
+    # JSON turns int keys into strings; duplicate_map is indexed by row number
+    dedup_info = context.get("dedup_info") or {}
+    if isinstance(dedup_info.get("duplicate_map"), dict):
+        dedup_info["duplicate_map"] = {
+            int(k): v for k, v in dedup_info["duplicate_map"].items()
+        }
+
+    return context
+
+
+def delete_task_context(task_id: str) -> None:
+    """
+    Delete the working context of an analysis.
+
+    Args:
+        task_id: Task identifier
+    """
+    redis_client.delete(f"task_context:{task_id}")
+
+
+def batch_hash(comments: List[str], language_hint: Optional[str] = None) -> str:
+    """
+    Content hash identifying a batch across attempts of the same task
+    (retries, or an inline run handed over to a worker).
+
+    Args:
+        comments: Comments of the batch
+        language_hint: Language the batch is analyzed in
+
+    Returns:
+        Hex digest used as checkpoint field
+    """
+    payload = json.dumps([language_hint, comments], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def store_batch_checkpoint(task_id: str, batch_hash: str, result: Dict[str, Any]) -> None:
+    """
+    Persist a completed batch result so retries can skip it.
+
+    Args:
+        task_id: Parent analysis task identifier
+        batch_hash: Content hash of the batch
+        result: Batch analysis result
+    """
+    key = f"batch_ckpt:{task_id}"
+    pipe = redis_client.pipeline()
+    pipe.hset(key, batch_hash, json.dumps(result, ensure_ascii=False, default=str))
+    pipe.expire(key, settings.TASK_CONTEXT_TTL_SECONDS)
+    pipe.execute()
+
+
+def get_batch_checkpoints(task_id: str, batch_hashes: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Get checkpointed batch results.
+
+    Args:
+        task_id: Parent analysis task identifier
+        batch_hashes: Content hashes of the batches, in order
+
+    Returns:
+        Result per batch hash, None where the batch has not completed
+    """
+    if not batch_hashes:
+        return []
+
+    values = redis_client.hmget(f"batch_ckpt:{task_id}", batch_hashes)
+    return [json.loads(v) if v else None for v in values]
+
+
+def delete_batch_checkpoints(task_id: str) -> None:
+    """
+    Delete the batch checkpoints of a finished analysis.
+
+    Args:
+        task_id: Parent analysis task identifier
+    """
+    redis_client.delete(f"batch_ckpt:{task_id}")
+
+
+def store_comment_shard(task_id: str, comments: List[str]) -> str:
+    """
+    Write the comments of an analysis once, so batch messages can carry
+    (shard_key, start, end) instead of the comment text.
+
+    Args:
+        task_id: Parent analysis task identifier
+        comments: Flattened comments of every batch, in batch order
+
+    Returns:
+        Redis key of the shard
+    """
+    shard_key = f"task_shard:{task_id}"
+    pipe = redis_client.pipeline()
+    pipe.delete(shard_key)
+    if comments:
+        pipe.rpush(shard_key, *comments)
+    pipe.expire(shard_key, settings.TASK_CONTEXT_TTL_SECONDS)
+    pipe.execute()
+    return shard_key
+
+
+def load_comment_shard(shard_key: str, start: int, end: int) -> List[str]:
+    """
+    Read a slice of a comment shard.
+
+    Args:
+        shard_key: Redis key returned by store_comment_shard
+        start: First comment index (inclusive)
+        end: Last comment index (exclusive)
+
+    Returns:
+        Comments in [start, end)
+
+    Raises:
+        KeyError: If the shard expired or is shorter than requested
+    """
+    values = redis_client.lrange(shard_key, start, end - 1)
+    if len(values) != end - start:
+        raise KeyError(f"Comment shard {shard_key}[{start}:{end}] not available")
+    return [v.decode("utf-8") for v in values]
+
+
+def delete_comment_shard(task_id: str) -> None:
+    """
+    Delete the comment shard of a finished analysis.
+
+    Args:
+        task_id: Parent analysis task identifier
+    """
+    redis_client.delete(f"task_shard:{task_id}")
+
+
+def store_row_shard(task_id: str, shard_index: int, comments: List[str], ratings: List[int]) -> None:
+    """
+    Store the rows of one shard of a large file.
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_index: Shard number
+        comments: Comments of the shard rows
+        ratings: Ratings of the shard rows
+    """
+    redis_client.setex(
+        f"task_rows:{task_id}:{shard_index}",
+        settings.TASK_CONTEXT_TTL_SECONDS,
+        json.dumps({"c": comments, "n": ratings}, ensure_ascii=False)
+    )
+
+
+def load_row_shard(task_id: str, shard_index: int) -> Tuple[List[str], List[int]]:
+    """
+    Load the rows of one shard.
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_index: Shard number
+
+    Returns:
+        Tuple of (comments, ratings)
+
+    Raises:
+        KeyError: If the shard expired
+    """
+    data = redis_client.get(f"task_rows:{task_id}:{shard_index}")
+    if not data:
+        raise KeyError(f"Row shard {shard_index} of task {task_id} not available")
+    shard = json.loads(data)
+    return shard["c"], shard["n"]
+
+
+def store_shard_result(task_id: str, shard_index: int, result: Dict[str, Any]) -> None:
+    """
+    Store the analyzed rows and partial aggregate of one shard.
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_index: Shard number
+        result: Output of analysis_service.analyze_row_shard
+    """
+    redis_client.setex(
+        f"task_shard_result:{task_id}:{shard_index}",
+        settings.TASK_CONTEXT_TTL_SECONDS,
+        json.dumps(result, ensure_ascii=False, default=str)
+    )
+
+
+def has_shard_result(task_id: str, shard_index: int) -> bool:
+    """
+    Check if a shard was already analyzed (retry or redelivery).
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_index: Shard number
+
+    Returns:
+        True if its result is stored
+    """
+    return bool(redis_client.exists(f"task_shard_result:{task_id}:{shard_index}"))
+
+
+def get_shard_result(task_id: str, shard_index: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the result of one shard.
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_index: Shard number
+
+    Returns:
+        Shard result or None if missing
+    """
+    data = redis_client.get(f"task_shard_result:{task_id}:{shard_index}")
+    return json.loads(data) if data else None
+
+
+def delete_shard_data(task_id: str, shard_count: int) -> None:
+    """
+    Delete row shards and shard results of a finished analysis.
+
+    Args:
+        task_id: Parent analysis task identifier
+        shard_count: Number of shards
+    """
+    keys = []
+    for i in range(shard_count):
+        keys.append(f"task_rows:{task_id}:{i}")
+        keys.append(f"task_shard_result:{task_id}:{i}")
+    if keys:
+        redis_client.delete(*keys)
+
+
 def delete_task_data(task_id: str) -> bool:
     """
     Delete task data from Redis.
@@ -0,0 +1,172 @@
+"""
+Synchronous (inline) analysis service.
+Analyzes tiny uploads inside the API process so the caller gets results in
+the same request, without the Redis blob / Celery / polling round trips.
+Results are stored and registered like a worker's, so /results and /export
+work with the returned task_id; completed batches are checkpointed so a run
+handed over to a worker at its timeout only re-analyzes the rest.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import structlog
+
+from app.config import settings
+from app.services import registry_service, status_service, storage_service
+from app.utils.event_loop_manager import run_async
+from app.utils.request_context import AnalysisContext, run_in_context
+
+logger = structlog.get_logger()
+
+# Bounded executor: at most SYNC_ANALYSIS_MAX_CONCURRENT inline analyses run at
+# once; callers that find every slot busy go through the async path instead
+_executor = ThreadPoolExecutor(
+    max_workers=settings.SYNC_ANALYSIS_MAX_CONCURRENT,
+    thread_name_prefix="sync-analysis"
+)
+_slots = threading.BoundedSemaphore(settings.SYNC_ANALYSIS_MAX_CONCURRENT)
+
+
+def is_eligible(rows: int) -> bool:
+    """
+    Check if a file is small enough for inline analysis.
+
+    Args:
+        rows: Valid rows in the file
+
+    Returns:
+        True if the sync path may be used
+    """
+    return settings.SYNC_ANALYSIS_ENABLED and rows <= settings.SYNC_ANALYSIS_MAX_ROWS
+
+
+def try_submit(
+    file_path: str,
+    task_id: str,
+    language_hint: Optional[str] = None,
+    filename: Optional[str] = None
+) -> Optional[Future]:
+    """
+    Submit an inline analysis if a slot is free.
+
+    Args:
+        file_path: Path to the uploaded file
+        task_id: Task identifier of the analysis (results are stored under it)
+        language_hint: Optional language hint
+        filename: Original filename, shown in task listings
+
+    Returns:
+        Future with the complete response, or None when every slot is busy
+    """
+    if not _slots.acquire(blocking=False):
+        logger.info("Sync analysis slots busy", task_id=task_id)
+        return None
+
+    try:
+        future = _executor.submit(analyze_file, file_path, task_id, language_hint, filename)
+    except Exception:
+        _slots.release()
+        raise
+
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def analyze_file(
+    file_path: str,
+    task_id: str,
+    language_hint: Optional[str] = None,
+    filename: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Analyze a file end to end, store the results and return them.
+
+    Args:
+        file_path: Path to the uploaded file
+        task_id: Task identifier of the analysis (results are stored under it)
+        language_hint: Optional language hint (detected from data if None)
+        filename: Original filename, shown in task listings
+
+    Returns:
+        Same payload as GET /results/{task_id}
+
+    Raises:
+        TimeoutError: If the analysis did not finish in SYNC_ANALYSIS_TIMEOUT_SECONDS;
+            its completed batches are checkpointed under task_id for the worker
+    """
+    # The analysis pipeline (and its ML dependencies) loads on first use
+    from app.services import analysis_service
+
+    start_time = time.time()
+
+    df = analysis_service.load_and_validate_file(file_path)
+    comments, ratings, detected_language, dedup_info = analysis_service.prepare_analysis_data(df)
+    batches = analysis_service.create_batches(comments)
+    language = language_hint or detected_language
+
+    # Same hashes as the worker's, so a handed-over run resumes from these batches
+    batch_hashes = [storage_service.batch_hash(batch, language) for batch in batches]
+
+    async def on_batch_done(idx: int, result: Dict[str, Any], failed: bool) -> None:
+        if not failed:
+            await asyncio.to_thread(_checkpoint, task_id, batch_hashes[idx], result)
+
+    # The caller is waiting on the connection: schedule its calls as high priority
+    context = AnalysisContext(task_id, "high", start_time + settings.SYNC_ANALYSIS_TIMEOUT_SECONDS)
+
+    batch_results = run_async(
+        run_in_context(
+            analysis_service.analyze_batches_concurrently(
+                batches, list(range(len(batches))), language,
+                on_batch_done=on_batch_done,
+                batch_ratings=analysis_service.split_batch_ratings(ratings, batches)
+            ),
+            context
+        ),
+        timeout=settings.SYNC_ANALYSIS_TIMEOUT_SECONDS
+    )
+
+    results = analysis_service.merge_batch_results(
+        batch_results, df, task_id, start_time,
+        model_used=settings.AI_MODEL,
+        dedup_info=dedup_info
+    )
+    results["metadata"]["mode"] = "sync"
+    _store(task_id, results, {"filename": filename, "rows": len(df), "priority": "high", "mode": "sync"})
+
+    logger.info(
+        "Sync analysis completed",
+        task_id=task_id,
+        rows=len(df),
+        batches=len(batches),
+        degraded=results["metadata"]["degraded"],
+        duration=round(time.time() - start_time, 2)
+    )
+
+    return results
+
+
+def _checkpoint(task_id: str, batch_hash: str, result: Dict[str, Any]) -> None:
+    """Checkpoint a completed batch (best effort: it only saves work on handover)."""
+    try:
+        storage_service.store_batch_checkpoint(task_id, batch_hash, result)
+    except Exception as e:
+        logger.warning("Failed to checkpoint sync batch", task_id=task_id, error=str(e))
+
+
+def _store(task_id: str, results: Dict[str, Any], info: Dict[str, Any]) -> None:
+    """
+    Store, register and complete an inline analysis like a worker would.
+    Best effort: the caller already has the results, only later lookups
+    by task_id depend on this.
+    """
+    try:
+        registry_service.register_task(task_id, info)
+        storage_service.store_analysis_results(task_id, results)
+        status_service.mark_task_completed(task_id)
+        storage_service.delete_batch_checkpoints(task_id)
+    except Exception as e:
+        logger.error("Failed to store sync analysis results", task_id=task_id, error=str(e))
@@ -0,0 +1,165 @@
+"""
+Analysis cancellation flag.
+A cancelled analysis has a flag in Redis; batches, the scheduler and the
+OpenAI client pool check it (through the analysis context) so an abandoned
+analysis stops spending quota. Code on the event loop uses the *_async
+checks, which keep the Redis round trip off the loop.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+import redis
+import structlog
+
+from app.config import settings
+from app.utils.request_context import get_analysis_context
+
+logger = structlog.get_logger()
+
+# Redis client instance
+redis_client = redis.from_url(settings.REDIS_URL)
+
+CANCEL_KEY_PREFIX = "task_cancelled:"
+
+# Negative answers are reused this long, so per-call checks stay cheap
+_RECHECK_SECONDS = 1.0
+
+# Bound on locally remembered task IDs (both maps)
+_MAX_REMEMBERED = 10000
+
+# Task ID -> when it was seen cancelled (forgotten with the Redis flag)
+_cancelled: Dict[str, float] = {}
+_checked_at: Dict[str, float] = {}
+# Both maps are used from the event loop, its to_thread workers and task threads
+_state_lock = threading.Lock()
+
+
+class TaskCancelled(Exception):
+    """Raised when the analysis the work belongs to was cancelled."""
+
+
+def cancel(task_id: str) -> None:
+    """
+    Set the cancellation flag of an analysis.
+
+    Args:
+        task_id: analyze_feedback task ID
+    """
+    redis_client.set(f"{CANCEL_KEY_PREFIX}{task_id}", 1, ex=settings.TASK_CONTEXT_TTL_SECONDS)
+    _remember_cancelled(task_id)
+
+
+def _remember_cancelled(task_id: str) -> None:
+    """Remember a cancelled task locally, dropping flags that expired in Redis."""
+    now = time.monotonic()
+    with _state_lock:
+        if len(_cancelled) >= _MAX_REMEMBERED:
+            for known, seen_at in list(_cancelled.items()):
+                if now - seen_at >= settings.TASK_CONTEXT_TTL_SECONDS:
+                    del _cancelled[known]
+            if len(_cancelled) >= _MAX_REMEMBERED:
+                _cancelled.clear()  # Only a cache: Redis still has the flags
+        _cancelled[task_id] = now
+        _checked_at.pop(task_id, None)
+
+
+def _known_answer(task_id: str) -> Optional[bool]:
+    """Answer from local state, or None when Redis must be asked."""
+    now = time.monotonic()
+    with _state_lock:
+        seen_at = _cancelled.get(task_id)
+        if seen_at is not None:
+            if now - seen_at < settings.TASK_CONTEXT_TTL_SECONDS:
+                return True
+            del _cancelled[task_id]
+        if now - _checked_at.get(task_id, -_RECHECK_SECONDS) < _RECHECK_SECONDS:
+            return False
+    return None
+
+
+def is_cancelled(task_id: Optional[str]) -> bool:
+    """
+    Check if an analysis was cancelled.
+
+    Args:
+        task_id: analyze_feedback task ID (None is never cancelled)
+
+    Returns:
+        True if the cancellation flag is set
+    """
+    if not task_id:
+        return False
+    known = _known_answer(task_id)
+    if known is not None:
+        return known
+
+    try:
+        flagged = bool(redis_client.exists(f"{CANCEL_KEY_PREFIX}{task_id}"))
+    except redis.RedisError as e:
+        logger.warning("Cancellation check failed", task_id=task_id, error=str(e))
+        return False
+
+    if flagged:
+        _remember_cancelled(task_id)
+        return True
+
+    with _state_lock:
+        if len(_checked_at) >= _MAX_REMEMBERED:
+            _checked_at.clear()
+        _checked_at[task_id] = time.monotonic()
+    return False
+
+
+async def is_cancelled_async(task_id: Optional[str]) -> bool:
+    """
+    is_cancelled() for the event loop: the Redis check runs in a thread.
+
+    Args:
+        task_id: analyze_feedback task ID (None is never cancelled)
+
+    Returns:
+        True if the cancellation flag is set
+    """
+    if not task_id:
+        return False
+    known = _known_answer(task_id)
+    if known is not None:
+        return known
+    return await asyncio.to_thread(is_cancelled, task_id)
+
+
+def raise_if_cancelled() -> None:
+    """
+    Stop work belonging to a cancelled analysis (current analysis context).
+
+    Raises:
+        TaskCancelled: If the current analysis was cancelled
+    """
+    context = get_analysis_context()
+    if context is not None and is_cancelled(context.task_id):
+        raise TaskCancelled(f"Analysis {context.task_id} was cancelled")
+
+
+async def raise_if_cancelled_async() -> None:
+    """
+    raise_if_cancelled() for the event loop.
+
+    Raises:
+        TaskCancelled: If the current analysis was cancelled
+    """
+    context = get_analysis_context()
+    if context is not None and await is_cancelled_async(context.task_id):
+        raise TaskCancelled(f"Analysis {context.task_id} was cancelled")
+
+
+def _reset_after_fork() -> None:
+    """In a forked child, renew the lock: another thread may have held it at fork time."""
+    global _state_lock
+    _state_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,110 @@
+"""
+Analysis deadline propagation.
+The deadline of the current analysis lives in a context variable, so it
+follows the work from the Celery task into the event loop and down to each
+OpenAI call, where it caps timeouts and stops retries that can no longer
+finish in time.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+from tenacity.stop import stop_base
+
+from app.config import settings
+
+# Absolute deadline (epoch seconds) of the analysis being processed
+_deadline: ContextVar[Optional[float]] = ContextVar("analysis_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when there is not enough time left for another attempt."""
+
+
+def get_deadline() -> Optional[float]:
+    """Get the deadline of the current analysis, if any."""
+    return _deadline.get()
+
+
+def set_deadline(deadline: Optional[float]):
+    """
+    Set the deadline for the current context.
+
+    Returns:
+        Token to pass to reset_deadline
+    """
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token) -> None:
+    """Restore the deadline that was active before set_deadline."""
+    _deadline.reset(token)
+
+
+def remaining_seconds(deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left until the deadline.
+
+    Args:
+        deadline: Explicit deadline (current context's if None)
+
+    Returns:
+        Seconds left (may be negative), or None when there is no deadline
+    """
+    deadline = deadline if deadline is not None else _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.time()
+
+
+def is_expired(deadline: Optional[float] = None) -> bool:
+    """Check if the deadline has passed."""
+    remaining = remaining_seconds(deadline)
+    return remaining is not None and remaining <= 0
+
+
+def call_timeout(default: float) -> float:
+    """
+    Timeout for the next external call: the default, capped by the time left.
+
+    Args:
+        default: Timeout used when there is no deadline
+
+    Returns:
+        Timeout in seconds
+
+    Raises:
+        DeadlineExceeded: If less than DEADLINE_MIN_CALL_SECONDS remain
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return default
+    if remaining < settings.DEADLINE_MIN_CALL_SECONDS:
+        raise DeadlineExceeded(f"Only {remaining:.1f}s left before the analysis deadline")
+    return min(default, remaining)
+
+
+def capped_timeout(default: Optional[float], deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Cap a blocking wait by the time left until the deadline.
+
+    Args:
+        default: Timeout used when there is no deadline
+        deadline: Explicit deadline (current context's if None)
+
+    Returns:
+        Timeout in seconds (never negative)
+    """
+    remaining = remaining_seconds(deadline)
+    if remaining is None:
+        return default
+    remaining = max(0.0, remaining)
+    return remaining if default is None else min(default, remaining)
+
+
+class stop_before_deadline(stop_base):
+    """Tenacity stop condition: give up once another attempt cannot fit before the deadline."""
+
+    def __call__(self, retry_state) -> bool:
+        remaining = remaining_seconds()
+        return remaining is not None and remaining < settings.DEADLINE_MIN_CALL_SECONDS
@@ -1,69 +1,175 @@
 """
 Event loop management for Celery workers.
-Fixes async/sync conflicts enabling parallel processing.
+Runs one long-lived asyncio loop in a background thread per process, so sync
+task code can submit coroutines to it and async connection pools survive
+across tasks.
 """
 
 import asyncio
+import os
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Coroutine
+from concurrent.futures import Future, wait
+from typing import Any, Coroutine, Optional
 import structlog
 
 logger = structlog.get_logger()
 
 
-class SafeEventLoopManager:
+class BackgroundLoopRunner:
     """
-    Manages event loops safely for Celery workers.
-    Handles the conflict between Celery's sync nature and async OpenAI calls.
+    Owns an event loop running forever in a dedicated daemon thread.
+    Sync callers submit coroutines and block on the result with a timeout.
     """
 
-    _thread_local = threading.local()
+    def __init__(self, name: str = "async-loop-runner"):
+        """
+        Initialize runner (loop thread starts on first use).
+
+        Args:
+            name: Thread name, visible in logs and thread dumps
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the running loop, starting the thread if needed."""
+        self.start()
+        return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        """Check if the loop thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
 
-    @classmethod
-    def get_or_create_loop(cls) -> asyncio.AbstractEventLoop:
-        """Get existing loop or create new one for current thread."""
+    def start(self) -> None:
+        """Start the loop thread (idempotent)."""
+        with self._lock:
+            if self.is_running:
+                return
 
-        if not hasattr(cls._thread_local, 'loop'):
-            # Create new loop for this thread
-            cls._thread_local.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(cls._thread_local.loop)
+            self._started.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._run_forever,
+                name=self.name,
+                daemon=True
+            )
+            self._thread.start()
 
-        return cls._thread_local.loop
+        self._started.wait()
+        logger.info("Background event loop started", thread=self.name, pid=os.getpid())
 
-    @classmethod
-    def run_async_in_worker(cls, coro: Coroutine) -> Any:
+    def _run_forever(self) -> None:
+        """Thread target: run the loop until stop() is called."""
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._cancel_pending()
+            self._loop.close()
+
+    def _cancel_pending(self) -> None:
+        """Cancel tasks still pending when the loop stops."""
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self._loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True)
+            )
+
+    def submit(self, coro: Coroutine) -> Future:
         """
-        Run async code in Celery worker safely.
-        Creates isolated event loop per thread.
+        Schedule a coroutine on the loop without waiting.
+
+        Returns:
+            concurrent.futures.Future for the coroutine result
         """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and block until it finishes.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait before cancelling it
+
+        Returns:
+            Coroutine result
+
+        Raises:
+            TimeoutError: If the coroutine did not finish in time (it is cancelled)
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() called from the loop thread; await the coroutine instead")
+
+        future = self.submit(coro)
         try:
-            # Try to get existing loop
-            loop = asyncio.get_event_loop()
-
-            if loop.is_running():
-                # Loop already running, use thread pool
-                logger.info("Event loop running, using thread pool")
-
-                def run_in_new_loop():
-                    new_loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(new_loop)
-                    try:
-                        return new_loop.run_until_complete(coro)
-                    finally:
-                        new_loop.close()
-
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(run_in_new_loop)
-                    return future.result(timeout=60)
-            else:
-                # Loop not running, we can use it
-                return loop.run_until_complete(coro)
-
-        except RuntimeError as e:
-            if "no running event loop" in str(e) or "There is no current event loop" in str(e):
-                # No loop exists, create one
-                logger.info("No event loop, creating new one")
-                return asyncio.run(coro)
-            raise
\ No newline at end of file
+            # Wait separately: a TimeoutError raised by the coroutine itself is
+            # the same builtin class and must not be mistaken for ours
+            done, _ = wait([future], timeout=timeout)
+        except BaseException:
+            # Caller interrupted (e.g. soft time limit) - don't leave work running
+            future.cancel()
+            raise
+
+        if not done:
+            future.cancel()
+            raise TimeoutError(f"Async operation exceeded {timeout}s and was cancelled")
+        return future.result()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the loop and join the thread."""
+        with self._lock:
+            if not self.is_running:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+        logger.info("Background event loop stopped", thread=self.name, pid=os.getpid())
+
+
+_runner: Optional[BackgroundLoopRunner] = None
+_runner_pid: Optional[int] = None
+
+
+def get_loop_runner() -> BackgroundLoopRunner:
+    """
+    Get the process-wide loop runner.
+    Recreated after fork, since threads do not survive fork.
+    """
+    global _runner, _runner_pid
+
+    if _runner is None or _runner_pid != os.getpid():
+        _runner = BackgroundLoopRunner()
+        _runner_pid = os.getpid()
+
+    return _runner
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the process loop from sync code.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Seconds before the coroutine is cancelled
+
+    Returns:
+        Coroutine result
+    """
+    return get_loop_runner().run(coro, timeout=timeout)
+
+
+def stop_loop_runner() -> None:
+    """Stop the process loop runner (worker shutdown)."""
+    if _runner is not None and _runner_pid == os.getpid():
+        _runner.stop()
@@ -0,0 +1,50 @@
+"""
+Analysis context propagation.
+Carries which analysis a piece of async work belongs to (task ID, priority,
+deadline) from the Celery task into the background event loop, where the
+OpenAI scheduler and deadline checks read it.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Coroutine, Optional
+
+from app.utils.deadline import reset_deadline, set_deadline
+
+
+@dataclass(frozen=True)
+class AnalysisContext:
+    """Identity and time budget of the analysis being processed."""
+    task_id: Optional[str] = None
+    priority: str = "normal"
+    deadline: Optional[float] = None
+
+
+_current: ContextVar[Optional[AnalysisContext]] = ContextVar("analysis_context", default=None)
+
+
+def get_analysis_context() -> Optional[AnalysisContext]:
+    """Get the context of the analysis being processed, if any."""
+    return _current.get()
+
+
+async def run_in_context(coro: Coroutine, context: Optional[AnalysisContext]) -> Any:
+    """
+    Await a coroutine with the analysis context (and its deadline) set.
+    Needed when submitting to the background loop, since tasks created there
+    do not inherit the caller thread's context.
+
+    Args:
+        coro: Coroutine to run
+        context: Analysis context, or None to run without one
+
+    Returns:
+        Coroutine result
+    """
+    context_token = _current.set(context)
+    deadline_token = set_deadline(context.deadline if context else None)
+    try:
+        return await coro
+    finally:
+        reset_deadline(deadline_token)
+        _current.reset(context_token)
@@ -0,0 +1,79 @@
+"""
+Startup measurement.
+Imports a process' entry module in a fresh interpreter and reports import
+time, resident memory and which heavy modules came along.
+
+Usage:
+    python -m app.utils.startup_profile [api|worker]
+"""
+
+import importlib
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+# Entry module of each process type
+TARGETS = {
+    "api": "app.main",
+    "worker": "app.workers.tasks",
+}
+
+# Modules the API should not need to import
+HEAVY_MODULES = [
+    "openai",
+    "aiohttp",
+    "transformers",
+    "vaderSentiment",
+    "app.workers.tasks",
+    "app.services.analysis_service",
+    "app.adapters.hybrid_analyzer",
+]
+
+
+def measure(target: str = "api") -> Dict[str, Any]:
+    """
+    Import a target's entry module and measure the cost.
+
+    Args:
+        target: Process type (api or worker)
+
+    Returns:
+        Import time, RSS before/after and heavy modules loaded
+    """
+    module_name = TARGETS[target]
+    process = psutil.Process()
+
+    rss_before = process.memory_info().rss
+    started = time.perf_counter()
+    importlib.import_module(module_name)
+    import_seconds = time.perf_counter() - started
+    rss_after = process.memory_info().rss
+
+    return {
+        "target": target,
+        "module": module_name,
+        "import_seconds": round(import_seconds, 3),
+        "rss_before_mb": round(rss_before / 1024 / 1024, 1),
+        "rss_after_mb": round(rss_after / 1024 / 1024, 1),
+        "modules_loaded": len(sys.modules),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the measurement as JSON."""
+    argv = sys.argv[1:] if argv is None else argv
+    target = argv[0] if argv else "api"
+    if target not in TARGETS:
+        print(f"Unknown target {target!r}, expected one of {sorted(TARGETS)}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(measure(target), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
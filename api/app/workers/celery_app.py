@@ -5,7 +5,7 @@ Handles async processing of feedback analysis tasks.
 
 import os
 from celery import Celery
-from kombu import serialization
+from kombu import serialization, Queue
 import structlog
 
 # Force environment variable reading for Render deployment
@@ -43,9 +43,52 @@ logger.info(
     result_backend_settings=settings.CELERY_RESULT_BACKEND,
     redis_url_settings=settings.REDIS_URL,
     app_env=settings.APP_ENV,
-    celery_worker_concurrency=settings.CELERY_WORKER_CONCURRENCY
+    celery_worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    worker_pool_mode=settings.WORKER_POOL_MODE
 )
 
+# Worker pool mode: prefork runs one batch per process; asyncio mode runs one
+# process whose thread slots only wait on the shared background event loop,
+# so many batches are in flight at once
+ASYNC_WORKER_MODE = settings.WORKER_POOL_MODE == "asyncio"
+
+# Queues: workers subscribe to subsets with -Q (see start-worker.sh), so a
+# giant upload's batches can't sit in front of everyone's small uploads
+QUEUE_DEFAULT = "celery"
+QUEUE_ORCHESTRATION = "orchestration"   # analyze_feedback, finalizers, watchdogs
+QUEUE_BATCHES_SMALL = "batches_small"   # Batches of small files and high-priority uploads
+QUEUE_BATCHES_LARGE = "batches_large"   # Batches and shards of large files
+QUEUE_MAINTENANCE = "maintenance"       # Periodic cleanup, debug tasks
+
+# Broker priorities (Redis transport: 0 is the highest)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+
+
+# Task names, for dispatch by name (the API doesn't import app.workers.tasks)
+TASK_ANALYZE_FEEDBACK = "app.workers.tasks.analyze_feedback"
+
+
+def is_large_upload(rows: int, priority: str = "normal") -> bool:
+    """Check if an upload goes to the large-file lane (high priority never does)."""
+    return priority != "high" and rows >= settings.LARGE_FILE_MIN_ROWS
+
+
+def analysis_queue_for(rows: int, priority: str = "normal") -> str:
+    """Queue for the analyze_feedback task of an upload."""
+    return QUEUE_BATCHES_LARGE if is_large_upload(rows, priority) else QUEUE_ORCHESTRATION
+
+
+def batch_queue_for(unique_comments: int, priority: str = "normal") -> str:
+    """Queue for the batch subtasks of an analysis."""
+    return QUEUE_BATCHES_LARGE if is_large_upload(unique_comments, priority) else QUEUE_BATCHES_SMALL
+
+
+def broker_priority(priority: str = "normal") -> int:
+    """Broker message priority for a requested processing priority."""
+    return PRIORITY_HIGH if priority == "high" else PRIORITY_NORMAL
+
+
 # Create Celery app - Use environment variables directly if available
 celery_app = Celery(
     "feedback_analyzer",
@@ -63,13 +106,29 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 
-    # Task routing - SIMPLIFIED: Use default queue for all tasks
-    # This ensures tasks are picked up by the worker
-    task_default_queue="celery",
+    # Task routing: static lanes per task type; analyze_feedback and
+    # analyze_batch are re-routed per call by file size and priority
+    task_default_queue=QUEUE_DEFAULT,
+    task_queues=(
+        Queue(QUEUE_DEFAULT),
+        Queue(QUEUE_ORCHESTRATION),
+        Queue(QUEUE_BATCHES_SMALL),
+        Queue(QUEUE_BATCHES_LARGE),
+        Queue(QUEUE_MAINTENANCE),
+    ),
     task_routes={
-        # All tasks go to default "celery" queue for simplicity
-        # Can be refined later when multiple workers are needed
+        "app.workers.tasks.analyze_feedback": {"queue": QUEUE_ORCHESTRATION},
+        "app.workers.tasks.finalize_analysis": {"queue": QUEUE_ORCHESTRATION},
+        "app.workers.tasks.on_analysis_chord_error": {"queue": QUEUE_ORCHESTRATION},
+        "app.workers.tasks.enforce_analysis_deadline": {"queue": QUEUE_ORCHESTRATION},
+        "app.workers.tasks.analyze_batch": {"queue": QUEUE_BATCHES_SMALL},
+        "app.workers.tasks.analyze_shard": {"queue": QUEUE_BATCHES_LARGE},
+        "app.workers.tasks.reduce_shards": {"queue": QUEUE_ORCHESTRATION},
+        "app.workers.tasks.cleanup_expired_tasks": {"queue": QUEUE_MAINTENANCE},
+        "app.workers.celery_app.debug_task": {"queue": QUEUE_MAINTENANCE},
+        "app.workers.celery_app.health_check": {"queue": QUEUE_MAINTENANCE},
     },
+    task_default_priority=PRIORITY_NORMAL,
 
     # Task execution
     task_acks_late=True,
@@ -89,7 +148,11 @@ celery_app.conf.update(
     task_soft_time_limit=540,  # 9 minutes warning
 
     # Worker configuration
-    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY,
+    worker_pool="threads" if ASYNC_WORKER_MODE else "prefork",
+    worker_concurrency=(
+        settings.CELERY_ASYNC_CONCURRENCY if ASYNC_WORKER_MODE
+        else settings.CELERY_WORKER_CONCURRENCY
+    ),
     worker_log_format="[%(asctime)s: %(levelname)s/%(processName)s] %(message)s",
     worker_task_log_format="[%(asctime)s: %(levelname)s/%(processName)s][%(task_name)s(%(task_id)s)] %(message)s",
 
@@ -101,7 +164,11 @@ celery_app.conf.update(
     broker_transport_options={
         "visibility_timeout": 3600,  # 1 hour
         "fanout_prefix": True,
-        "fanout_patterns": True
+        "fanout_patterns": True,
+        # Message priority within each queue (per-priority sub-queues); queues
+        # themselves are consumed round-robin so none is starved
+        "priority_steps": list(range(10)),
+        "sep": ":"
     },
 
     # Beat schedule (for future periodic tasks)
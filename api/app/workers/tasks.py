@@ -9,29 +9,36 @@ import base64
 import json
 import tempfile
 import os
-from typing import Dict, List, Any
-from celery import group
+from typing import Dict, List, Any, Optional
+from celery import chord
+import pandas as pd
 import structlog
 import redis
 
 from app.config import settings
-from app.workers.celery_app import celery_app
-from app.adapters.openai import openai_analyzer
+from app.workers.celery_app import celery_app, batch_queue_for, broker_priority
 from app.schemas.base import Language, TaskStatus
 from app.utils.event_loop_monitor import monitor_event_loop, log_loop_state
-from app.utils.event_loop_manager import SafeEventLoopManager
+from app.utils.event_loop_manager import run_async
+from app.utils.deadline import DeadlineExceeded, capped_timeout, is_expired, remaining_seconds
+from app.utils import cancellation
+from app.utils.cancellation import TaskCancelled
+from app.utils.request_context import AnalysisContext, run_in_context
 from app.utils.memory_monitor import MemoryMonitor
 from app.services import (
     analysis_service,
+    deadline_service,
+    inflight_service,
+    registry_service,
     status_service,
     storage_service
 )
 from app.utils.logging import log_task_start, log_task_complete, log_task_error
 from app.utils.openai_logging import global_metrics
-
-# Import hybrid analyzer if enabled
-if settings.HYBRID_ANALYSIS_ENABLED:
-    from app.adapters.hybrid_analyzer import HybridAnalyzer
+from app.workers.worker_resources import get_hybrid_analyzer, get_openai_analyzer
+from app.adapters.openai.model_cascade import merge_stats, summarize
+from app.core.cache_manager import CommentCacheManager
+from app.core.unified_aggregation import UnifiedAggregator
 
 logger = structlog.get_logger()
 redis_client = redis.from_url(settings.REDIS_URL)
@@ -39,13 +46,19 @@ redis_client = redis.from_url(settings.REDIS_URL)
 
 @celery_app.task(bind=True, max_retries=3)
 @monitor_event_loop("analyze_feedback_main_task")
-def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str:
+def analyze_feedback(
+    self,
+    task_id_param: str,
+    file_info: Dict[str, Any],
+    priority: str = "normal"
+) -> str:
     """
     Main task to analyze a feedback file.
 
     Args:
         task_id_param: Task ID (also used to retrieve file from Redis)
         file_info: Metadata about the file
+        priority: Requested processing priority (normal/high), used to route subtasks
 
     Returns:
         Task ID for result retrieval
@@ -59,6 +72,11 @@ def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str
     temp_file = None
 
     try:
+        # Cancelled while queued (revoke only reaches workers that are up)
+        if cancellation.is_cancelled(task_id):
+            logger.info("Analysis cancelled before start", task_id=task_id)
+            return task_id
+
         # Initialize task
         status_service.mark_task_started(task_id)
 
@@ -91,6 +109,10 @@ def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str
         status_service.update_task_progress(task_id, 10, "Cargando archivo")
         df = analysis_service.load_and_validate_file(temp_file)
 
+        # Very large files: map-reduce over row shards on any worker node
+        if settings.SHARDED_MODE_MIN_ROWS and len(df) >= settings.SHARDED_MODE_MIN_ROWS:
+            return _dispatch_row_shards(task_id, df, file_key, start_time, priority)
+
         # Prepare data with deduplication
         status_service.update_task_progress(task_id, 20, "Normalizando y deduplicando datos")
         comments, ratings, language_hint, dedup_info = analysis_service.prepare_analysis_data(df)
@@ -106,16 +128,16 @@ def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str
             f"Procesando {filtered_count} comentarios únicos de {original_count} (ahorro: {savings_pct}%)"
         )
 
-        # Dynamic batch sizing based on memory
-        if settings.DYNAMIC_BATCH_SIZING:
-            batch_size = MemoryMonitor.calculate_safe_batch_size(
-                len(comments),
-                settings.BATCH_SIZE_OPTIMAL
-            )
-            logger.info(f"Dynamic batch size: {batch_size} (memory-aware)")
-            batches = [comments[i:i+batch_size] for i in range(0, len(comments), batch_size)]
-        else:
-            batches = openai_analyzer.optimize_batch_size(comments)
+        batches = analysis_service.create_batches(comments)
+        # Ratings travel with their batch: the hybrid router weighs them
+        batch_ratings = analysis_service.split_batch_ratings(ratings, batches)
+
+        if cancellation.is_cancelled(task_id):
+            logger.info("Analysis cancelled before dispatch", task_id=task_id)
+            return task_id
+
+        # Time budget for this analysis, propagated to batches and OpenAI calls
+        deadline = deadline_service.compute_deadline(len(comments), start_time)
 
         logger.info("Created batches", task_id=task_id, batch_count=len(batches))
 
@@ -125,144 +147,114 @@ def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str
             f"Procesando {len(batches)} lotes en paralelo (max {settings.CELERY_WORKER_CONCURRENCY} simultáneos)"
         )
 
-        # Create and execute batch tasks in parallel
-        batch_tasks = group(
-            analyze_batch.s(batch, idx, language_hint)
-            for idx, batch in enumerate(batches)
-        )
-        batch_results = batch_tasks.apply_async()
-
-        # Monitor progress without blocking
-        status_service.update_task_progress(task_id, 50, f"Procesando {len(batches)} lotes...")
-
-        # Improved progress monitoring with detailed logging
-        import time as time_module
-        max_wait = 180  # 3 minutes max
-        poll_interval = 1  # Check more frequently
-        elapsed = 0
-        last_ready_count = 0
-        failed_batches = []
-
-        while elapsed < max_wait:
-            if batch_results.ready():
-                break
-
-            # Check how many tasks are complete and failed
-            completed_count = 0
-            for idx, result in enumerate(batch_results.results):
-                if result.ready():
-                    completed_count += 1
-                    # Check if failed
-                    if result.failed() and idx not in failed_batches:
-                        failed_batches.append(idx)
-                        logger.warning(
-                            "Batch failed during processing",
-                            batch_index=idx,
-                            total_batches=len(batches)
-                        )
-
-            # Update progress based on actual completion
-            if completed_count > last_ready_count:
-                last_ready_count = completed_count
-                progress_pct = 50 + int(40 * completed_count / len(batches))
-                status_service.update_task_progress(
-                    task_id, progress_pct,
-                    f"Completados {completed_count}/{len(batches)} lotes (fallos: {len(failed_batches)})"
-                )
-
-            time_module.sleep(poll_interval)
-            elapsed += poll_interval
-
-        if not batch_results.ready():
-            # Try to get partial results and log summary
-            completed_count = sum(1 for result in batch_results.results if result.ready())
+        # Batches completed by a previous attempt are checkpointed under their
+        # content hash; only the missing ones are dispatched again
+        batch_hashes = [storage_service.batch_hash(batch, language_hint) for batch in batches]
+        checkpoints = storage_service.get_batch_checkpoints(task_id, batch_hashes)
+        pending = [idx for idx, ckpt in enumerate(checkpoints) if ckpt is None]
+        resumed = len(batches) - len(pending)
 
-            # Log detailed timeout info
-            logger.warning(
-                "Batch processing timeout",
+        if resumed:
+            logger.info(
+                "Resuming analysis from checkpoints",
                 task_id=task_id,
-                completed=completed_count,
-                total=len(batches),
-                failed_batches=failed_batches,
-                timeout_after_seconds=elapsed
+                resumed_batches=resumed,
+                pending_batches=len(pending)
             )
 
-            # Log OpenAI metrics summary
-            if hasattr(global_metrics, 'log_batch_summary'):
-                global_metrics.log_batch_summary(
-                    total_batches=len(batches),
-                    completed_batches=completed_count,
-                    failed_batches=failed_batches
+        # Everything the finalizer needs goes to Redis, so this task can
+        # return now instead of holding a worker slot while batches run
+        context = {
+            "file_key": file_key,
+            "start_time": start_time,
+            "batch_count": len(batches),
+            "batch_hashes": batch_hashes,
+            "batch_sizes": [len(batch) for batch in batches],
+            "pending_batches": pending,
+            "deadline": deadline,
+            "dispatched_at": time.time(),
+            "model_used": settings.AI_MODEL,
+            "dedup_info": dedup_info
+        }
+        storage_service.store_task_context(task_id, context)
+        status_service.init_batch_progress(task_id, len(batches), completed=resumed)
+
+        if len(comments) <= settings.INLINE_FANOUT_MAX_COMMENTS:
+            # Small file: run every batch concurrently inside this task
+            status_service.update_task_progress(
+                task_id, 50 + int(40 * resumed / max(len(batches), 1)),
+                f"Procesando {len(pending)} lotes en este worker"
+            )
+            logger.info(
+                "Running batches inline",
+                task_id=task_id,
+                batch_count=len(batches),
+                pending=len(pending)
+            )
+            try:
+                batch_results = run_async(
+                    run_in_context(
+                        _run_batches_inline(
+                            task_id, batches, pending, batch_hashes, language_hint, batch_ratings
+                        ),
+                        AnalysisContext(task_id, priority, deadline)
+                    ),
+                    timeout=capped_timeout(settings.INLINE_FANOUT_TIMEOUT_SECONDS, deadline)
                 )
+            except (TimeoutError, DeadlineExceeded):
+                # Deadline hit: finalize with what finished plus local-only results
+                logger.warning("Inline analysis reached its deadline", task_id=task_id)
+                _complete_analysis(
+                    task_id, context, _local_only_pending_results(task_id, context, batches),
+                    deadline_expired=True
+                )
+                return task_id
 
-            raise TimeoutError(f"Batch processing timeout: {completed_count}/{len(batches)} completed")
-
-        # Now safely get the results without using .join() or .get()
-        status_service.update_task_progress(task_id, 90, "Consolidando resultados")
-
-        # Collect results using non-blocking approach
-        batch_analysis_results = []
-
-        # Use Celery's collect() method which doesn't block
-        from celery.result import allow_join_result
-
-        with allow_join_result():
-            # This context manager allows safe result collection
-            for i, result in enumerate(batch_results.results):
-                if result.successful():
-                    try:
-                        # Get the actual result data
-                        batch_data = result.get(disable_sync_subtasks=False, timeout=1)
-                        batch_analysis_results.append(batch_data)
-                    except Exception as e:
-                        logger.error(
-                            "Failed to get batch result",
-                            task_id=task_id,
-                            batch_index=i,
-                            error=str(e)
-                        )
-                        # Continue with other results
-                elif result.failed():
-                    error_info = str(result.info) if result.info else "Unknown error"
-                    logger.error(
-                        "Batch failed in final collection",
-                        task_id=task_id,
-                        batch_index=i,
-                        error=error_info,
-                        traceback=result.traceback if hasattr(result, 'traceback') else None
-                    )
-
-        final_results = analysis_service.merge_batch_results(
-            batch_analysis_results, df, task_id, start_time,
-            model_used=settings.AI_MODEL,
-            dedup_info=dedup_info
-        )
-
-        # Store results
-        status_service.update_task_progress(task_id, 95, "Guardando resultados")
-        storage_service.store_analysis_results(task_id, final_results)
+            _complete_analysis(task_id, context, batch_results)
+            return task_id
 
-        # Complete with final metrics
-        duration = time.time() - start_time
+        finalizer = finalize_analysis.s(task_id).on_error(
+            on_analysis_chord_error.s(task_id=task_id)
+        )
 
-        # Log final OpenAI metrics
-        if hasattr(global_metrics, 'log_batch_summary'):
-            successful_count = len(batch_analysis_results)
-            global_metrics.log_batch_summary(
-                total_batches=len(batches),
-                completed_batches=successful_count,
-                failed_batches=list(set(range(len(batches))) - set(range(successful_count)))
+        if pending:
+            # Batches report completion themselves; the finalizer runs once all are done
+            # Small files and high-priority uploads get their own batch lane
+            routing = {
+                "queue": batch_queue_for(len(comments), priority),
+                "priority": broker_priority(priority)
+            }
+            signatures = [
+                signature.set(**routing)
+                for signature in _batch_signature(
+                    task_id, batches, pending, batch_hashes, language_hint, deadline, priority,
+                    batch_ratings
+                )
+            ]
+            # Known IDs let a cancellation revoke the batches still queued
+            status_service.register_subtasks(task_id, [s.freeze().id for s in signatures])
+            chord(signatures)(finalizer)
+
+            # Finalize with local-only results if batches are still pending at the deadline
+            enforce_analysis_deadline.apply_async(
+                args=[task_id],
+                countdown=max(0, deadline - time.time()) + settings.DEADLINE_GRACE_SECONDS
             )
+        else:
+            finalizer.delay([])
 
-        status_service.mark_task_completed(task_id)
-        log_task_complete("analyze_feedback", task_id, duration)
+        status_service.update_task_progress(
+            task_id, 50 + int(40 * resumed / max(len(batches), 1)),
+            f"Procesando {len(pending)} lotes ({resumed} recuperados de un intento anterior)"
+            if resumed else f"Procesando {len(batches)} lotes..."
+        )
 
-        # Clean up Redis file data on success
-        try:
-            redis_client.delete(f"file_content:{task_id_param}")
-            logger.info("Redis file cleaned up on success", key=f"file_content:{task_id_param}")
-        except Exception:
-            pass  # Non-critical, Redis has TTL
+        logger.info(
+            "Batches dispatched with finalizer callback",
+            task_id=task_id,
+            batch_count=len(batches),
+            dispatched=len(pending)
+        )
 
         return task_id
 
@@ -288,24 +280,58 @@ def analyze_feedback(self, task_id_param: str, file_info: Dict[str, Any]) -> str
 @monitor_event_loop("analyze_batch_subtask")
 def analyze_batch(
     self,
-    comments: List[str],
+    comments: Optional[List[str]],
     batch_index: int,
-    language_hint: str = None
+    language_hint: str = None,
+    parent_task_id: str = None,
+    batch_hash: str = None,
+    shard: Optional[List[Any]] = None,
+    deadline: Optional[float] = None,
+    priority: str = "normal",
+    ratings: Optional[List[int]] = None
 ) -> Dict[str, Any]:
     """
     Analyze a single batch of comments.
     Now uses hybrid analysis if enabled.
 
     Args:
-        comments: List of comments to analyze
+        comments: List of comments to analyze (None when passed by reference)
         batch_index: Index of this batch
         language_hint: Optional language hint
+        parent_task_id: analyze_feedback task to report progress to
+        batch_hash: Content hash used to checkpoint the result
+        shard: (shard_key, start, end) to read the comments from Redis
+        deadline: Absolute deadline (epoch seconds) of the parent analysis
+        priority: Upload priority, used for fair scheduling of OpenAI calls
+        ratings: Ratings of the comments (hybrid cascade routing)
 
     Returns:
-        Analysis results for this batch
+        Analysis results for this batch, or a small reference marker when the
+        result was written to the per-task results area
     """
     task_id = self.request.id
 
+    # Abandoned analysis: don't spend anything on it
+    if cancellation.is_cancelled(parent_task_id):
+        logger.info("Batch skipped, analysis cancelled", batch_index=batch_index)
+        return _cancelled_batch(batch_index)
+
+    # Redelivered after a worker crash: the result may already be saved
+    if parent_task_id and batch_hash:
+        checkpoint = storage_service.get_batch_checkpoints(parent_task_id, [batch_hash])[0]
+        if checkpoint is not None:
+            logger.info("Batch already checkpointed, skipping", batch_index=batch_index)
+            return _batch_reference(batch_index) if shard else checkpoint
+
+    if comments is None:
+        comments = storage_service.load_comment_shard(*shard)
+
+    # Past the deadline the result would arrive too late; answer locally
+    if is_expired(deadline):
+        logger.warning("Batch started after the analysis deadline", batch_index=batch_index)
+        _report_batch_done(parent_task_id, failed=True)
+        return analysis_service.create_fallback_batch_result(comments)
+
     logger.info(
         "Processing batch",
         task_id=task_id,
@@ -320,14 +346,32 @@ def analyze_batch(
         if memory_status == 'critical':
             logger.warning("Critical memory, reducing batch size")
             comments = comments[:20]  # Reduce to 20 comments max
+            ratings = ratings[:20] if ratings else ratings
+
+        # OpenAI calls of this batch are scheduled fairly against other analyses
+        context = AnalysisContext(parent_task_id or task_id, priority, deadline)
 
         # Choose analyzer based on configuration
-        if settings.HYBRID_ANALYSIS_ENABLED:
-            # Use hybrid analyzer
-            analyzer = HybridAnalyzer()
+        if inflight_service.is_enabled():
+            # Comments another analysis has in flight are awaited, not re-sent
+            # (the configured analyzer is picked inside)
+            result = run_async(
+                run_in_context(
+                    analysis_service.analyze_batch_coalesced(
+                        comments, batch_index, language_hint, ratings=ratings
+                    ),
+                    context
+                ),
+                timeout=capped_timeout(settings.ASYNC_RUN_TIMEOUT_SECONDS, deadline)
+            )
+        elif settings.HYBRID_ANALYSIS_ENABLED:
+            # Use the process-wide hybrid analyzer (built at worker_process_init)
+            analyzer = get_hybrid_analyzer()
 
             # Run hybrid analysis (now synchronous)
-            result = analyzer.analyze_batch(comments, batch_index, language_hint or "es")
+            result = analyzer.analyze_batch(
+                comments, batch_index, language_hint or "es", context=context, ratings=ratings
+            )
 
             # Log memory and token savings
             logger.info(
@@ -335,34 +379,44 @@ def analyze_batch(
                 batch_index=batch_index,
                 memory_mb=MemoryMonitor.get_used_memory_mb()
             )
-
-            return result
         else:
             # Legacy approach (old OpenAI-only analyzer)
             lang_hint = Language(language_hint) if language_hint else None
 
-            # Log event loop state before creating new loop
-            log_loop_state("Before creating new event loop", batch_index=batch_index)
+            # Run on the process background loop so the pooled client keeps its connections
+            log_loop_state("Submitting batch to background loop", batch_index=batch_index)
 
-            # Run async analysis
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            result = run_async(
+                run_in_context(
+                    get_openai_analyzer().analyze_batch(comments, batch_index, lang_hint),
+                    context
+                ),
+                timeout=capped_timeout(settings.ASYNC_RUN_TIMEOUT_SECONDS, deadline)
+            )
 
-            log_loop_state("After creating new event loop",
-                          batch_index=batch_index,
-                          loop_id=id(loop))
+        # Cancelled mid-batch: the calls were skipped, the result is worthless
+        if cancellation.is_cancelled(parent_task_id):
+            return _cancelled_batch(batch_index)
 
-            try:
-                result = loop.run_until_complete(
-                    openai_analyzer.analyze_batch(comments, batch_index, lang_hint)
-                )
-                return result
-            finally:
-                log_loop_state("Before closing event loop", batch_index=batch_index)
-                loop.close()
-                log_loop_state("After closing event loop", batch_index=batch_index)
+        failed = bool(result.get("failed"))
+
+        # Failed batches are not checkpointed, so a retried analysis re-runs them
+        stored = bool(parent_task_id and batch_hash and not failed)
+        if stored:
+            storage_service.store_batch_checkpoint(parent_task_id, batch_hash, result)
+
+        _report_batch_done(parent_task_id, failed=failed)
+
+        # Result already lives in Redis; keep it out of celery-task-meta-*
+        if shard and stored:
+            return _batch_reference(batch_index)
+        return result
 
     except Exception as e:
+        if isinstance(e, TaskCancelled) or cancellation.is_cancelled(parent_task_id):
+            logger.info("Batch stopped, analysis cancelled", batch_index=batch_index)
+            return _cancelled_batch(batch_index)
+
         logger.error(
             "Batch analysis failed",
             task_id=task_id,
@@ -370,24 +424,718 @@ def analyze_batch(
             error=str(e),
             retry_count=self.request.retries
         )
-        # Retry with exponential backoff
-        if self.request.retries < self.max_retries:
-            retry_delay = 5 * (2 ** self.request.retries)  # 5, 10 seconds
+        # Retry with exponential backoff, unless the retry can't finish before the deadline
+        retry_delay = 5 * (2 ** self.request.retries)  # 5, 10 seconds
+        remaining = remaining_seconds(deadline)
+        can_meet_deadline = (
+            remaining is None
+            or remaining > retry_delay + settings.DEADLINE_MIN_CALL_SECONDS
+        )
+        if self.request.retries < self.max_retries and can_meet_deadline:
             logger.info(
                 "Retrying batch analysis",
                 batch_index=batch_index,
                 retry_in=retry_delay
             )
             raise self.retry(countdown=retry_delay)
+
+        # Out of retries: return placeholder results instead of failing the
+        # chord, so the finalizer still runs and row indices stay aligned
+        _report_batch_done(parent_task_id, failed=True)
+        return analysis_service.create_fallback_batch_result(comments)
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=10)
+def finalize_analysis(self, batch_results: List[Dict[str, Any]], task_id: str) -> str:
+    """
+    Chord callback: merge batch results and store the final analysis.
+
+    Args:
+        batch_results: Results of every analyze_batch, in batch order
+        task_id: analyze_feedback task ID
+
+    Returns:
+        Task ID for result retrieval
+    """
+    context = storage_service.get_task_context(task_id)
+    if not context:
+        error = "Analysis context expired before batches completed"
+        status_service.mark_task_failed(task_id, error)
+        log_task_error("finalize_analysis", task_id, error)
+        return task_id
+
+    try:
+        if not _complete_analysis(task_id, context, batch_results):
+            logger.info("Analysis already finalized", task_id=task_id)
+        return task_id
+
+    except Exception as e:
+        logger.error("Finalizing analysis failed", task_id=task_id, error=str(e), exc_info=True)
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=10 * (self.request.retries + 1))
+        status_service.mark_task_failed(task_id, str(e))
+        raise
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=10)
+@monitor_event_loop("analyze_shard_subtask")
+def analyze_shard(
+    self,
+    task_id: str,
+    shard_index: int,
+    row_offset: int,
+    language_hint: str = None,
+    priority: str = "normal",
+    deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Map step of sharded mode: dedup, cache lookup and analysis of one row shard.
+    The rows and partial aggregate are written to Redis; only stats are returned.
+
+    Args:
+        task_id: analyze_feedback task ID
+        shard_index: Shard number
+        row_offset: Index of the shard's first row in the whole file
+        language_hint: Optional language hint
+        priority: Upload priority, used for fair scheduling of OpenAI calls
+        deadline: Analysis deadline; batches unfinished by then go local-only
+
+    Returns:
+        Shard stats
+    """
+    if cancellation.is_cancelled(task_id):
+        logger.info("Shard skipped, analysis cancelled", task_id=task_id, shard_index=shard_index)
+        return {"shard_index": shard_index, "cancelled": True}
+
+    # Retried parent or redelivered message: shard already done
+    if storage_service.has_shard_result(task_id, shard_index):
+        logger.info("Shard already analyzed, skipping", task_id=task_id, shard_index=shard_index)
+        return {"shard_index": shard_index, "stored": True}
+
+    try:
+        comments, ratings = storage_service.load_row_shard(task_id, shard_index)
+
+        result = analysis_service.analyze_row_shard(
+            comments, ratings, language_hint, row_offset,
+            cache_manager=CommentCacheManager(redis_client),
+            context=AnalysisContext(task_id, priority, deadline)
+        )
+        storage_service.store_shard_result(task_id, shard_index, result)
+
+        stats = result["stats"]
+        logger.info("Shard analyzed", task_id=task_id, shard_index=shard_index, **stats)
+
+        _report_batch_done(task_id, failed=stats["failed_batches"] > 0)
+        return {"shard_index": shard_index, "stored": True, **stats}
+
+    except Exception as e:
+        if isinstance(e, TaskCancelled) or cancellation.is_cancelled(task_id):
+            logger.info("Shard stopped, analysis cancelled", task_id=task_id, shard_index=shard_index)
+            return {"shard_index": shard_index, "cancelled": True}
+
+        logger.error(
+            "Shard analysis failed",
+            task_id=task_id,
+            shard_index=shard_index,
+            error=str(e),
+            retry_count=self.request.retries
+        )
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=10 * (2 ** self.request.retries))
         raise
 
 
-# Function removed - monitoring now done inline in analyze_feedback
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=10)
+def reduce_shards(self, shard_stats: List[Dict[str, Any]], task_id: str) -> str:
+    """
+    Reduce step of sharded mode: merge shard partials into the final results.
+
+    Args:
+        shard_stats: Stats returned by every analyze_shard (the stored shard
+            results carry them too, including shards done by earlier attempts)
+        task_id: analyze_feedback task ID
+
+    Returns:
+        Task ID for result retrieval
+    """
+    if cancellation.is_cancelled(task_id):
+        _discard_cancelled(task_id, storage_service.get_task_context(task_id))
+        return task_id
+
+    context = storage_service.get_task_context(task_id)
+    if not context:
+        error = "Analysis context expired before shards completed"
+        status_service.mark_task_failed(task_id, error)
+        log_task_error("reduce_shards", task_id, error)
+        return task_id
+
+    try:
+        _complete_sharded_analysis(task_id, context)
+        return task_id
+
+    except Exception as e:
+        logger.error("Reducing shards failed", task_id=task_id, error=str(e), exc_info=True)
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=10 * (self.request.retries + 1))
+        status_service.mark_task_failed(task_id, str(e))
+        raise
+
+
+def _complete_sharded_analysis(
+    task_id: str,
+    context: Dict[str, Any],
+    deadline_expired: bool = False
+) -> bool:
+    """
+    Merge shard results, store the final analysis and clean up working state.
+    Runs at most once per analysis (reducer vs. deadline watchdog); at the
+    deadline, shards without a result are analyzed local-only first.
+
+    Args:
+        task_id: analyze_feedback task ID
+        context: Task context (file key, start time, shard layout, deadline)
+        deadline_expired: Called by the deadline watchdog
+
+    Returns:
+        False if another finalizer already completed the analysis
+    """
+    if not status_service.claim_finalization(task_id):
+        return False
+
+    try:
+        _reduce_and_store(task_id, context, deadline_expired)
+    except Exception:
+        # Let a retry (or the other finalizer) try again
+        status_service.release_finalization(task_id)
+        raise
+
+    return True
+
+
+def _reduce_and_store(task_id: str, context: Dict[str, Any], deadline_expired: bool) -> None:
+    """Reduce, store and clean up for _complete_sharded_analysis."""
+    start_time = context["start_time"]
+    shard_count = context["shard_count"]
+
+    status_service.update_task_progress(task_id, 90, "Combinando fragmentos")
+
+    partials = []
+    rows = []
+    shard_stats = []
+    for shard_index in range(shard_count):
+        shard = storage_service.get_shard_result(task_id, shard_index)
+        if shard is None and deadline_expired:
+            shard = _local_only_shard(task_id, context, shard_index)
+        if shard is None:
+            raise KeyError(f"Result of shard {shard_index} not found")
+        partials.append(shard["partial"])
+        rows.extend(shard["rows"])
+        shard_stats.append(shard.get("stats", {}))
+
+    final_results = UnifiedAggregator.format_response_from_partial(
+        task_id=task_id,
+        partial=UnifiedAggregator.merge_partials(partials),
+        rows=rows,
+        processing_time=time.time() - start_time,
+        model_used=context.get("model_used", settings.AI_MODEL),
+        batch_count=sum(s.get("batches", 0) for s in shard_stats)
+    )
+    final_results["metadata"]["shards_processed"] = shard_count
+    final_results["metadata"]["deadline_expired"] = deadline_expired or any(
+        s.get("deadline_expired") for s in shard_stats
+    )
+    final_results["metadata"]["local_only_batches"] = sum(
+        s.get("failed_batches", 0) for s in shard_stats
+    )
+    final_results["metadata"]["degraded"] = (
+        final_results["metadata"]["deadline_expired"]
+        or final_results["metadata"]["local_only_batches"] > 0
+    )
+
+    cascade = summarize(merge_stats([s.get("cascade") for s in shard_stats]))
+    if cascade:
+        final_results["metadata"]["model_cascade"] = cascade
+        logger.info("Model cascade summary", task_id=task_id, **cascade)
+
+    status_service.update_task_progress(task_id, 95, "Guardando resultados")
+    storage_service.store_analysis_results(task_id, final_results)
+
+    status_service.mark_task_completed(task_id)
+    log_task_complete("analyze_feedback", task_id, time.time() - start_time)
+
+    # Clean up Redis file data and working state on success
+    try:
+        redis_client.delete(context["file_key"])
+        storage_service.delete_task_context(task_id)
+        storage_service.delete_shard_data(task_id, shard_count)
+        status_service.clear_batch_progress(task_id)
+        status_service.clear_subtasks(task_id)
+    except Exception:
+        pass  # Non-critical, Redis has TTL
+
+
+def _local_only_shard(task_id: str, context: Dict[str, Any], shard_index: int) -> Dict[str, Any]:
+    """Result of a shard still pending at the deadline: cached or local-only, no OpenAI calls."""
+    comments, ratings = storage_service.load_row_shard(task_id, shard_index)
+    result = analysis_service.analyze_row_shard(
+        comments, ratings, context.get("language_hint"),
+        shard_index * context["shard_rows"],
+        cache_manager=CommentCacheManager(redis_client),
+        context=AnalysisContext(task_id, context.get("priority", "normal"), context.get("deadline"))
+    )
+    logger.warning("Shard finalized local-only at deadline", task_id=task_id, shard_index=shard_index)
+    return result
+
+
+@celery_app.task
+def on_analysis_chord_error(request, exc, traceback, task_id: str = None) -> None:
+    """Errback for the batch chord: mark the parent analysis as failed."""
+    error = f"Batch processing failed: {exc}"
+    logger.error("Analysis chord failed", task_id=task_id, failed_task=request.id, error=str(exc))
+    if task_id and not status_service.is_finalization_claimed(task_id):
+        status_service.mark_task_failed(task_id, error)
+
+
+@celery_app.task
+def enforce_analysis_deadline(task_id: str) -> None:
+    """
+    Deadline watchdog: if the chord has not finalized the analysis by its
+    deadline, finalize it now with checkpointed results plus local-only
+    results for the batches (or, in sharded mode, shards) still pending.
+
+    Args:
+        task_id: analyze_feedback task ID
+    """
+    context = storage_service.get_task_context(task_id)
+    if not context or status_service.is_finalization_claimed(task_id):
+        return  # Already finalized
+    if cancellation.is_cancelled(task_id):
+        _discard_cancelled(task_id, context)
+        return
+
+    # A retried analysis has a later deadline and its own watchdog
+    if not is_expired(context.get("deadline")):
+        return
+
+    try:
+        if "shard_count" in context:
+            finalized = _complete_sharded_analysis(task_id, context, deadline_expired=True)
+        else:
+            batches = _load_context_batches(task_id, context)
+            finalized = _complete_analysis(
+                task_id, context, _local_only_pending_results(task_id, context, batches),
+                deadline_expired=True
+            )
+        if finalized:
+            logger.warning("Analysis finalized by deadline watchdog", task_id=task_id)
+
+    except Exception as e:
+        logger.error("Deadline finalization failed", task_id=task_id, error=str(e), exc_info=True)
+        status_service.mark_task_failed(task_id, f"Deadline finalization failed: {e}")
+
+
+def _dispatch_row_shards(
+    task_id: str,
+    df: pd.DataFrame,
+    file_key: str,
+    start_time: float,
+    priority: str = "normal"
+) -> str:
+    """
+    Split a large file into row shards and dispatch the map-reduce chord.
+    Each shard is deduplicated and analyzed independently, so capacity grows
+    with the number of worker nodes.
+
+    Returns:
+        Task ID for result retrieval
+    """
+    comments = df['Comentario Final'].tolist()
+    ratings = [int(r) for r in df['Nota'].tolist()]
+    if 'detected_language' in df.columns and not df['detected_language'].empty:
+        language_hint = df['detected_language'].iloc[0]
+    else:
+        language_hint = 'es'
+
+    shard_rows = settings.SHARD_ROWS
+    offsets = list(range(0, len(comments), shard_rows))
+
+    # Shards dedup on their own; distinct comments across the file size the budget
+    deadline = deadline_service.compute_deadline(len(set(comments)), start_time)
+
+    for shard_index, offset in enumerate(offsets):
+        storage_service.store_row_shard(
+            task_id, shard_index,
+            comments[offset:offset + shard_rows],
+            ratings[offset:offset + shard_rows]
+        )
+
+    storage_service.store_task_context(task_id, {
+        "file_key": file_key,
+        "start_time": start_time,
+        "shard_count": len(offsets),
+        "shard_rows": shard_rows,
+        "total_rows": len(comments),
+        "language_hint": language_hint,
+        "priority": priority,
+        "deadline": deadline,
+        "model_used": settings.AI_MODEL
+    })
+
+    resumed = sum(1 for i in range(len(offsets)) if storage_service.has_shard_result(task_id, i))
+    status_service.init_batch_progress(task_id, len(offsets), completed=resumed)
+
+    reducer = reduce_shards.s(task_id).on_error(
+        on_analysis_chord_error.s(task_id=task_id)
+    )
+    signatures = [
+        analyze_shard.s(task_id, shard_index, offset, language_hint, priority, deadline).set(
+            priority=broker_priority(priority)
+        )
+        for shard_index, offset in enumerate(offsets)
+    ]
+    status_service.register_subtasks(task_id, [s.freeze().id for s in signatures])
+    chord(signatures)(reducer)
+
+    # Finalize with local-only shards if some are still pending at the deadline
+    enforce_analysis_deadline.apply_async(
+        args=[task_id],
+        countdown=max(0, deadline - time.time()) + settings.DEADLINE_GRACE_SECONDS
+    )
+
+    status_service.update_task_progress(
+        task_id, 30,
+        f"Procesando {len(comments)} filas en {len(offsets)} fragmentos"
+    )
+    logger.info(
+        "Row shards dispatched",
+        task_id=task_id,
+        rows=len(comments),
+        shard_count=len(offsets),
+        resumed=resumed
+    )
+
+    return task_id
+
+
+def _complete_analysis(
+    task_id: str,
+    context: Dict[str, Any],
+    batch_results: List[Dict[str, Any]],
+    deadline_expired: bool = False
+) -> bool:
+    """
+    Merge batch results, store the final analysis and clean up working state.
+    Runs at most once per analysis (chord finalizer vs. deadline watchdog).
+
+    Args:
+        task_id: analyze_feedback task ID
+        context: Task context (file key, start time, dedup info, batch layout)
+        batch_results: Results of the batches dispatched in this attempt
+        deadline_expired: Pending batches were replaced by local-only results
+
+    Returns:
+        False if another finalizer already completed the analysis, or the
+        analysis was cancelled
+    """
+    if cancellation.is_cancelled(task_id):
+        _discard_cancelled(task_id, context)
+        return False
+
+    if not status_service.claim_finalization(task_id):
+        return False
+
+    try:
+        _merge_and_store(task_id, context, batch_results, deadline_expired)
+    except Exception:
+        # Let a retry (or the other finalizer) try again
+        status_service.release_finalization(task_id)
+        raise
+
+    return True
+
+
+def _merge_and_store(
+    task_id: str,
+    context: Dict[str, Any],
+    batch_results: List[Dict[str, Any]],
+    deadline_expired: bool
+) -> None:
+    """Merge, store and clean up for _complete_analysis."""
+    start_time = context["start_time"]
+
+    status_service.update_task_progress(task_id, 90, "Consolidando resultados")
+
+    # Resumed batches come from checkpoints, dispatched ones from this attempt
+    batch_results = _assemble_batch_results(task_id, context, batch_results)
+
+    # NPS is computed from every row's rating, duplicates included
+    ratings_df = pd.DataFrame({"Nota": context["dedup_info"]["all_ratings"]})
+
+    final_results = analysis_service.merge_batch_results(
+        batch_results, ratings_df, task_id, start_time,
+        model_used=context.get("model_used", settings.AI_MODEL),
+        dedup_info=context["dedup_info"]
+    )
+
+    failed_batches = sum(1 for r in batch_results if r.get("failed"))
+    final_results["metadata"]["deadline_expired"] = deadline_expired
+    final_results["metadata"]["local_only_batches"] = failed_batches
+    final_results["metadata"]["degraded"] = deadline_expired or failed_batches > 0
+
+    # Store results
+    status_service.update_task_progress(task_id, 95, "Guardando resultados")
+    storage_service.store_analysis_results(task_id, final_results)
+
+    # Model throughput of clean, on-time analyses feeds the next deadlines
+    if not deadline_expired and not failed_batches:
+        deadline_service.record_throughput(
+            _llm_routed_count(batch_results, context.get("pending_batches", [])),
+            time.time() - context.get("dispatched_at", start_time)
+        )
+
+    # Log final OpenAI metrics
+    if hasattr(global_metrics, 'log_batch_summary'):
+        failed = [i for i, r in enumerate(batch_results) if r.get("failed")]
+        global_metrics.log_batch_summary(
+            total_batches=len(batch_results),
+            completed_batches=len(batch_results) - len(failed),
+            failed_batches=failed
+        )
+
+    status_service.mark_task_completed(task_id)
+    log_task_complete("analyze_feedback", task_id, time.time() - start_time)
+
+    # Clean up Redis file data and working state on success
+    try:
+        redis_client.delete(context["file_key"])
+        storage_service.delete_task_context(task_id)
+        storage_service.delete_batch_checkpoints(task_id)
+        storage_service.delete_comment_shard(task_id)
+        status_service.clear_batch_progress(task_id)
+        status_service.clear_subtasks(task_id)
+        logger.info("Redis file cleaned up on success", key=context["file_key"])
+    except Exception:
+        pass  # Non-critical, Redis has TTL
+
+
+async def _run_batches_inline(
+    task_id: str,
+    batches: List[List[str]],
+    pending: List[int],
+    batch_hashes: List[str],
+    language_hint: str,
+    batch_ratings: Optional[List[List[int]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Analyze the pending batches concurrently on the worker's event loop.
+    Used for small files, where chord messages and result-backend writes
+    cost more than the analysis itself.
+
+    Returns:
+        Batch results in the order of `pending`
+    """
+    async def on_batch_done(idx: int, result: Dict[str, Any], failed: bool) -> None:
+        # Redis calls are blocking; keep them off the loop
+        if not failed:
+            await asyncio.to_thread(
+                storage_service.store_batch_checkpoint, task_id, batch_hashes[idx], result
+            )
+        await asyncio.to_thread(_report_batch_done, task_id, failed)
+
+    return await analysis_service.analyze_batches_concurrently(
+        batches, pending, language_hint, on_batch_done=on_batch_done, batch_ratings=batch_ratings
+    )
+
+
+def _batch_signature(
+    task_id: str,
+    batches: List[List[str]],
+    pending: List[int],
+    batch_hashes: List[str],
+    language_hint: str,
+    deadline: Optional[float] = None,
+    priority: str = "normal",
+    batch_ratings: Optional[List[List[int]]] = None
+):
+    """
+    Build analyze_batch signatures for the pending batches.
+    The comments are always written once to a Redis shard (the deadline
+    watchdog reads it); by reference, each message carries only
+    (shard_key, start, end). Ratings (a few bytes per comment) always
+    travel in the message.
+    """
+    shard_key = storage_service.store_comment_shard(
+        task_id, [comment for batch in batches for comment in batch]
+    )
+
+    if not settings.PASS_BATCHES_BY_REFERENCE:
+        return [
+            analyze_batch.s(
+                batches[idx], idx, language_hint,
+                parent_task_id=task_id, batch_hash=batch_hashes[idx],
+                deadline=deadline, priority=priority,
+                ratings=batch_ratings[idx] if batch_ratings else None
+            )
+            for idx in pending
+        ]
+
+    offsets = _batch_offsets([len(batch) for batch in batches])
+
+    return [
+        analyze_batch.s(
+            None, idx, language_hint,
+            parent_task_id=task_id,
+            batch_hash=batch_hashes[idx],
+            shard=[shard_key, offsets[idx], offsets[idx + 1]],
+            deadline=deadline,
+            priority=priority,
+            ratings=batch_ratings[idx] if batch_ratings else None
+        )
+        for idx in pending
+    ]
+
+
+def _batch_offsets(batch_sizes: List[int]) -> List[int]:
+    """Start offset of every batch in the comment shard, plus the total."""
+    offsets = [0]
+    for size in batch_sizes:
+        offsets.append(offsets[-1] + size)
+    return offsets
+
+
+def _load_context_batches(task_id: str, context: Dict[str, Any]) -> List[List[str]]:
+    """Rebuild the batches of an analysis from its comment shard."""
+    offsets = _batch_offsets(context.get("batch_sizes", []))
+    comments = storage_service.load_comment_shard(f"task_shard:{task_id}", 0, offsets[-1])
+    return [comments[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _local_only_pending_results(
+    task_id: str,
+    context: Dict[str, Any],
+    batches: List[List[str]]
+) -> List[Dict[str, Any]]:
+    """
+    Results for the pending batches at the deadline: a stored marker for the
+    ones that finished (read from checkpoints), local-only results for the rest
+    (scored in one pass, across processes for large files).
+    """
+    checkpoints = storage_service.get_batch_checkpoints(task_id, context["batch_hashes"])
+    pending = context.get("pending_batches", [])
+
+    unfinished = [idx for idx in pending if checkpoints[idx] is None]
+    fallbacks = dict(zip(
+        unfinished,
+        analysis_service.create_fallback_batch_results([batches[idx] for idx in unfinished])
+    ))
+
+    results = []
+    for idx in pending:
+        if idx in fallbacks:
+            result = fallbacks[idx]
+            result["deadline_expired"] = True
+            results.append(result)
+        else:
+            results.append(_batch_reference(idx))
+
+    return results
+
+
+def _discard_cancelled(task_id: str, context: Optional[Dict[str, Any]]) -> None:
+    """Drop the working state of a cancelled analysis instead of finalizing it."""
+    logger.info("Discarding cancelled analysis", task_id=task_id)
+    try:
+        if context:
+            redis_client.delete(context["file_key"])
+            if context.get("shard_count"):
+                storage_service.delete_shard_data(task_id, context["shard_count"])
+        storage_service.delete_task_context(task_id)
+        storage_service.delete_batch_checkpoints(task_id)
+        storage_service.delete_comment_shard(task_id)
+        status_service.clear_batch_progress(task_id)
+        status_service.clear_subtasks(task_id)
+    except Exception:
+        pass  # Non-critical, Redis has TTL
+
+
+def _cancelled_batch(batch_index: int) -> Dict[str, Any]:
+    """Result of a batch skipped because its analysis was cancelled."""
+    return {"batch_index": batch_index, "cancelled": True}
+
+
+def _batch_reference(batch_index: int) -> Dict[str, Any]:
+    """Marker returned instead of the batch result when it is stored in Redis."""
+    return {"batch_index": batch_index, "stored": True}
+
+
+def _assemble_batch_results(
+    task_id: str,
+    context: Dict[str, Any],
+    chord_results: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Rebuild the ordered list of batch results from checkpoints plus the
+    results of the batches dispatched in this attempt.
+    """
+    batch_hashes = context.get("batch_hashes")
+    if not batch_hashes:
+        return chord_results
+
+    results = storage_service.get_batch_checkpoints(task_id, batch_hashes)
+
+    # Failed batches are not checkpointed; take their placeholder from the chord
+    for position, idx in enumerate(context.get("pending_batches", [])):
+        if results[idx] is None and position < len(chord_results):
+            if not chord_results[position].get("stored"):
+                results[idx] = chord_results[position]
+
+    # Checkpoint lost (expired) - keep row alignment with default results
+    batch_sizes = context.get("batch_sizes", [])
+    for idx, result in enumerate(results):
+        if result is None:
+            size = batch_sizes[idx] if idx < len(batch_sizes) else 0
+            results[idx] = {
+                "comments": [analysis_service.create_default_result(i) for i in range(size)],
+                "failed": True
+            }
+
+    return results
+
+
+def _llm_routed_count(batch_results: List[Dict[str, Any]], dispatched: List[int]) -> int:
+    """Comments answered by the model in the batches dispatched by this attempt."""
+    return sum(
+        1
+        for idx in dispatched if idx < len(batch_results)
+        for result in batch_results[idx].get("comments", [])
+        if result.get("source", "llm") == "llm"
+    )
+
+
+def _report_batch_done(parent_task_id: str, failed: bool) -> None:
+    """Count a finished batch towards the parent's progress (never raises)."""
+    if not parent_task_id:
+        return
+
+    try:
+        done, failed_count, total = status_service.record_batch_completed(parent_task_id, failed)
+        if total:
+            status_service.update_task_progress(
+                parent_task_id,
+                50 + int(40 * done / total),
+                f"Completados {done}/{total} lotes (fallos: {failed_count})"
+            )
+    except Exception as e:
+        logger.warning("Failed to report batch progress", task_id=parent_task_id, error=str(e))
 
 
 def _handle_task_error(task_obj: Any, task_id: str, error: str, start_time: float):
     """Handle task error and retry logic."""
     duration = time.time() - start_time
+    if cancellation.is_cancelled(task_id):
+        logger.info("Cancelled analysis failed, not retrying", task_id=task_id, error=error)
+        return
+
     status_service.mark_task_failed(task_id, error)
     log_task_error("analyze_feedback", task_id, error)
 
@@ -403,104 +1151,24 @@ def _handle_task_error(task_obj: Any, task_id: str, error: str, start_time: floa
 @celery_app.task
 def cleanup_expired_tasks() -> Dict[str, Any]:
     """
-    Periodic task to clean up expired results from Redis.
-    Runs every hour and removes tasks older than TTL.
+    Periodic task to clean up expired tasks from Redis.
+    Runs every hour; pops expired entries from the task registry and deletes
+    their keys in pipelined batches, instead of scanning the whole keyspace.
 
     Returns:
         Statistics about the cleanup operation
     """
-    import redis
-    from datetime import datetime, timedelta
-    from app.config import settings
-
     logger.info("Starting cleanup of expired tasks")
+    started = time.time()
 
     try:
-        # Connect to Redis
-        r = redis.from_url(settings.REDIS_URL)
-
-        # Get current time and expiry threshold
-        now = datetime.utcnow()
-        expiry_time = now - timedelta(seconds=settings.RESULTS_TTL_SECONDS)
-        expiry_timestamp = expiry_time.timestamp()
-
-        # Track statistics
-        stats = {
-            "checked": 0,
-            "deleted": 0,
-            "errors": 0,
-            "start_time": now.isoformat(),
-        }
-
-        # Scan for task keys
-        for key in r.scan_iter(match="celery-task-meta-*"):
-            stats["checked"] += 1
-
-            try:
-                # Get task metadata
-                task_data = r.get(key)
-                if not task_data:
-                    continue
-
-                import json
-                task_meta = json.loads(task_data)
-
-                # Check if task is expired based on date_done
-                if "date_done" in task_meta:
-                    # Parse the date_done timestamp
-                    task_timestamp = datetime.fromisoformat(
-                        task_meta["date_done"].replace("Z", "+00:00")
-                    ).timestamp()
-
-                    # Delete if expired
-                    if task_timestamp < expiry_timestamp:
-                        r.delete(key)
-                        stats["deleted"] += 1
-
-                        # Also try to delete associated result data
-                        result_key = key.replace("celery-task-meta-", "result-")
-                        if r.exists(result_key):
-                            r.delete(result_key)
-
-            except Exception as e:
-                stats["errors"] += 1
-                logger.error(
-                    "Error processing task key",
-                    key=key.decode() if isinstance(key, bytes) else key,
-                    error=str(e)
-                )
-
-        # Clean up orphaned result keys
-        for key in r.scan_iter(match="result-*"):
-            stats["checked"] += 1
-
-            try:
-                # Check TTL
-                ttl = r.ttl(key)
-                if ttl == -1:  # No TTL set
-                    # Set a TTL to ensure cleanup
-                    r.expire(key, settings.RESULTS_TTL_SECONDS)
-                elif ttl == -2:  # Key doesn't exist
-                    continue
-
-            except Exception as e:
-                stats["errors"] += 1
-                logger.error(
-                    "Error processing result key",
-                    key=key.decode() if isinstance(key, bytes) else key,
-                    error=str(e)
-                )
-
-        stats["end_time"] = datetime.utcnow().isoformat()
-        stats["duration_seconds"] = (
-            datetime.utcnow() - now
-        ).total_seconds()
+        stats = registry_service.purge_expired_tasks()
+        stats["duration_seconds"] = round(time.time() - started, 3)
 
         logger.info(
             "Cleanup completed",
-            checked=stats["checked"],
-            deleted=stats["deleted"],
-            errors=stats["errors"],
+            purged=stats["purged"],
+            keys_deleted=stats["keys_deleted"],
             duration=stats["duration_seconds"]
         )
 
@@ -508,4 +1176,4 @@ def cleanup_expired_tasks() -> Dict[str, Any]:
 
     except Exception as e:
         logger.error("Cleanup task failed", error=str(e))
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,211 @@
+"""
+Per-process worker resources.
+OpenAI client pool, analyzers and thread pools are built once per worker
+process (at worker_process_init, or worker_init in asyncio mode) and reused
+by every task, instead of once per batch.
+
+Warm start: read-only assets (VADER lexicon, tokenizer, heavy imports) load
+in the worker parent before the pool forks, so children share them
+copy-on-write; each child then opens its own Redis connections before its
+first task. The ready file is written only once the parent has warmed up.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+import structlog
+from celery.signals import (
+    worker_init,
+    worker_ready,
+    worker_shutdown,
+    worker_process_init,
+    worker_process_shutdown
+)
+
+from app.config import settings
+from app.utils.event_loop_manager import get_loop_runner, run_async, stop_loop_runner
+
+logger = structlog.get_logger()
+
+_resources: Dict[str, Any] = {}
+_resources_pid: Optional[int] = None
+
+
+def init_worker_resources() -> None:
+    """Build the per-process singletons and start the loop thread (idempotent, fork-aware)."""
+    global _resources, _resources_pid
+
+    if _resources_pid == os.getpid() and _resources:
+        return
+
+    from app.adapters.openai.client_pool import create_client_pool
+    from app.adapters.openai.analyzer import OpenAIAnalyzer
+
+    client_pool = create_client_pool()
+    openai_analyzer = OpenAIAnalyzer(client_pool=client_pool)
+
+    resources = {
+        "client_pool": client_pool,
+        "openai_analyzer": openai_analyzer,
+    }
+
+    if settings.HYBRID_ANALYSIS_ENABLED:
+        from app.adapters.hybrid_analyzer import HybridAnalyzer
+        resources["hybrid_analyzer"] = HybridAnalyzer(openai_analyzer=openai_analyzer)
+
+    _resources = resources
+    _resources_pid = os.getpid()
+
+    # Start the background loop now so the first task doesn't pay for it
+    get_loop_runner().start()
+
+    logger.info(
+        "Worker resources initialized",
+        pid=_resources_pid,
+        openai_keys=len(client_pool.members),
+        hybrid_enabled=settings.HYBRID_ANALYSIS_ENABLED
+    )
+
+
+def preload_shared_assets() -> None:
+    """
+    Load immutable assets and heavy modules (call before forking).
+    Must not open sockets: connections would be shared by the children.
+    """
+    started = time.time()
+
+    from app.adapters.keyword_matcher import get_emotion_matcher, get_pain_matcher
+    from app.adapters.local_sentiment import get_vader
+    from app.adapters.spanish_sentiment import get_spanish_scorer
+    from app.adapters.openai.utils import _get_tokenizer
+    import app.adapters.hybrid_analyzer  # noqa: F401 - openai, psutil
+    import app.services.analysis_service  # noqa: F401 - pandas, aggregation, dedup
+
+    get_vader()
+    get_spanish_scorer()
+    get_emotion_matcher()
+    get_pain_matcher()
+    tokenizer_loaded = bool(_get_tokenizer())
+
+    logger.info(
+        "Shared assets preloaded",
+        pid=os.getpid(),
+        tokenizer_loaded=tokenizer_loaded,
+        duration=round(time.time() - started, 2)
+    )
+
+
+def open_connections() -> None:
+    """Open this process' Redis connections now instead of on the first task."""
+    from app.services import (
+        deadline_service,
+        inflight_service,
+        registry_service,
+        status_service,
+        storage_service
+    )
+    from app.utils import cancellation
+
+    for module in (
+        status_service, storage_service, deadline_service,
+        inflight_service, registry_service, cancellation
+    ):
+        try:
+            module.redis_client.ping()
+        except Exception as e:
+            logger.warning("Redis warm-up failed", client=module.__name__, error=str(e))
+
+
+def _ready_file() -> Optional[Path]:
+    """Readiness marker path, if configured."""
+    return Path(settings.WORKER_READY_FILE) if settings.WORKER_READY_FILE else None
+
+
+def shutdown_worker_resources() -> None:
+    """Close HTTP pools, thread pools and the background loop."""
+    global _resources, _resources_pid
+
+    if _resources_pid != os.getpid() or not _resources:
+        return
+
+    hybrid = _resources.get("hybrid_analyzer")
+    if hybrid is not None:
+        hybrid.close()
+
+    try:
+        run_async(_resources["client_pool"].aclose(), timeout=10)
+    except Exception as e:
+        logger.warning("Failed to close OpenAI client pool", error=str(e))
+
+    stop_loop_runner()
+    _resources = {}
+    _resources_pid = None
+    logger.info("Worker resources released", pid=os.getpid())
+
+
+def get_openai_analyzer():
+    """Get the process-wide OpenAIAnalyzer."""
+    init_worker_resources()
+    return _resources["openai_analyzer"]
+
+
+def get_hybrid_analyzer():
+    """Get the process-wide HybridAnalyzer."""
+    init_worker_resources()
+    return _resources["hybrid_analyzer"]
+
+
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    """Build resources in each forked child, before the first task."""
+    init_worker_resources()
+    open_connections()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs) -> None:
+    """Release resources when the child exits (e.g. max_tasks_per_child)."""
+    shutdown_worker_resources()
+
+
+@worker_init.connect
+def _on_worker_init(**kwargs) -> None:
+    """
+    Warm up the worker parent before the pool starts. In asyncio mode there
+    is no fork: build resources in the worker itself.
+    """
+    ready_file = _ready_file()
+    if ready_file is not None:
+        ready_file.unlink(missing_ok=True)
+
+    preload_shared_assets()
+
+    if settings.WORKER_POOL_MODE == "asyncio":
+        # Before any thread starts: the scoring pool's forkserver must be clean
+        from app.adapters.local_pool import start_pool
+        start_pool()
+        init_worker_resources()
+        open_connections()
+
+
+@worker_ready.connect
+def _on_worker_ready(**kwargs) -> None:
+    """Report readiness (warm-up is done by now)."""
+    ready_file = _ready_file()
+    if ready_file is not None:
+        ready_file.write_text(str(os.getpid()))
+    logger.info("Worker ready", pid=os.getpid())
+
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs) -> None:
+    """Withdraw readiness; release resources on warm shutdown in asyncio mode."""
+    ready_file = _ready_file()
+    if ready_file is not None:
+        ready_file.unlink(missing_ok=True)
+
+    if settings.WORKER_POOL_MODE == "asyncio":
+        from app.adapters.local_pool import stop_pool
+        shutdown_worker_resources()
+        stop_pool()
@@ -10,17 +10,35 @@ echo "====================================="
 
 # Display environment info
 echo "Python version: $(python --version)"
+# Pool mode: prefork (one batch per process) or asyncio (many batches per
+# process on a shared event loop, task slots are lightweight threads)
+if [ "${WORKER_POOL_MODE:-prefork}" = "asyncio" ]; then
+    POOL=threads
+    CONCURRENCY=${CELERY_ASYNC_CONCURRENCY:-32}
+else
+    POOL=prefork
+    CONCURRENCY=${CELERY_WORKER_CONCURRENCY:-2}
+fi
+
 echo "Celery configuration:"
-echo "  - Concurrency: ${CELERY_WORKER_CONCURRENCY:-2}"
+echo "  - Pool mode: ${WORKER_POOL_MODE:-prefork} (--pool=${POOL})"
+echo "  - Concurrency: ${CONCURRENCY}"
 echo "  - Log level: ${CELERY_LOG_LEVEL:-info}"
 echo "  - Max tasks per child: ${CELERY_MAX_TASKS_PER_CHILD:-100}"
 
+# Queues this worker consumes. Deploy separate services with subsets, e.g.
+# CELERY_QUEUES=orchestration,batches_small for a latency-sensitive pool and
+# CELERY_QUEUES=batches_large for bulk files.
+QUEUES=${CELERY_QUEUES:-celery,orchestration,batches_small,batches_large,maintenance}
+echo "  - Queues: ${QUEUES}"
+
 # Start Celery worker with proper configuration
 celery -A app.workers.celery_app worker \
     --loglevel=${CELERY_LOG_LEVEL:-info} \
-    --concurrency=${CELERY_WORKER_CONCURRENCY:-2} \
+    --concurrency=${CONCURRENCY} \
     --max-tasks-per-child=${CELERY_MAX_TASKS_PER_CHILD:-100} \
-    --pool=prefork \
+    --pool=${POOL} \
+    --queues=${QUEUES} \
     --without-heartbeat \
     --without-gossip \
     --without-mingle
\ No newline at end of file
@@ -100,16 +100,14 @@ def test_event_loop_manager():
     """Test event loop management for async code."""
     print("\n=== Testing Event Loop Manager ===")
 
-    from app.utils.event_loop_manager import SafeEventLoopManager
+    from app.utils.event_loop_manager import run_async
 
     async def sample_async_function():
         await asyncio.sleep(0.1)
         return "async result"
 
-    # Test running async code in sync context
-    result = SafeEventLoopManager.run_async_in_worker(
-        sample_async_function()
-    )
+    # Test running async code in sync context (on the background loop)
+    result = run_async(sample_async_function(), timeout=5)
 
     print(f"Async result in sync context: {result}")
 
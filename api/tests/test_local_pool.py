@@ -0,0 +1,56 @@
+"""Tests for process-pool local scoring (app.adapters.local_pool)."""
+
+import billiard
+import numpy as np
+import pytest
+
+from app.adapters import local_pool
+from app.config import settings
+
+COMMENTS = [
+    "Excelente servicio, muy satisfecho con la atención",
+    "Terrible experiencia, el precio es demasiado caro",
+    "No entiendo cómo funciona la aplicación",
+    "La entrega llegó tarde y el producto vino defectuoso",
+] * 10
+
+
+def _score_in_worker():
+    """Run score_comments as a Celery prefork child would (daemonic process)."""
+    settings.LOCAL_POOL_MIN_COMMENTS = 10
+    shards = local_pool.pool_size(len(COMMENTS))
+    scores = local_pool.score_comments(COMMENTS)
+    return billiard.current_process().daemon, shards, tuple(scores)
+
+
+def _assert_same_scores(actual, expected):
+    for got, want in zip(actual, expected):
+        np.testing.assert_array_equal(got, want)
+
+
+def test_score_comments_in_daemonic_child():
+    expected = local_pool._score(COMMENTS, "es")
+
+    with billiard.Pool(1) as pool:
+        daemonic, shards, scores = pool.apply(_score_in_worker)
+
+    assert daemonic
+    assert shards == 1
+    _assert_same_scores(scores, expected)
+
+
+def test_pooled_scores_match_in_process(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_POOL_MIN_COMMENTS", 10)
+    monkeypatch.setattr(local_pool, "_max_processes", lambda: 2)
+    expected = local_pool._score(COMMENTS, "es")
+
+    try:
+        assert local_pool.pool_size(len(COMMENTS)) == 2
+        _assert_same_scores(local_pool.score_comments(COMMENTS), expected)
+    finally:
+        local_pool.stop_pool()
+
+
+def test_small_sets_stay_in_process(monkeypatch):
+    monkeypatch.setattr(local_pool, "start_pool", lambda: pytest.fail("pool started"))
+    assert local_pool.pool_size(settings.LOCAL_POOL_MIN_COMMENTS - 1) == 1
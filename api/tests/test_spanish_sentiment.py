@@ -0,0 +1,38 @@
+"""Tests for the local Spanish sentiment scorer (app.adapters.spanish_sentiment)."""
+
+import numpy as np
+import pytest
+
+from app.adapters.spanish_sentiment import POLARITY_COLUMNS, get_spanish_scorer
+
+TEXTS = [
+    "No me gusta nada, muy malo",
+    "No me gusta nada muy malo",
+    "No es malo",
+    "no,bueno",
+    "Nada. Excelente servicio!!",
+    "El producto NO funciona;pésimo",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return get_spanish_scorer()
+
+
+def test_negation_stops_at_clause_punctuation(scorer):
+    assert scorer.polarity_scores("No me gusta nada, muy malo")["compound"] < 0
+    assert scorer.polarity_scores("no, bueno")["compound"] > 0
+
+
+def test_negation_within_clause_flips(scorer):
+    assert scorer.polarity_scores("No es malo")["compound"] > 0
+    assert scorer.polarity_scores("No me gusta")["compound"] < 0
+
+
+def test_matrix_matches_polarity_scores(scorer):
+    matrix = scorer.polarity_matrix(TEXTS)
+    for text, row in zip(TEXTS, matrix):
+        scores = scorer.polarity_scores(text)
+        np.testing.assert_allclose(row, [scores[column] for column in POLARITY_COLUMNS])